@@ -1,16 +1,46 @@
 import azure.functions as func
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import form, schedule
+from app.config import CLIENT_ID, ASYNC_MODE, COMPRESSION_MIN_SIZE
+from app.dependencies import close_async_cosmos_client
+from app.internal.form_candidates import CANDIDATES_AGE_HEADER
+from app.internal.graph_client import close_async_graph_client
+from app.internal.token_provider import token_provider
+from app.routers import metrics
+from app.utils.compression import CompressionMiddleware
+from app.utils.responses import ORJSONResponse
+
+# 起動時の設定に応じて、同期版または非同期版のエンドポイントを使用する
+if ASYNC_MODE:
+    from app.routers import form_async as form, schedule_async as schedule
+else:
+    from app.routers import form, schedule
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """アプリケーションの起動・終了処理"""
+    # 最初のリクエストを待たずに Graph API のアクセストークンを取得しておく
+    if CLIENT_ID:
+        token_provider.start()
+    yield
+    token_provider.stop()
+    if ASYNC_MODE:
+        await close_async_graph_client()
+        await close_async_cosmos_client()
+
 
 # FastAPI アプリケーションの初期化
 app = FastAPI(
     title="Schedule Management API",
     description="面接・打ち合わせ等のスケジュール調整APIです",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORSミドルウェアの設定
@@ -20,8 +50,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CANDIDATES_AGE_HEADER],  # 空き時間候補の鮮度をフロントエンドから参照できるようにする
 )
 
+# レスポンスの圧縮（brotli / gzip、COMPRESSION_MIN_SIZE バイト未満のレスポンスは圧縮しない）
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # ロギングの設定
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +65,7 @@ logging.basicConfig(
 # ルーターの登録
 app.include_router(form.router, prefix="", tags=["forms"])
 app.include_router(schedule.router, prefix="", tags=["schedule"])
+app.include_router(metrics.router, prefix="", tags=["metrics"])
 
 # ルートパスのエンドポイント
 @app.get("/")
@@ -10,8 +10,16 @@ TENANT_ID = os.getenv("TENANT_ID")
 CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 
+# 実行モード（true の場合、async def のエンドポイントと非同期クライアントを使用する）
+ASYNC_MODE = os.getenv("ASYNC_MODE", "false").lower() in ("1", "true", "yes")
+
 # パーティションキー
+# 移行前の単一の論理パーティションのキー（PARTITION_STRATEGY が "legacy" の場合はすべてのドキュメントに使用する）
 PARTITION_KEY = "FormData"
+# パーティションの分け方（"token": ドキュメントIDごと / "legacy": PARTITION_KEY の単一パーティション）
+PARTITION_STRATEGY = os.getenv("PARTITION_STRATEGY", "token").lower()
+# ドキュメントが見つからない場合に、移行前のパーティションも探すかどうか（移行の完了後は false にする）
+LEGACY_PARTITION_FALLBACK = os.getenv("LEGACY_PARTITION_FALLBACK", "true").lower() in ("1", "true", "yes")
 
 # URL設定
 # ローカル開発用
@@ -27,3 +35,59 @@ SYSTEM_SENDER_EMAIL = "crawler01@intelligentforce.co.jp"
 
 # TTL設定（秒）
 DOCUMENT_TTL = 36000  # 10時間
+
+# 候補日の逆引きインデックスを登録する際の最大同時リクエスト数
+COSMOS_INDEX_CONCURRENCY = int(os.getenv("COSMOS_INDEX_CONCURRENCY", "8"))
+# Cosmos DB の一時的なエラーの再試行の設定（Graph API と同じ方針。x-ms-retry-after-ms が指定された場合はその時間だけ待つ）
+COSMOS_RETRY_MAX_ATTEMPTS = int(os.getenv("COSMOS_RETRY_MAX_ATTEMPTS", "3"))
+COSMOS_RETRY_BASE_DELAY = float(os.getenv("COSMOS_RETRY_BASE_DELAY", "0.2"))  # 秒
+COSMOS_RETRY_MAX_DELAY = float(os.getenv("COSMOS_RETRY_MAX_DELAY", "2"))  # 秒
+COSMOS_REQUEST_DEADLINE = float(os.getenv("COSMOS_REQUEST_DEADLINE", "10"))  # 秒
+
+# フォームのキャッシュ設定（トークンごとのフォームのドキュメント）
+FORM_CACHE_MAX_ENTRIES = int(os.getenv("FORM_CACHE_MAX_ENTRIES", "1024"))  # 0 の場合はキャッシュしない
+# 保存からこの秒数を過ぎたエントリは、ETag による条件付きの読み込みで変更の有無を確認してから使用する
+FORM_CACHE_REVALIDATE_SECONDS = float(os.getenv("FORM_CACHE_REVALIDATE_SECONDS", "5"))
+
+# Microsoft Graph API 設定
+GRAPH_API_BASE_URL = "https://graph.microsoft.com"
+# 接続プールの設定（ホストごとのプール数・1プールあたりの最大接続数）
+GRAPH_POOL_CONNECTIONS = int(os.getenv("GRAPH_POOL_CONNECTIONS", "4"))
+GRAPH_POOL_MAXSIZE = int(os.getenv("GRAPH_POOL_MAXSIZE", "32"))
+# タイムアウト設定（秒）
+GRAPH_CONNECT_TIMEOUT = float(os.getenv("GRAPH_CONNECT_TIMEOUT", "5"))
+GRAPH_READ_TIMEOUT = float(os.getenv("GRAPH_READ_TIMEOUT", "60"))
+# getSchedule を分割して取得する際の最大同時リクエスト数
+GRAPH_SCHEDULE_CONCURRENCY = int(os.getenv("GRAPH_SCHEDULE_CONCURRENCY", "8"))
+# 異なるリクエストの getSchedule をまとめて送信するために待つ最大の時間（ミリ秒、他の取得が実行中の間だけ待つ。0 の場合は待たずに送信する）
+GRAPH_SCHEDULE_BATCH_WINDOW_MS = float(os.getenv("GRAPH_SCHEDULE_BATCH_WINDOW_MS", "25"))
+# 再試行の設定（full jitter の指数バックオフ。Retry-After が指定された場合はその秒数だけ待つ）
+GRAPH_RETRY_MAX_ATTEMPTS = int(os.getenv("GRAPH_RETRY_MAX_ATTEMPTS", "3"))  # 最初の試行を含む最大試行回数
+GRAPH_RETRY_BASE_DELAY = float(os.getenv("GRAPH_RETRY_BASE_DELAY", "0.5"))  # 秒
+GRAPH_RETRY_MAX_DELAY = float(os.getenv("GRAPH_RETRY_MAX_DELAY", "8"))  # 秒
+# 1回の処理（再試行を含む）の期限（秒）。期限までに再試行できない場合は待たずに失敗とする
+GRAPH_REQUEST_DEADLINE = float(os.getenv("GRAPH_REQUEST_DEADLINE", "30"))
+# サーキットブレーカーの設定（一時的なエラーがこの回数連続した場合、一定時間 Graph API への送信を止める。0 の場合は使用しない）
+GRAPH_BREAKER_FAILURE_THRESHOLD = int(os.getenv("GRAPH_BREAKER_FAILURE_THRESHOLD", "5"))
+GRAPH_BREAKER_RESET_SECONDS = float(os.getenv("GRAPH_BREAKER_RESET_SECONDS", "30"))
+# アクセストークン設定
+GRAPH_SCOPES = ["https://graph.microsoft.com/.default"]  # Graph API 全般の既定スコープ
+# 有効期限の何秒前にバックグラウンドでトークンを更新するか
+GRAPH_TOKEN_REFRESH_MARGIN = float(os.getenv("GRAPH_TOKEN_REFRESH_MARGIN", "240"))
+
+# 空き時間キャッシュ設定（面接担当者ごと・日ごとの availabilityView）
+AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", "300"))  # 秒
+AVAILABILITY_CACHE_MAX_BYTES = int(os.getenv("AVAILABILITY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# 空き時間候補のページング設定
+# /get_availability の limit に指定できる最大件数（cursor のみ指定した場合のページサイズ）
+MAX_AVAILABILITY_LIMIT = int(os.getenv("MAX_AVAILABILITY_LIMIT", "1000"))
+# /retrieve_form_data で返す候補の最大件数（0 の場合はすべての候補を返す）
+FORM_CANDIDATE_LIMIT = int(os.getenv("FORM_CANDIDATE_LIMIT", "0"))
+# フォームに保存した空き時間候補を再計算せずに返す期間（秒、計算時刻 candidatesComputedAt からの経過時間）
+FORM_CANDIDATES_MAX_AGE = float(os.getenv("FORM_CANDIDATES_MAX_AGE", "300"))
+# NDJSON でストリーミングする場合に、一度に取得する日数
+AVAILABILITY_STREAM_BLOCK_DAYS = int(os.getenv("AVAILABILITY_STREAM_BLOCK_DAYS", "7"))
+
+# レスポンスの圧縮（brotli / gzip）を行う最小のボディサイズ（バイト）
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
@@ -1,14 +1,15 @@
 import logging
-import time
-from msal import ConfidentialClientApplication
-from azure.cosmos import CosmosClient, PartitionKey
+import threading
+import anyio
+from azure.cosmos import CosmosClient
+from azure.cosmos.aio import CosmosClient as AsyncCosmosClient
+from azure.cosmos.documents import ConnectionPolicy, RetryOptions
 
 from app.config import (
     COSMOS_DB_ENDPOINT, COSMOS_DB_KEY, 
-    COSMOS_DATABASE_NAME, COSMOS_CONTAINER_NAME,
-    PARTITION_KEY, TENANT_ID, CLIENT_ID, CLIENT_SECRET,
-    DOCUMENT_TTL
+    COSMOS_DATABASE_NAME, COSMOS_CONTAINER_NAME
 )
+from app.internal.token_provider import token_provider
 
 # ロギングの設定
 logging.basicConfig(
@@ -17,46 +18,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cosmos DB クライアントの初期化
-cosmos_client = CosmosClient(COSMOS_DB_ENDPOINT, COSMOS_DB_KEY)
-database = cosmos_client.create_database_if_not_exists(id=COSMOS_DATABASE_NAME)
-container = database.create_container_if_not_exists(
-    id=COSMOS_CONTAINER_NAME,
-    partition_key=PartitionKey(path="/partitionKey"),
-    offer_throughput=400,
-    default_ttl=DOCUMENT_TTL
-)
+# Cosmos DB クライアント（最初の利用時に作成）
+# データベース・コンテナは起動時には作成しない（デプロイ時に python -m tools.bootstrap_cosmos で作成しておく）
+cosmos_client = None
+container = None
+_container_lock = threading.Lock()
+
+# 非同期モード用の Cosmos DB クライアント（最初の利用時に作成）
+async_cosmos_client = None
+async_container = None
+
+
+def cosmos_connection_policy() -> ConnectionPolicy:
+    """
+    Cosmos DB クライアントの接続設定
+    スロットリング（429）は cosmos.call_with_retry で COSMOS_REQUEST_DEADLINE 秒の期限まで再試行するため、
+    SDK による再試行は行わない（二重に再試行すると、期限を超えて待つことになるため）
+    """
+    policy = ConnectionPolicy()
+    policy.RetryOptions = RetryOptions(max_retry_attempt_count=0)
+    return policy
+
+
+def get_container():
+    """
+    同期モードで使用する Cosmos DB のコンテナクライアントを取得
+    クライアントの作成はネットワークアクセスを伴わず、最初の呼び出し時に一度だけ行う
+    """
+    global cosmos_client, container
+    if container is None:
+        with _container_lock:
+            if container is None:
+                cosmos_client = CosmosClient(
+                    COSMOS_DB_ENDPOINT, COSMOS_DB_KEY, connection_policy=cosmos_connection_policy()
+                )
+                container = cosmos_client.get_database_client(
+                    COSMOS_DATABASE_NAME
+                ).get_container_client(COSMOS_CONTAINER_NAME)
+    return container
+
+
+def get_async_container():
+    """
+    非同期モードで使用する Cosmos DB のコンテナクライアントを取得
+    """
+    global async_cosmos_client, async_container
+    if async_container is None:
+        async_cosmos_client = AsyncCosmosClient(
+            COSMOS_DB_ENDPOINT, COSMOS_DB_KEY, connection_policy=cosmos_connection_policy()
+        )
+        async_container = async_cosmos_client.get_database_client(
+            COSMOS_DATABASE_NAME
+        ).get_container_client(COSMOS_CONTAINER_NAME)
+    return async_container
+
+
+async def close_async_cosmos_client() -> None:
+    """
+    非同期モード用の Cosmos DB クライアントを閉じる
+    """
+    global async_cosmos_client, async_container
+    if async_cosmos_client is not None:
+        await async_cosmos_client.close()
+        async_cosmos_client = None
+        async_container = None
+
 
 # Microsoft Graph API用のアクセストークン取得
 def get_access_token() -> str:
     """
     Microsoft Graph API にアクセスするための認証トークンを取得
+    トークンはプロセス内でキャッシュされ、有効期限前にバックグラウンドで更新される
+    """
+    return token_provider.get_token()
+
+
+async def get_access_token_async() -> str:
+    """
+    非同期モード用のアクセストークン取得
+    キャッシュ済みのトークンがあればそのまま返し、無い場合のみ取得処理をワーカースレッドで実行する
     """
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            scope = ["https://graph.microsoft.com/.default"]  # Graph API 全般の既定スコープ
-            
-            app = ConfidentialClientApplication(
-                client_id=CLIENT_ID,
-                client_credential=CLIENT_SECRET,
-                authority=f"https://login.microsoftonline.com/{TENANT_ID}"
-            )
-            
-            result = app.acquire_token_silent(scope, account=None)
-            if not result:
-                result = app.acquire_token_for_client(scopes=scope)
-            
-            if "access_token" in result:
-                return result["access_token"]
-            else:
-                logger.error(f"トークン取得に失敗しました: {result.get('error_description')}")
-                raise Exception(f"トークン取得失敗: {result.get('error_description')}")
-        except Exception as e:
-            retry_count += 1
-            if retry_count >= max_retries:
-                logger.error(f"最大リトライ回数に達しました: {e}")
-                raise
-            time.sleep(2 ** retry_count)  # 指数バックオフ
+    token = token_provider.get_cached_token()
+    if token:
+        return token
+    return await anyio.to_thread.run_sync(token_provider.get_token)
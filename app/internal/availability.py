@@ -0,0 +1,181 @@
+import logging
+from datetime import date, timedelta
+from typing import Iterator
+
+from app.internal.graph_api import AVAILABILITY_VIEW_INTERVAL
+from app.schemas import ScheduleRequest
+from app.utils.slot_bitmap import find_common_run_starts
+from app.utils.slot_matrix import views_to_matrix, find_k_of_n_windows
+from app.utils.day_windows import plan_day_windows
+from app.utils.slots import SlotRuns
+
+logger = logging.getLogger(__name__)
+
+# 空き時間候補を順次評価する際に、一度に評価する日数
+CANDIDATE_CHUNK_DAYS = 7
+
+
+def compute_common_times(schedule_req, schedule_info, limit: int = None) -> list:
+    """
+    getSchedule のレスポンスから、空き時間候補を "YYYY-MM-DDTHH:MM:SS" 形式の
+    [開始日時, 終了日時] のリストとして計算する
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        schedule_info: Graph APIからのレスポンス
+        limit: 最大件数（指定した場合は、日付順に limit 件を求めた時点で評価をやめる）
+
+    Returns:
+        list: 空き時間候補のリスト
+    """
+    if limit:
+        page, _ = find_candidate_page(schedule_req, schedule_info, limit)
+        return page.to_iso_pairs()
+    return find_common_slots(schedule_req, schedule_info).to_iso_pairs()
+
+
+def find_common_slots(schedule_req, schedule_info) -> SlotRuns:
+    """
+    getSchedule のレスポンスから、空き時間候補を起点日（start_date 0:00）からの経過分の時間帯として求める
+    schedule_info は get_schedules が返す、選択された曜日の毎日の時間帯の枠だけを連結したもので、
+    候補は1日の時間帯に収まるもの（夜間や選択されていない曜日をまたがないもの）に限る
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        schedule_info: get_schedules の戻り値
+
+    Returns:
+        SlotRuns: 空き時間候補の時間帯
+    """
+    return SlotRuns.concat(schedule_req.start_date, list(iter_common_slots(schedule_req, schedule_info, chunk_days=None)))
+
+
+def iter_common_slots(schedule_req, schedule_info, after_minute: int = None,
+                      chunk_days: int = CANDIDATE_CHUNK_DAYS) -> Iterator[SlotRuns]:
+    """
+    空き時間候補を、日付順に chunk_days 日分のウィンドウごとに評価して順次返すジェネレータ
+    必要な件数がそろった時点で呼び出し側が反復をやめれば、以降の日は評価しない
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        schedule_info: get_schedules の戻り値
+        after_minute: この経過分より後に開始する候補だけを返す（カーソルからの再開用）
+        chunk_days: 一度に評価する日数（None の場合はすべての日を一度に評価する）
+
+    Yields:
+        SlotRuns: 空き時間候補の時間帯（空の集合は返さない）
+    """
+    availability_views = [schedule.get("availabilityView") or "" for schedule in schedule_info.get("value", [])]
+    plan = plan_day_windows(schedule_req, AVAILABILITY_VIEW_INTERVAL)
+
+    if len(schedule_req.users) == schedule_req.required_participants:
+        # required_participantsが全員の場合は、availabilityView のビットマスクから全員の空き時間を求める
+        required_slots = max(schedule_req.duration_minutes // AVAILABILITY_VIEW_INTERVAL, 1)
+
+        def find_run_starts(views, allowed_starts):
+            return find_common_run_starts(views, required_slots, allowed_starts)
+    else:
+        # required_participantsに基づいて、ユーザー × 枠の行列から共通の空き時間を計算
+        required_slots = max((schedule_req.duration_minutes + AVAILABILITY_VIEW_INTERVAL - 1) // AVAILABILITY_VIEW_INTERVAL, 1)
+
+        def find_run_starts(views, allowed_starts):
+            return find_k_of_n_windows(
+                views_to_matrix(views),
+                required_slots,
+                schedule_req.required_participants,
+                allowed_starts
+            )
+
+    allowed_starts = plan.run_start_mask(required_slots)
+    first_window = plan.first_window_after(after_minute) if after_minute is not None else 0
+    window_count = len(plan.days)
+    step = chunk_days or max(window_count - first_window, 1)
+
+    for window in range(first_window, window_count, step):
+        # ウィンドウの境界で区切るため、区切った範囲の中で候補が完結する
+        lo = window * plan.window_slots
+        hi = min(window + step, window_count) * plan.window_slots
+        run_starts = find_run_starts([view[lo:hi] for view in availability_views], allowed_starts[lo:hi]) + lo
+        slots = SlotRuns.from_slot_offsets(
+            schedule_req.start_date,
+            plan.slot_offsets,
+            run_starts,
+            required_slots,
+            AVAILABILITY_VIEW_INTERVAL
+        )
+        if after_minute is not None:
+            slots = slots[slots.starts > after_minute]
+        if len(slots):
+            yield slots
+
+
+def find_candidate_page(schedule_req, schedule_info, limit: int, after_minute: int = None) -> tuple:
+    """
+    空き時間候補を日付順に最大 limit 件まで求める（limit 件を超えた時点で以降の評価をやめる）
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        schedule_info: get_schedules の戻り値
+        limit: 最大件数
+        after_minute: この経過分より後に開始する候補だけを返す（カーソルからの再開用）
+
+    Returns:
+        tuple: (最大 limit 件の空き時間候補の時間帯, 続きの候補があるかどうか)
+    """
+    collected = []
+    count = 0
+    for slots in iter_common_slots(schedule_req, schedule_info, after_minute):
+        collected.append(slots)
+        count += len(slots)
+        if count > limit:
+            break
+    page = SlotRuns.concat(schedule_req.start_date, collected)
+    return page[:limit], count > limit
+
+
+def split_schedule_request(schedule_req, block_days: int) -> list:
+    """
+    取得期間を block_days 日ごとのスケジュールリクエストに分割する（ストリーミングで期間の先頭から順に返すため）
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        block_days: 1つのリクエストの日数
+
+    Returns:
+        list: 期間以外は元と同じ条件のスケジュールリクエストのリスト（日付順、少なくとも1件）
+    """
+    start = date.fromisoformat(schedule_req.start_date)
+    end = date.fromisoformat(schedule_req.end_date)
+    blocks = []
+    block_start = start
+    while block_start <= end:
+        block_end = min(block_start + timedelta(days=max(block_days, 1) - 1), end)
+        blocks.append(schedule_req.model_copy(update={
+            "start_date": block_start.isoformat(),
+            "end_date": block_end.isoformat()
+        }))
+        block_start = block_end + timedelta(days=1)
+    return blocks or [schedule_req]
+
+
+def schedule_request_from_form(item: dict):
+    """
+    保存済みフォームデータから ScheduleRequest を作成する（全員参加を条件とする）
+
+    Parameters:
+        item: フォームデータ
+
+    Returns:
+        ScheduleRequest: スケジュールリクエストオブジェクト
+    """
+    return ScheduleRequest(
+        start_date=item["start_date"],
+        end_date=item["end_date"],
+        start_time=item["start_time"],
+        end_time=item["end_time"],
+        selected_days=item["selected_days"],
+        duration_minutes=item["duration_minutes"],
+        users=item["users"],
+        required_participants=len(item["users"]),
+        time_zone="Tokyo Standard Time"
+    )
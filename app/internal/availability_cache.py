@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import AVAILABILITY_CACHE_TTL, AVAILABILITY_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# 1エントリあたりのキー・管理情報の概算サイズ（バイト）
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class AvailabilityCache:
+    """
+    面接担当者ごと・日ごとの availabilityView（0:00〜24:00 の1日分）をメモリ上に保持するキャッシュ。
+
+    - キーは (メールアドレス, 日付, 枠の長さ(分), タイムゾーン)
+    - TTL を過ぎたエントリは取得時に破棄し、未取得として扱う
+    - 保持しているエントリの概算サイズが上限を超えた場合は、最も長く使われていないものから破棄する
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self._ttl = ttl
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # キー → (availabilityView, 取得時刻)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _entry_size(view: str) -> int:
+        return len(view) + ENTRY_OVERHEAD_BYTES
+
+    def _remove(self, key) -> None:
+        view, _ = self._entries.pop(key)
+        self._bytes -= self._entry_size(view)
+
+    def get_many(self, user_emails: list, days: list, interval: int, time_zone: str) -> dict:
+        """
+        キャッシュ済みの1日分の availabilityView をまとめて取得する
+
+        Parameters:
+            user_emails: ユーザーメールアドレスのリスト
+            days: 日付（"YYYY-MM-DD"）のリスト
+            interval: availabilityView の1枠の長さ（分）
+            time_zone: タイムゾーン
+
+        Returns:
+            dict: (メールアドレス, 日付) → availabilityView（有効なエントリのみ）
+        """
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for user_email in user_emails:
+                for day in days:
+                    key = (user_email.lower(), day, interval, time_zone)
+                    entry = self._entries.get(key)
+                    if entry is not None and now - entry[1] >= self._ttl:
+                        self._remove(key)
+                        entry = None
+                    if entry is None:
+                        self._misses += 1
+                        continue
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    found[(user_email, day)] = entry[0]
+        return found
+
+    def put_many(self, day_views: dict, interval: int, time_zone: str) -> None:
+        """
+        取得した1日分の availabilityView をまとめて保存し、上限を超えた分を破棄する
+
+        Parameters:
+            day_views: (メールアドレス, 日付) → availabilityView
+            interval: availabilityView の1枠の長さ（分）
+            time_zone: タイムゾーン
+        """
+        now = time.monotonic()
+        with self._lock:
+            for (user_email, day), view in day_views.items():
+                key = (user_email.lower(), day, interval, time_zone)
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (view, now)
+                self._bytes += self._entry_size(view)
+
+            while self._entries and self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, user_emails: list) -> None:
+        """
+        指定したユーザーのエントリをすべて破棄する（予定の登録・削除でカレンダーが変わった場合）
+        """
+        targets = {user_email.lower() for user_email in user_emails}
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in targets]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """
+        すべてのエントリと統計情報を破棄する
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self) -> dict:
+        """
+        ヒット数・ミス数などの統計情報を返す
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+
+# プロセス全体で共有する空き時間キャッシュ
+availability_cache = AvailabilityCache(
+    ttl=AVAILABILITY_CACHE_TTL,
+    max_bytes=AVAILABILITY_CACHE_MAX_BYTES
+)
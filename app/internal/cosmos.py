@@ -1,15 +1,238 @@
 import logging
 import uuid
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache, partial
+from azure.core import MatchConditions
 from azure.cosmos import exceptions
 from fastapi import HTTPException
 from dateutil.parser import parse
 
-from app.dependencies import container
-from app.config import PARTITION_KEY
+from app.dependencies import get_container
+from app.internal.form_cache import form_cache
+from app.internal.resilience import (
+    COSMOS_RETRYABLE_STATUSES, cosmos_retry_policy, is_retryable_status, retry_after_seconds
+)
+from app.config import (
+    PARTITION_KEY, PARTITION_STRATEGY, LEGACY_PARTITION_FALLBACK, COSMOS_INDEX_CONCURRENCY, DOCUMENT_TTL
+)
 
 logger = logging.getLogger(__name__)
 
+# 候補日の逆引きインデックス（候補日ごとに、その候補日を含むフォームのトークンを保持するドキュメント）
+SLOT_INDEX_TYPE = "slotIndex"
+SLOT_INDEX_PREFIX = "slot:"
+# 候補日の逆引きインデックスを、候補日の終了日時を過ぎてから保持する時間（秒、サーバーとフォームのタイムゾーンの差を含む）
+SLOT_INDEX_TTL_MARGIN = 24 * 60 * 60
+# 更新前に削除するシステムプロパティ
+SYSTEM_PROPERTIES = ["_rid", "_self", "_attachments", "_ts"]
+# トランザクションバッチの最大操作数（Cosmos DB の上限）
+BATCH_MAX_OPERATIONS = 100
+# 未確定のフォームだけを確定する条件（同じフォームへの同時の予約を1件に限る）
+UNCONFIRMED_FILTER = "FROM c WHERE NOT IS_DEFINED(c.isConfirmed) OR c.isConfirmed = false"
+
+
+class FormConflictError(Exception):
+    """
+    フォームが他のリクエストによって更新されていたため、更新できなかった場合のエラー
+    （ETag が一致しない、または確定済みのフォームを確定しようとした場合）
+    """
+
+
+def partition_key_for(doc_id: str) -> str:
+    """
+    ドキュメントを書き込むパーティションキーを返す
+    - "token": ドキュメントID（フォームはトークン、インデックスは候補日のキー）ごとに論理パーティションを分ける
+    - "legacy": すべてのドキュメントを PARTITION_KEY（"FormData"）の単一の論理パーティションに書き込む
+    """
+    return doc_id if PARTITION_STRATEGY == "token" else PARTITION_KEY
+
+
+def read_partition_keys(doc_id: str) -> list:
+    """
+    ドキュメントを読み込む際に探すパーティションキーを、探す順に返す
+    移行中（LEGACY_PARTITION_FALLBACK が有効）は、移行前の単一のパーティションも探す
+    """
+    keys = [partition_key_for(doc_id)]
+    if LEGACY_PARTITION_FALLBACK and keys[0] != PARTITION_KEY:
+        keys.append(PARTITION_KEY)
+    return keys
+
+
+def cosmos_retry_delay(error: exceptions.CosmosHttpResponseError, attempt: int, deadline: float) -> float | None:
+    """
+    Cosmos DB の呼び出しが失敗した場合に、再試行までに待つ秒数を返す
+    スロットリング（429）や一時的なエラー（COSMOS_RETRYABLE_STATUSES）のみ、x-ms-retry-after-ms
+    （無い場合は full jitter の指数バックオフ）だけ待って再試行する
+
+    Parameters:
+        error: Cosmos DB のエラー
+        attempt: 失敗した試行の回数（1 から数える）
+        deadline: cosmos_retry_policy.start() が返した期限
+
+    Returns:
+        float | None: 待つ秒数（再試行しない場合は None）
+    """
+    if not is_retryable_status(error.status_code, COSMOS_RETRYABLE_STATUSES):
+        return None
+    return cosmos_retry_policy.backoff(attempt, deadline, retry_after_seconds(error.headers or {}))
+
+
+def call_with_retry(call):
+    """
+    Cosmos DB の呼び出しを、一時的なエラーの場合に COSMOS_REQUEST_DEADLINE 秒の期限まで再試行する
+    前提条件の不一致（412）や 404 などは再試行せずにそのまま送出する
+
+    Parameters:
+        call: 引数なしで呼び出す Cosmos DB の操作
+
+    Returns:
+        call の戻り値
+    """
+    deadline = cosmos_retry_policy.start()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return call()
+        except exceptions.CosmosHttpResponseError as e:
+            delay = cosmos_retry_delay(e, attempt, deadline)
+            if delay is None:
+                raise
+            logger.warning(f"Cosmos DB の一時的なエラーのため、{delay:.2f} 秒後に再試行します: {e.status_code}")
+            time.sleep(delay)
+
+
+def read_document(doc_id: str) -> dict:
+    """
+    ドキュメントを読み込む（現在のパーティションに無い場合は、移行前のパーティションを探す）
+    スロットリングなどの一時的なエラーは、call_with_retry で再試行する
+
+    Raises:
+        exceptions.CosmosResourceNotFoundError: どのパーティションにも無い場合
+    """
+    container = get_container()
+    keys = read_partition_keys(doc_id)
+    for i, partition_key in enumerate(keys):
+        try:
+            return call_with_retry(partial(container.read_item, item=doc_id, partition_key=partition_key))
+        except exceptions.CosmosResourceNotFoundError:
+            if i == len(keys) - 1:
+                raise
+
+
+def patch_conditions(etag: str = None, filter_predicate: str = None) -> dict:
+    """
+    パッチの前提条件（ETag の一致・ドキュメントが満たす条件）を patch_item の引数に変換する
+    """
+    conditions = {"filter_predicate": filter_predicate} if filter_predicate else {}
+    if etag:
+        conditions.update(etag=etag, match_condition=MatchConditions.IfNotModified)
+    return conditions
+
+
+def form_patch_operations(operations: list) -> list:
+    """
+    フォームのパッチ操作に、有効期限を既定（DOCUMENT_TTL）に戻す操作を加える
+    （パーティションの移行で移行前の残りの有効期限を ttl に設定したフォームも、次の更新からは既定の有効期限となる）
+    """
+    return operations + [{"op": "set", "path": "/ttl", "value": DOCUMENT_TTL}]
+
+
+def patch_document(doc_id: str, operations: list, etag: str = None, filter_predicate: str = None) -> dict:
+    """
+    フォームの一部のフィールドだけを更新する（現在のパーティションに無い場合は、移行前のパーティションを探す）
+    読み込みと置き換えの2往復ではなく、1往復で更新する（一時的なエラーは call_with_retry で再試行する）
+    あわせて有効期限を既定に戻す（form_patch_operations）
+
+    Parameters:
+        doc_id: ドキュメントID
+        operations: パッチ操作（[{"op": "set", "path": "/isConfirmed", "value": True}] など）
+        etag: 指定した場合は、ドキュメントの ETag が一致する場合のみ更新する
+        filter_predicate: 指定した場合は、ドキュメントが条件を満たす場合のみ更新する
+
+    Returns:
+        dict: 更新後のドキュメント
+
+    Raises:
+        FormConflictError: ETag または条件が一致しない場合
+        exceptions.CosmosResourceNotFoundError: どのパーティションにも無い場合
+    """
+    conditions = patch_conditions(etag, filter_predicate)
+    container = get_container()
+    keys = read_partition_keys(doc_id)
+    try:
+        for i, partition_key in enumerate(keys):
+            try:
+                return call_with_retry(partial(
+                    container.patch_item,
+                    item=doc_id, partition_key=partition_key, patch_operations=form_patch_operations(operations),
+                    **conditions
+                ))
+            except exceptions.CosmosAccessConditionFailedError as e:
+                raise FormConflictError(f"{doc_id} は他のリクエストによって更新されています") from e
+            except exceptions.CosmosResourceNotFoundError:
+                if i == len(keys) - 1:
+                    raise
+    finally:
+        # 成功・失敗にかかわらず、キャッシュ済みのフォームは古くなっている可能性がある
+        form_cache.invalidate(doc_id)
+
+
+def read_form_cached(token: str, revalidate: bool = False) -> dict:
+    """
+    フォームをキャッシュから取得する（キャッシュに無い場合は読み込んでキャッシュする）
+    キャッシュ済みのフォームの再検証が必要な場合は、ETag を指定した条件付きの読み込みで変更の有無だけを確認し、
+    変更されていなければ（304 Not Modified、本文なし）キャッシュ済みのフォームを使用する
+
+    Parameters:
+        token: フォームデータのトークン
+        revalidate: True の場合は、保存からの経過時間にかかわらず再検証する
+
+    Raises:
+        exceptions.CosmosResourceNotFoundError: フォームが無い場合
+    """
+    cached, stale = form_cache.get(token, revalidate)
+    if cached is not None and not stale:
+        return cached
+    version = form_cache.version()
+    item = None
+    if cached is not None:
+        try:
+            item = call_with_retry(partial(
+                get_container().read_item,
+                item=token,
+                partition_key=cached["partitionKey"],
+                etag=cached["_etag"],
+                match_condition=MatchConditions.IfModified
+            ))
+            if not item:
+                form_cache.revalidated(token, cached["_etag"])
+                return cached
+        except exceptions.CosmosResourceNotFoundError:
+            # 期限切れ、またはパーティションの移行で移動したフォーム
+            form_cache.invalidate(token)
+    if not item:
+        item = read_document(token)
+    form_cache.put(token, item, version)
+    return item
+
+
+def new_form_document(payload: dict) -> tuple:
+    """
+    新しいトークンを発行し、保存するフォームのドキュメントを作成する（Cosmos DB では id と PartitionKey が必要）
+
+    Returns:
+        tuple: (トークン, ドキュメント)
+    """
+    token = str(uuid.uuid4())
+    return token, {
+        "id": token,
+        "partitionKey": partition_key_for(token),
+        **payload
+    }
+
 
 def create_form_data(payload: dict) -> str:
     """
@@ -24,157 +247,418 @@ def create_form_data(payload: dict) -> str:
     Raises:
         HTTPException: 保存に失敗した場合
     """
-    token = str(uuid.uuid4())
-    # Cosmos DB では id と PartitionKey が必要
-    data = {
-        "id": token,
-        "partitionKey": PARTITION_KEY,
-        **payload
-    }
+    token, data = new_form_document(payload)
     try:
-        container.create_item(body=data)
+        # 逆引きインデックスを先に登録する（フォームの保存に失敗した場合、残ったトークンは削除時に無視される）
+        index_form_candidates(token, payload.get("candidates") or [])
+        call_with_retry(partial(get_container().create_item, body=data))
         return token
     except Exception as e:
         logger.error(f"フォームデータの保存に失敗しました: {e}")
         raise HTTPException(status_code=500, detail="Failed to store form data")
 
 
-def get_form_data(token: str) -> dict:
+def strip_system_properties(item: dict) -> dict:
     """
-    指定されたトークンからCosmosDBにフォームデータを取得する
+    不要なシステムプロパティを削除したドキュメントを返す（"_etag" は更新時の前提条件に使用するため残す）
+    """
+    for key in SYSTEM_PROPERTIES:
+        item.pop(key, None)
+    return item
+
+
+def get_form_data(token: str, revalidate: bool = False) -> dict:
+    """
+    指定されたトークンからCosmosDBにフォームデータを取得する（メモリ上のキャッシュを使用する）
     
     Parameters:
         token: フォームデータのトークン
+        revalidate: True の場合は、キャッシュ済みのフォームが変更されていないことを必ず確認する
         
     Returns:
-        dict: フォームデータ
+        dict: フォームデータ（"_etag" は更新時の前提条件に使用する）
         
     Raises:
         HTTPException: データが見つからない場合
     """
     try:
-        # PartitionKey は "FormData" 固定で設定
-        item = container.read_item(item=token, partition_key=PARTITION_KEY)
-        # 不要なシステムプロパティを削除
-        for key in ["_rid", "_self", "_etag", "_ts"]:
-            item.pop(key, None)
-        return item
+        return strip_system_properties(read_form_cached(token, revalidate))
     except Exception as e:
         logger.error(f"Token が見つかりません: {e}")
         raise HTTPException(status_code=404, detail="Token not found")
 
 
-def update_form_with_events(token: str, event_ids: dict) -> None:
+@lru_cache(maxsize=4096)
+def normalize_datetime(value: str) -> str:
+    """
+    候補日の日時文字列を "YYYY-MM-DDTHH:MM:SS" 形式に正規化する（表記の揺れを吸収するため）
+    """
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        return parse(value).isoformat()
+
+
+def slot_key(candidate: list) -> str:
+    """
+    候補日（[開始日時, 終了日時]）の逆引きインデックスのドキュメントID
+    """
+    return f"{SLOT_INDEX_PREFIX}{normalize_datetime(candidate[0])}_{normalize_datetime(candidate[1])}"
+
+
+def exclude_candidate(candidates: list, selected_candidate: list) -> list:
     """
-    フォームデータにイベントIDを追加する
+    候補日リストから、選択された候補日と同じ日時の候補を除いたリストを返す
     
     Parameters:
-        token: フォームデータのトークン
-        event_ids: イベントID辞書
-        
-    Raises:
-        Exception: 更新に失敗した場合
+        candidates: 候補日リスト（[開始日時, 終了日時] のリスト）
+        selected_candidate: 選択された候補日
     """
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
+    selected_key = slot_key(selected_candidate)
+    return [c for c in candidates if slot_key(c) != selected_key]
+
+
+def slot_index_ttl(key: str) -> int:
+    """
+    候補日の逆引きインデックスの TTL（秒）
+    最終更新からの時間ではなく候補日の終了日時（+ SLOT_INDEX_TTL_MARGIN）で期限切れにするため、
+    フォームの更新で TTL が延びても、候補日を含むフォームより先にインデックスが期限切れになることはない
+    """
+    end = datetime.fromisoformat(key[len(SLOT_INDEX_PREFIX):].split("_", 1)[1])
+    remaining = (end - datetime.now(end.tzinfo)).total_seconds()
+    return max(int(remaining), 0) + SLOT_INDEX_TTL_MARGIN
+
+
+def slot_token_operations(key: str, token: str) -> list:
+    """
+    候補日の逆引きインデックスにフォームのトークンを追加するパッチ操作（TTL は候補日の終了日時から設定し直す）
+    """
+    return [
+        {"op": "add", "path": "/tokens/-", "value": token},
+        {"op": "set", "path": "/ttl", "value": slot_index_ttl(key)}
+    ]
+
+
+def slot_index_document(key: str, token: str) -> dict:
+    """
+    フォームのトークンを1件だけ含む、候補日の逆引きインデックスのドキュメント
+    """
+    return {
+        "id": key,
+        "partitionKey": partition_key_for(key),
+        "type": SLOT_INDEX_TYPE,
+        "tokens": [token],
+        "ttl": slot_index_ttl(key)
+    }
+
+
+def add_token_to_slot(key: str, token: str) -> None:
+    """
+    候補日の逆引きインデックスにフォームのトークンを追加する
+    ドキュメントが無い場合は作成し、同時に作成された場合は追加し直す（一時的なエラーは call_with_retry で再試行する）
+    """
+    container = get_container()
+    patch = partial(
+        container.patch_item,
+        item=key, partition_key=partition_key_for(key), patch_operations=slot_token_operations(key, token)
+    )
+    try:
+        call_with_retry(patch)
+    except exceptions.CosmosResourceNotFoundError:
         try:
-            form = container.read_item(item=token, partition_key=PARTITION_KEY)
-            form["event_ids"] = event_ids
-            container.replace_item(item=form["id"], body=form)
-            return
-        except exceptions.CosmosHttpResponseError as e:
-            retry_count += 1
-            if retry_count >= max_retries:
-                logger.error(f"Cosmos DB更新に失敗: {e}")
-                raise
-            time.sleep(2 ** retry_count)  # 指数バックオフ
+            call_with_retry(partial(container.create_item, body=slot_index_document(key, token)))
+        except exceptions.CosmosResourceExistsError:
+            call_with_retry(patch)
+
+
+def candidate_slot_keys(candidates: list) -> list:
+    """
+    候補日リストの逆引きインデックスのドキュメントID（重複を除く）
+    """
+    return list(dict.fromkeys(slot_key(candidate) for candidate in candidates))
+
+
+def index_form_candidates(token: str, candidates: list) -> None:
+    """
+    フォームの各候補日の逆引きインデックスに、フォームのトークンを登録する
+    
+    Parameters:
+        token: フォームデータのトークン
+        candidates: 候補日リスト（[開始日時, 終了日時] のリスト）
+    """
+    map_concurrently(lambda key: add_token_to_slot(key, token), candidate_slot_keys(candidates))
+
+
+def map_concurrently(func, items) -> list:
+    """
+    items の各要素に func を最大 COSMOS_INDEX_CONCURRENCY 件ずつ同時に適用し、結果のリストを返す
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(len(items), COSMOS_INDEX_CONCURRENCY)) as executor:
+        return list(executor.map(func, items))
+
+
+def indexed_tokens(slots: list, selected_token: str) -> list:
+    """
+    候補日の逆引きインデックスのドキュメントから、選択されたフォーム以外のトークンを重複なく取り出す
+    """
+    return [
+        token for token in dict.fromkeys(token for slot in slots for token in slot.get("tokens", []))
+        if token != selected_token
+    ]
+
+
+def plan_candidate_removals(forms: list, selected_candidate: list) -> tuple:
+    """
+    選択された候補日を含むフォームを、トランザクションバッチでまとめて更新するものと、フォームごとに更新するものに分ける
+    同じパーティションの2件以上のフォームは、BATCH_MAX_OPERATIONS 件ずつのバッチにまとめる
+
+    Parameters:
+        forms: 読み込んだフォームのリスト（読み込めなかったフォームは None）
+        selected_candidate: 選択された候補日
+
+    Returns:
+        tuple: ([(パーティションキー, [(フォーム, 削除後の候補日リスト)])], フォームごとに更新するフォームのリスト)
+    """
+    updates = {}  # パーティションキー → [(フォーム, 削除後の候補日リスト)]
+    for form in forms:
+        if form is None:
+            continue
+        candidates = form.get("candidates") or []
+        remaining = exclude_candidate(candidates, selected_candidate)
+        if len(remaining) != len(candidates):
+            updates.setdefault(form["partitionKey"], []).append((form, remaining))
+
+    batches = []
+    individual = []
+    for partition_key, group in updates.items():
+        if len(group) == 1:
+            individual.extend(form for form, _ in group)
+            continue
+        for start in range(0, len(group), BATCH_MAX_OPERATIONS):
+            batches.append((partition_key, group[start:start + BATCH_MAX_OPERATIONS]))
+    return batches, individual
+
+
+def candidate_batch_operations(chunk: list) -> list:
+    """
+    フォームごとの候補日リストの更新（読み込み時の ETag を前提条件とする）を、トランザクションバッチの操作に変換する
+    """
+    return [
+        ("patch", (form["id"], form_patch_operations(candidates_operations(remaining))), {"if_match_etag": form["_etag"]})
+        for form, remaining in chunk
+    ]
+
+
+def candidates_operations(candidates: list) -> list:
+    """
+    候補日リストを置き換えるパッチ操作
+    """
+    return [{"op": "set", "path": "/candidates", "value": candidates}]
 
 
 def remove_candidate_from_other_forms(selected_token: str, selected_candidate: list):
     """
     選択された候補日が含まれる他のフォームからその候補日を削除する
+    候補日の逆引きインデックスから対象のフォームを特定し、それらのフォームだけを更新する
+    同じパーティションのフォーム（移行前のパーティションなど）は、トランザクションバッチでまとめて（すべて成功するか、
+    すべて失敗するように）更新し、パーティションが異なるフォームやバッチが失敗した場合はフォームごとに更新する
+    インデックスはすべてのフォームを更新した後に削除するため、途中で失敗した場合も再実行で続きを更新できる
     
     Parameters:
         selected_token: 選択されたフォームのトークン
         selected_candidate: 選択された候補日
     """
-    # Cosmos DB の SQL クエリを作成
-    # 候補日は配列の中の配列で保存されているので、ARRAY_CONTAINS を使って一致するものを検索する
-    query = """
-    SELECT * FROM c 
-    WHERE c.partitionKey = @partitionKey 
-      AND c.id != @currentToken
-      AND ARRAY_CONTAINS(c.candidates, @selectedCandidate)
-    """
-    parameters = [
-        {"name": "@partitionKey", "value": PARTITION_KEY},
-        {"name": "@currentToken", "value": selected_token},
-        {"name": "@selectedCandidate", "value": selected_candidate},
-    ]
+    container = get_container()
+    key = slot_key(selected_candidate)
+    # 移行中は、移行前のパーティションに残っているインデックスのトークンもあわせて対象とする
+    slots = []
+    for partition_key in read_partition_keys(key):
+        try:
+            slots.append(call_with_retry(partial(container.read_item, item=key, partition_key=partition_key)))
+        except exceptions.CosmosResourceNotFoundError:
+            continue
+
+    forms = map_concurrently(read_form_or_none, indexed_tokens(slots, selected_token))
+    batches, individual = plan_candidate_removals(forms, selected_candidate)
+    for partition_key, chunk in batches:
+        try:
+            call_with_retry(partial(
+                container.execute_item_batch,
+                batch_operations=candidate_batch_operations(chunk),
+                partition_key=partition_key
+            ))
+        except exceptions.CosmosBatchOperationError as e:
+            # バッチ全体が取り消されるため、読み込み直してフォームごとに更新する
+            logger.warning(f"トランザクションバッチが失敗したため、フォームごとに更新します: {e}")
+            individual.extend(form for form, _ in chunk)
+        finally:
+            for form, _ in chunk:
+                form_cache.invalidate(form["id"])
+    map_concurrently(lambda form: remove_candidate_from_form(form["id"], selected_candidate, form), individual)
+
+    # 予約済みの候補日のインデックスは不要になるため削除する
+    for slot in slots:
+        try:
+            call_with_retry(partial(container.delete_item, item=key, partition_key=slot["partitionKey"]))
+        except exceptions.CosmosResourceNotFoundError:
+            pass
+
+
+def read_form_or_none(token: str) -> dict | None:
+    """
+    フォームを読み込む（期限切れ（TTL）または保存に失敗したフォームの場合は None）
+    """
+    try:
+        return read_document(token)
+    except exceptions.CosmosResourceNotFoundError:
+        return None
+
+
+def remove_candidate_from_form(token: str, selected_candidate: list, form: dict = None, max_retries: int = 3) -> None:
+    """
+    フォームの候補日リストから選択された候補日を削除する
+    読み込み時の ETag を前提条件として候補日リストだけを更新し、他のリクエストと競合した場合は読み込み直す
 
-    # クエリ実行
-    forms = list(container.query_items(query=query, parameters=parameters))
-    
-    for form in forms:
-        # フォームの candidates 配列から選択された候補日と一致するものを削除
-        updated_candidates = [
-            c for c in form["candidates"]
-            if not (parse(c[0]) == parse(selected_candidate[0]) and parse(c[1]) == parse(selected_candidate[1]))
-        ]
-        form["candidates"] = updated_candidates   
-        # 余計なシステムプロパティを削除（更新前に行う）
-        for key in ["_rid", "_self", "_attachments", "_ts"]:
-            form.pop(key, None)
-        # ドキュメントを更新
-        container.replace_item(item=form["id"], body=form)
-
-
-def confirm_form(selected_token: str):
-    """
-    フォームを確定状態に更新する
-    
     Parameters:
-        selected_token: 確定するフォームのトークン
+        token: フォームデータのトークン
+        selected_candidate: 選択された候補日
+        form: 読み込み済みのフォーム（省略時は読み込む）
+        max_retries: 競合した場合に読み込み直す最大回数
     """
-    # 指定されたフォーム（selected_token）のドキュメントを取得するためのSQLクエリを作成
-    query = """
-    SELECT * FROM c
-    WHERE c.partitionKey = @partitionKey
-      AND c.id = @currentToken
+    for attempt in range(max_retries + 1):
+        if form is None:
+            form = read_form_or_none(token)
+        if form is None:
+            return
+        candidates = form.get("candidates") or []
+        remaining = exclude_candidate(candidates, selected_candidate)
+        if len(remaining) == len(candidates):
+            return
+        try:
+            patch_document(token, candidates_operations(remaining), etag=form.get("_etag"))
+            return
+        except FormConflictError:
+            if attempt == max_retries:
+                raise
+            form = None
+
+
+def confirm_operations(event_ids: dict = None) -> list:
     """
-    parameters = [
-        {"name": "@partitionKey", "value": PARTITION_KEY},
-        {"name": "@currentToken", "value": selected_token},
-    ]
-    
-    # クエリ実行してフォームを取得
-    forms = list(container.query_items(query=query, parameters=parameters))
+    フォームを確定状態にするパッチ操作（イベントIDを指定した場合は、あわせて保存する）
+    """
+    operations = [{"op": "set", "path": "/isConfirmed", "value": True}]
+    if event_ids is not None:
+        operations.append({"op": "set", "path": "/event_ids", "value": event_ids})
+    return operations
+
+
+def confirm_form(selected_token: str, event_ids: dict = None, etag: str = None) -> dict:
+    """
+    フォームを確定状態に更新する（イベントIDを指定した場合は、あわせて保存する）
+    未確定のフォームだけを1回のパッチで更新するため、同じフォームへの同時の予約は1件だけが成功する
     
-    for form in forms:
-        # フォームの isConfirmed フィールドを True に設定
-        form["isConfirmed"] = True
-        
-        # 更新前に余計なシステムプロパティを削除
-        for key in ["_rid", "_self", "_attachments", "_ts"]:
-            form.pop(key, None)
-        
-        # ドキュメントを更新
-        container.replace_item(item=form["id"], body=form)
+    Parameters:
+        selected_token: 確定するフォームのトークン
+        event_ids: 登録したイベントID辞書（ユーザーメールアドレス → イベントID）
+        etag: 指定した場合は、フォームの ETag が一致する場合のみ更新する
 
+    Returns:
+        dict: 更新後のフォーム
 
-def finalize_form(token: str, selected_candidate: list) -> None:
+    Raises:
+        FormConflictError: フォームが確定済み、または ETag が一致しない場合
     """
-    他のフォームから使用された候補日を削除し、対象フォームを使用済みにする。
+    return patch_document(selected_token, confirm_operations(event_ids), etag=etag, filter_predicate=UNCONFIRMED_FILTER)
+
+
+def finalize_form(token: str, selected_candidate: list, event_ids: dict = None) -> None:
+    """
+    対象フォームを使用済みにし（イベントIDもあわせて1回で保存する）、他のフォームから使用された候補日を削除する。
+    対象フォームを先に確定するため、同時に予約された場合は他のフォームを更新せずに FormConflictError となる。
     
     Parameters:
         token: フォームデータのトークン
         selected_candidate: 選択された候補日
+        event_ids: 登録したイベントID辞書（ユーザーメールアドレス → イベントID）
+
+    Raises:
+        FormConflictError: フォームが既に確定済みの場合
     """
+    try:
+        confirm_form(token, event_ids)
+    except FormConflictError as e:
+        logger.warning(f"フォームは既に確定されています: {e}")
+        raise
     try:
         remove_candidate_from_other_forms(token, selected_candidate)
-        confirm_form(token)
     except Exception as e:
+        # 対象フォームは確定済みのため、競合による失敗も予約の競合（FormConflictError）とは区別する
         logger.error(f"候補日の削除に失敗しました: {e}")
-        raise
+        raise RuntimeError(f"候補日の削除に失敗しました: {e}") from e
+
+
+def reset_operations(form: dict, remaining_event_ids: dict = None) -> list:
+    """
+    予定を削除したフォームを更新するパッチ操作
+    削除できなかった予定が残る場合はそれらのみを event_ids に残し、すべて削除できた場合は未確定に戻して event_ids を削除する
+    """
+    if remaining_event_ids:
+        return [{"op": "set", "path": "/event_ids", "value": remaining_event_ids}]
+    operations = [{"op": "set", "path": "/isConfirmed", "value": False}]
+    if "event_ids" in form:
+        operations.append({"op": "remove", "path": "/event_ids"})
+    return operations
+
+
+def reset_form(form: dict, remaining_event_ids: dict = None) -> None:
+    """
+    予定を削除できたフォームを再利用可能な状態に戻す。
+    すべての予定を削除できた場合は isConfirmed を False に戻して event_ids を削除し、
+    削除できなかった予定が残る場合は、それらのみを event_ids に残して確定状態を維持する。
+    
+    フォームの読み込み後に他のリクエストによって更新されていた場合は、上書きせずに FormConflictError となる。
+    
+    Parameters:
+        form: 更新対象のフォームデータ（get_form_data で取得したもの）
+        remaining_event_ids: 削除できなかったユーザーのイベントID（ユーザーメールアドレス → イベントID）
+
+    Raises:
+        FormConflictError: フォームの ETag が一致しない場合
+    """
+    patch_document(form["id"], reset_operations(form, remaining_event_ids), etag=form.get("_etag"))
+
+
+def unindexed_candidates(form: dict, candidates: list) -> list:
+    """
+    計算した空き時間候補のうち、フォームに保存済みの候補日（逆引きインデックスに登録済み）に含まれないもの
+    """
+    indexed = {slot_key(candidate) for candidate in form.get("candidates") or []}
+    return [c for c in candidates if slot_key(c) not in indexed]
+
+
+def save_form_candidates(form: dict, candidates: list, computed_at: float) -> dict:
+    """
+    計算した空き時間候補と計算時刻をフォームに保存する
+    新たに含まれる候補日は、保存前に逆引きインデックスに登録する（予約時に他のフォームから削除できるようにするため）
+    読み込み後にフォームが更新されていた場合（他のフォームの予約による候補日の削除など）や、確定済みの場合は保存しない
+
+    Parameters:
+        form: 計算の元にしたフォームデータ（get_form_data で取得したもの）
+        candidates: 空き時間候補のリスト（[開始日時, 終了日時] のリスト）
+        computed_at: 計算時刻（UNIX時間）
+
+    Returns:
+        dict: 更新後のフォーム
+
+    Raises:
+        FormConflictError: フォームの ETag が一致しない、または確定済みの場合
+    """
+    index_form_candidates(form["id"], unindexed_candidates(form, candidates))
+    operations = candidates_operations(candidates) + [
+        {"op": "set", "path": "/candidatesComputedAt", "value": computed_at}
+    ]
+    return patch_document(form["id"], operations, etag=form.get("_etag"), filter_predicate=UNCONFIRMED_FILTER)
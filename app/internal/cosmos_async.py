@@ -0,0 +1,402 @@
+import asyncio
+import logging
+from functools import partial
+from azure.core import MatchConditions
+from azure.cosmos import exceptions
+from fastapi import HTTPException
+
+from app.dependencies import get_async_container
+from app.internal.form_cache import form_cache
+from app.internal.resilience import cosmos_retry_policy
+from app.config import COSMOS_INDEX_CONCURRENCY
+from app.internal.cosmos import (
+    UNCONFIRMED_FILTER, FormConflictError, cosmos_retry_delay,
+    read_partition_keys, patch_conditions, form_patch_operations, new_form_document, strip_system_properties,
+    slot_key, exclude_candidate, partition_key_for, slot_token_operations, slot_index_document, candidate_slot_keys,
+    indexed_tokens, plan_candidate_removals, candidate_batch_operations, candidates_operations,
+    confirm_operations, reset_operations, unindexed_candidates
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def call_with_retry(call):
+    """
+    Cosmos DB の非同期の呼び出しを、一時的なエラーの場合に再試行する（待ち時間は cosmos.call_with_retry と同じ）
+    待機中はイベントループをブロックしない
+
+    Parameters:
+        call: 引数なしで呼び出すコルーチン関数
+
+    Returns:
+        call の戻り値
+    """
+    deadline = cosmos_retry_policy.start()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await call()
+        except exceptions.CosmosHttpResponseError as e:
+            delay = cosmos_retry_delay(e, attempt, deadline)
+            if delay is None:
+                raise
+            logger.warning(f"Cosmos DB の一時的なエラーのため、{delay:.2f} 秒後に再試行します: {e.status_code}")
+            await asyncio.sleep(delay)
+
+
+async def read_document(doc_id: str) -> dict:
+    """
+    ドキュメントを非同期で読み込む（現在のパーティションに無い場合は、移行前のパーティションを探す）
+    スロットリングなどの一時的なエラーは、call_with_retry で再試行する
+
+    Raises:
+        exceptions.CosmosResourceNotFoundError: どのパーティションにも無い場合
+    """
+    container = get_async_container()
+    keys = read_partition_keys(doc_id)
+    for i, partition_key in enumerate(keys):
+        try:
+            return await call_with_retry(partial(container.read_item, item=doc_id, partition_key=partition_key))
+        except exceptions.CosmosResourceNotFoundError:
+            if i == len(keys) - 1:
+                raise
+
+
+async def patch_document(doc_id: str, operations: list, etag: str = None, filter_predicate: str = None) -> dict:
+    """
+    フォームの一部のフィールドだけを非同期で更新する（現在のパーティションに無い場合は、移行前のパーティションを探す）
+    一時的なエラーは call_with_retry で再試行し、あわせて有効期限を既定に戻す（form_patch_operations）
+
+    Parameters:
+        doc_id: ドキュメントID
+        operations: パッチ操作
+        etag: 指定した場合は、ドキュメントの ETag が一致する場合のみ更新する
+        filter_predicate: 指定した場合は、ドキュメントが条件を満たす場合のみ更新する
+
+    Returns:
+        dict: 更新後のドキュメント
+
+    Raises:
+        FormConflictError: ETag または条件が一致しない場合
+        exceptions.CosmosResourceNotFoundError: どのパーティションにも無い場合
+    """
+    container = get_async_container()
+    conditions = patch_conditions(etag, filter_predicate)
+    keys = read_partition_keys(doc_id)
+    try:
+        for i, partition_key in enumerate(keys):
+            try:
+                return await call_with_retry(partial(
+                    container.patch_item,
+                    item=doc_id, partition_key=partition_key, patch_operations=form_patch_operations(operations),
+                    **conditions
+                ))
+            except exceptions.CosmosAccessConditionFailedError as e:
+                raise FormConflictError(f"{doc_id} は他のリクエストによって更新されています") from e
+            except exceptions.CosmosResourceNotFoundError:
+                if i == len(keys) - 1:
+                    raise
+    finally:
+        # 成功・失敗にかかわらず、キャッシュ済みのフォームは古くなっている可能性がある
+        form_cache.invalidate(doc_id)
+
+
+async def read_form_cached(token: str, revalidate: bool = False) -> dict:
+    """
+    フォームをキャッシュから非同期で取得する（キャッシュに無い場合は読み込んでキャッシュする）
+    キャッシュ済みのフォームの再検証が必要な場合は、ETag を指定した条件付きの読み込みで変更の有無だけを確認する
+
+    Parameters:
+        token: フォームデータのトークン
+        revalidate: True の場合は、保存からの経過時間にかかわらず再検証する
+
+    Raises:
+        exceptions.CosmosResourceNotFoundError: フォームが無い場合
+    """
+    cached, stale = form_cache.get(token, revalidate)
+    if cached is not None and not stale:
+        return cached
+    version = form_cache.version()
+    item = None
+    if cached is not None:
+        try:
+            item = await call_with_retry(partial(
+                get_async_container().read_item,
+                item=token,
+                partition_key=cached["partitionKey"],
+                etag=cached["_etag"],
+                match_condition=MatchConditions.IfModified
+            ))
+            if not item:
+                form_cache.revalidated(token, cached["_etag"])
+                return cached
+        except exceptions.CosmosResourceNotFoundError:
+            # 期限切れ、またはパーティションの移行で移動したフォーム
+            form_cache.invalidate(token)
+    if not item:
+        item = await read_document(token)
+    form_cache.put(token, item, version)
+    return item
+
+
+async def create_form_data(payload: dict) -> str:
+    """
+    クライアントから送信されたフォームデータを非同期でCosmosDBに保存する
+
+    Parameters:
+        payload: フォームデータ
+
+    Returns:
+        str: 生成されたトークン
+
+    Raises:
+        HTTPException: 保存に失敗した場合
+    """
+    token, data = new_form_document(payload)
+    try:
+        # 逆引きインデックスを先に登録する（フォームの保存に失敗した場合、残ったトークンは削除時に無視される）
+        await index_form_candidates(token, payload.get("candidates") or [])
+        await call_with_retry(partial(get_async_container().create_item, body=data))
+        return token
+    except Exception as e:
+        logger.error(f"フォームデータの保存に失敗しました: {e}")
+        raise HTTPException(status_code=500, detail="Failed to store form data")
+
+
+async def get_form_data(token: str, revalidate: bool = False) -> dict:
+    """
+    指定されたトークンから非同期でCosmosDBのフォームデータを取得する（メモリ上のキャッシュを使用する）
+
+    Parameters:
+        token: フォームデータのトークン
+        revalidate: True の場合は、キャッシュ済みのフォームが変更されていないことを必ず確認する
+
+    Returns:
+        dict: フォームデータ（"_etag" は更新時の前提条件に使用する）
+
+    Raises:
+        HTTPException: データが見つからない場合
+    """
+    try:
+        return strip_system_properties(await read_form_cached(token, revalidate))
+    except Exception as e:
+        logger.error(f"Token が見つかりません: {e}")
+        raise HTTPException(status_code=404, detail="Token not found")
+
+
+async def add_token_to_slot(key: str, token: str, semaphore: asyncio.Semaphore) -> None:
+    """
+    候補日の逆引きインデックスにフォームのトークンを非同期で追加する
+    ドキュメントが無い場合は作成し、同時に作成された場合は追加し直す（一時的なエラーは call_with_retry で再試行する）
+    """
+    container = get_async_container()
+    patch = partial(
+        container.patch_item,
+        item=key, partition_key=partition_key_for(key), patch_operations=slot_token_operations(key, token)
+    )
+    async with semaphore:
+        try:
+            await call_with_retry(patch)
+        except exceptions.CosmosResourceNotFoundError:
+            try:
+                await call_with_retry(partial(container.create_item, body=slot_index_document(key, token)))
+            except exceptions.CosmosResourceExistsError:
+                await call_with_retry(patch)
+
+
+async def index_form_candidates(token: str, candidates: list) -> None:
+    """
+    フォームの各候補日の逆引きインデックスに、フォームのトークンを非同期で登録する
+
+    Parameters:
+        token: フォームデータのトークン
+        candidates: 候補日リスト（[開始日時, 終了日時] のリスト）
+    """
+    semaphore = asyncio.Semaphore(COSMOS_INDEX_CONCURRENCY)
+    await asyncio.gather(*[add_token_to_slot(key, token, semaphore) for key in candidate_slot_keys(candidates)])
+
+
+async def remove_candidate_from_other_forms(selected_token: str, selected_candidate: list):
+    """
+    選択された候補日が含まれる他のフォームからその候補日を非同期で削除する
+    候補日の逆引きインデックスから対象のフォームを特定し、それらのフォームだけを更新する
+    同じパーティションのフォームはトランザクションバッチでまとめて更新し、
+    パーティションが異なるフォームやバッチが失敗した場合はフォームごとに更新する
+
+    Parameters:
+        selected_token: 選択されたフォームのトークン
+        selected_candidate: 選択された候補日
+    """
+    container = get_async_container()
+    semaphore = asyncio.Semaphore(COSMOS_INDEX_CONCURRENCY)
+    key = slot_key(selected_candidate)
+    # 移行中は、移行前のパーティションに残っているインデックスのトークンもあわせて対象とする
+    slots = []
+    for partition_key in read_partition_keys(key):
+        try:
+            slots.append(await call_with_retry(partial(container.read_item, item=key, partition_key=partition_key)))
+        except exceptions.CosmosResourceNotFoundError:
+            continue
+
+    async def read_form(token):
+        async with semaphore:
+            return await read_form_or_none(token)
+
+    async def remove(form):
+        async with semaphore:
+            await remove_candidate_from_form(form["id"], selected_candidate, form)
+
+    forms = await asyncio.gather(*[read_form(token) for token in indexed_tokens(slots, selected_token)])
+    batches, individual = plan_candidate_removals(forms, selected_candidate)
+    for partition_key, chunk in batches:
+        try:
+            await call_with_retry(partial(
+                container.execute_item_batch,
+                batch_operations=candidate_batch_operations(chunk),
+                partition_key=partition_key
+            ))
+        except exceptions.CosmosBatchOperationError as e:
+            # バッチ全体が取り消されるため、読み込み直してフォームごとに更新する
+            logger.warning(f"トランザクションバッチが失敗したため、フォームごとに更新します: {e}")
+            individual.extend(form for form, _ in chunk)
+        finally:
+            for form, _ in chunk:
+                form_cache.invalidate(form["id"])
+    await asyncio.gather(*[remove(form) for form in individual])
+
+    # 予約済みの候補日のインデックスは不要になるため削除する
+    for slot in slots:
+        try:
+            await call_with_retry(partial(container.delete_item, item=key, partition_key=slot["partitionKey"]))
+        except exceptions.CosmosResourceNotFoundError:
+            pass
+
+
+async def read_form_or_none(token: str) -> dict | None:
+    """
+    フォームを非同期で読み込む（期限切れ（TTL）または保存に失敗したフォームの場合は None）
+    """
+    try:
+        return await read_document(token)
+    except exceptions.CosmosResourceNotFoundError:
+        return None
+
+
+async def remove_candidate_from_form(
+    token: str, selected_candidate: list, form: dict = None, max_retries: int = 3
+) -> None:
+    """
+    フォームの候補日リストから選択された候補日を非同期で削除する
+    読み込み時の ETag を前提条件として候補日リストだけを更新し、他のリクエストと競合した場合は読み込み直す
+
+    Parameters:
+        token: フォームデータのトークン
+        selected_candidate: 選択された候補日
+        form: 読み込み済みのフォーム（省略時は読み込む）
+        max_retries: 競合した場合に読み込み直す最大回数
+    """
+    for attempt in range(max_retries + 1):
+        if form is None:
+            form = await read_form_or_none(token)
+        if form is None:
+            return
+        candidates = form.get("candidates") or []
+        remaining = exclude_candidate(candidates, selected_candidate)
+        if len(remaining) == len(candidates):
+            return
+        try:
+            await patch_document(token, candidates_operations(remaining), etag=form.get("_etag"))
+            return
+        except FormConflictError:
+            if attempt == max_retries:
+                raise
+            form = None
+
+
+async def confirm_form(selected_token: str, event_ids: dict = None, etag: str = None) -> dict:
+    """
+    フォームを非同期で確定状態に更新する（イベントIDを指定した場合は、あわせて保存する）
+    未確定のフォームだけを1回のパッチで更新するため、同じフォームへの同時の予約は1件だけが成功する
+
+    Parameters:
+        selected_token: 確定するフォームのトークン
+        event_ids: 登録したイベントID辞書（ユーザーメールアドレス → イベントID）
+        etag: 指定した場合は、フォームの ETag が一致する場合のみ更新する
+
+    Returns:
+        dict: 更新後のフォーム
+
+    Raises:
+        FormConflictError: フォームが確定済み、または ETag が一致しない場合
+    """
+    return await patch_document(
+        selected_token, confirm_operations(event_ids), etag=etag, filter_predicate=UNCONFIRMED_FILTER
+    )
+
+
+async def finalize_form(token: str, selected_candidate: list, event_ids: dict = None) -> None:
+    """
+    対象フォームを使用済みにし（イベントIDもあわせて1回で保存する）、他のフォームから使用された候補日を削除する。
+    対象フォームを先に確定するため、同時に予約された場合は他のフォームを更新せずに FormConflictError となる。
+
+    Parameters:
+        token: フォームデータのトークン
+        selected_candidate: 選択された候補日
+        event_ids: 登録したイベントID辞書（ユーザーメールアドレス → イベントID）
+
+    Raises:
+        FormConflictError: フォームが既に確定済みの場合
+    """
+    try:
+        await confirm_form(token, event_ids)
+    except FormConflictError as e:
+        logger.warning(f"フォームは既に確定されています: {e}")
+        raise
+    try:
+        await remove_candidate_from_other_forms(token, selected_candidate)
+    except Exception as e:
+        # 対象フォームは確定済みのため、競合による失敗も予約の競合（FormConflictError）とは区別する
+        logger.error(f"候補日の削除に失敗しました: {e}")
+        raise RuntimeError(f"候補日の削除に失敗しました: {e}") from e
+
+
+async def reset_form(form: dict, remaining_event_ids: dict = None) -> None:
+    """
+    予定を削除できたフォームを再利用可能な状態に戻す。
+    すべての予定を削除できた場合は isConfirmed を False に戻して event_ids を削除し、
+    削除できなかった予定が残る場合は、それらのみを event_ids に残して確定状態を維持する。
+
+    フォームの読み込み後に他のリクエストによって更新されていた場合は、上書きせずに FormConflictError となる。
+
+    Parameters:
+        form: 更新対象のフォームデータ（get_form_data で取得したもの）
+        remaining_event_ids: 削除できなかったユーザーのイベントID（ユーザーメールアドレス → イベントID）
+
+    Raises:
+        FormConflictError: フォームの ETag が一致しない場合
+    """
+    await patch_document(form["id"], reset_operations(form, remaining_event_ids), etag=form.get("_etag"))
+
+
+async def save_form_candidates(form: dict, candidates: list, computed_at: float) -> dict:
+    """
+    計算した空き時間候補と計算時刻をフォームに非同期で保存する
+    新たに含まれる候補日は、保存前に逆引きインデックスに登録する
+
+    Parameters:
+        form: 計算の元にしたフォームデータ（get_form_data で取得したもの）
+        candidates: 空き時間候補のリスト（[開始日時, 終了日時] のリスト）
+        computed_at: 計算時刻（UNIX時間）
+
+    Returns:
+        dict: 更新後のフォーム
+
+    Raises:
+        FormConflictError: フォームの ETag が一致しない、または確定済みの場合
+    """
+    await index_form_candidates(form["id"], unindexed_candidates(form, candidates))
+    operations = candidates_operations(candidates) + [
+        {"op": "set", "path": "/candidatesComputedAt", "value": computed_at}
+    ]
+    return await patch_document(form["id"], operations, etag=form.get("_etag"), filter_predicate=UNCONFIRMED_FILTER)
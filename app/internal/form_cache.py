@@ -0,0 +1,136 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import DOCUMENT_TTL, FORM_CACHE_MAX_ENTRIES, FORM_CACHE_REVALIDATE_SECONDS
+
+
+class FormCache:
+    """
+    トークンごとのフォームのドキュメント（_etag を含む）をメモリ上に保持するキャッシュ。
+
+    - 保存から revalidate_after 秒以内のエントリは、Cosmos DB を読み込まずにそのまま使用する
+    - それ以降のエントリは、ETag を指定した条件付きの読み込みで変更の有無だけを確認してから使用する
+    - ドキュメントの有効期限（最終更新時刻 _ts + ttl、既定は DOCUMENT_TTL）を過ぎたエントリは破棄する
+    - エントリ数が上限を超えた場合は、最も長く使われていないものから破棄する
+    - フォームを更新する処理は、更新後に必ずエントリを破棄する
+      （読み込み中に破棄が行われた場合、その読み込み結果は古い可能性があるため保存しない）
+    """
+
+    def __init__(self, max_entries: int, revalidate_after: float, default_ttl: float):
+        self._max_entries = max_entries
+        self._revalidate_after = revalidate_after
+        self._default_ttl = default_ttl
+        self._lock = threading.Lock()
+        # トークン → (ドキュメント, 保存・再検証した時刻)
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._revalidations = 0
+        self._misses = 0
+        self._evictions = 0
+        # エントリを破棄した回数（読み込みの開始後に破棄が行われたかどうかの判定に使用する）
+        self._version = 0
+
+    def _expired(self, doc: dict) -> bool:
+        ttl = doc.get("ttl", self._default_ttl)
+        return "_ts" in doc and ttl > 0 and time.time() >= doc["_ts"] + ttl
+
+    def get(self, token: str, revalidate: bool = False) -> tuple:
+        """
+        キャッシュ済みのフォームを取得する
+
+        Parameters:
+            token: フォームデータのトークン
+            revalidate: True の場合は、保存からの経過時間にかかわらず再検証が必要なものとして扱う
+
+        Returns:
+            tuple: (ドキュメントのコピー, 再検証が必要かどうか)。キャッシュに無い場合は (None, True)
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[token]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None, True
+            self._entries.move_to_end(token)
+            stale = revalidate or time.monotonic() - entry[1] >= self._revalidate_after
+            if not stale:
+                self._hits += 1
+            return copy.deepcopy(entry[0]), stale
+
+    def version(self) -> int:
+        """
+        読み込みの開始前に取得し、put に渡す値
+        """
+        with self._lock:
+            return self._version
+
+    def put(self, token: str, doc: dict, version: int) -> None:
+        """
+        読み込んだフォームを保存し、上限を超えた分を破棄する
+        読み込みの開始後（version の取得後）にエントリの破棄が行われていた場合は保存しない
+        """
+        if not self._max_entries or not doc.get("_etag"):
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries.pop(token, None)
+            self._entries[token] = (copy.deepcopy(doc), time.monotonic())
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def revalidated(self, token: str, etag: str) -> None:
+        """
+        条件付きの読み込みでフォームが変更されていないことを確認した場合に、エントリの再検証時刻を更新する
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0].get("_etag") == etag:
+                self._entries[token] = (entry[0], time.monotonic())
+                self._revalidations += 1
+
+    def invalidate(self, token: str) -> None:
+        """
+        指定したフォームのエントリを破棄する（フォームを更新した場合）
+        """
+        with self._lock:
+            self._entries.pop(token, None)
+            self._version += 1
+
+    def clear(self) -> None:
+        """
+        すべてのエントリと統計情報を破棄する
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._revalidations = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self) -> dict:
+        """
+        ヒット数・再検証数・ミス数などの統計情報を返す
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "revalidations": self._revalidations,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+            }
+
+
+# プロセス全体で共有するフォームのキャッシュ
+form_cache = FormCache(
+    max_entries=FORM_CACHE_MAX_ENTRIES,
+    revalidate_after=FORM_CACHE_REVALIDATE_SECONDS,
+    default_ttl=DOCUMENT_TTL
+)
@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from app.config import FORM_CANDIDATE_LIMIT, FORM_CANDIDATES_MAX_AGE
+from app.internal.availability import compute_common_times, schedule_request_from_form
+from app.internal.cosmos import FormConflictError, get_form_data, save_form_candidates
+from app.internal.graph_api import get_schedules
+
+logger = logging.getLogger(__name__)
+
+# 返した空き時間候補の計算からの経過時間（秒）を示すレスポンスヘッダー
+CANDIDATES_AGE_HEADER = "X-Candidates-Age"
+
+# 実行中の空き時間候補の再計算（トークン → 計算結果の Future）
+_refreshes = {}
+_refreshes_lock = threading.Lock()
+
+
+def candidates_age(form: dict, now: float = None) -> float | None:
+    """
+    フォームに保存された空き時間候補の計算からの経過時間（秒）を返す（計算されていない場合は None）
+    """
+    computed_at = form.get("candidatesComputedAt")
+    if computed_at is None:
+        return None
+    return max((now if now is not None else time.time()) - computed_at, 0.0)
+
+
+def candidates_fresh(form: dict) -> bool:
+    """
+    フォームに保存された空き時間候補を、再計算せずにそのまま返せるかどうか（計算から FORM_CANDIDATES_MAX_AGE 秒以内）
+    """
+    age = candidates_age(form)
+    return age is not None and age < FORM_CANDIDATES_MAX_AGE
+
+
+def compute_form_candidates(schedule_request, schedule_info: dict) -> list:
+    """
+    取得した空き時間から、フォームに保存する空き時間候補（FORM_CANDIDATE_LIMIT 件まで）を計算する
+
+    Parameters:
+        schedule_request: schedule_request_from_form で構築した ScheduleRequest
+        schedule_info: get_schedules の戻り値
+
+    Returns:
+        list: 空き時間候補のリスト（[開始日時, 終了日時] のリスト）
+    """
+    return compute_common_times(schedule_request, schedule_info, FORM_CANDIDATE_LIMIT or None)
+
+
+def refresh_form_candidates(form: dict) -> list:
+    """
+    面接担当者の最新の空き時間から空き時間候補を計算し、計算時刻とともにフォームに保存する
+    計算中にフォームが更新されていた場合（他のフォームの予約による候補日の削除、確定など）は保存せず、
+    次の取得時に計算し直す
+
+    Parameters:
+        form: フォームデータ（get_form_data で取得したもの）
+
+    Returns:
+        list: 空き時間候補のリスト（[開始日時, 終了日時] のリスト）
+    """
+    # 空き時間の取得前の時刻を計算時刻とする（取得中に入った予定は、次の再計算で反映する）
+    computed_at = time.time()
+    schedule_request = schedule_request_from_form(form)
+    schedule_info = get_schedules(schedule_request)
+    candidates = compute_form_candidates(schedule_request, schedule_info)
+    try:
+        save_form_candidates(form, candidates, computed_at)
+    except FormConflictError as e:
+        logger.info(f"フォームが更新されていたため、空き時間候補を保存しませんでした: {e}")
+    return candidates
+
+
+def refresh_in_background(token: str, form: dict = None) -> Future:
+    """
+    フォームの空き時間候補の再計算をバックグラウンドのスレッドで開始し、計算結果の Future を返す
+    同じフォームの再計算を実行中の場合は新たに開始せず、実行中の再計算の Future を返す
+    （同時に閲覧された場合も、Graph API の取得と計算は1回だけ行う）
+
+    Parameters:
+        token: フォームデータのトークン
+        form: フォームデータ（省略時は読み込む）
+
+    Returns:
+        Future: 空き時間候補のリスト（[開始日時, 終了日時] のリスト）を結果とする Future
+    """
+    with _refreshes_lock:
+        future = _refreshes.get(token)
+        if future is not None:
+            return future
+        future = _refreshes[token] = Future()
+
+    def run():
+        try:
+            candidates, error = refresh_form_candidates(form if form is not None else get_form_data(token)), None
+        except Exception as e:
+            logger.error(f"空き時間候補の再計算に失敗しました（{token}）: {e}")
+            candidates, error = None, e
+        # 結果を受け取った後の再計算の要求が、完了済みの再計算を共有しないように、先に登録を解除する
+        with _refreshes_lock:
+            _refreshes.pop(token, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(candidates)
+
+    threading.Thread(target=run, name="form-candidates-refresh", daemon=True).start()
+    return future
+
+
+def precompute_form_candidates(token: str) -> None:
+    """
+    保存直後のフォームの空き時間候補を、バックグラウンドのスレッドで計算して保存する
+    （フォームの保存のレスポンスを待たせず、最初の /retrieve_form_data は計算の完了を待つだけで済むようにする）
+
+    Parameters:
+        token: フォームデータのトークン
+    """
+    refresh_in_background(token)
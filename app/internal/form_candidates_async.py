@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+
+import anyio.to_thread
+
+from app.internal.availability import schedule_request_from_form
+from app.internal.cosmos import FormConflictError
+from app.internal.cosmos_async import get_form_data, save_form_candidates
+from app.internal.form_candidates import compute_form_candidates
+from app.internal.graph_api_async import get_schedules
+
+logger = logging.getLogger(__name__)
+
+# 実行中の空き時間候補の再計算（トークン → タスク、完了前にガベージコレクションされないように参照も兼ねる）
+_refreshes = {}
+
+
+async def refresh_form_candidates(form: dict) -> list:
+    """
+    面接担当者の最新の空き時間から空き時間候補を計算し、計算時刻とともにフォームに非同期で保存する
+    計算中にフォームが更新されていた場合は保存せず、次の取得時に計算し直す
+    候補の計算（CPU 処理）はワーカースレッドで行い、イベントループを止めない
+
+    Parameters:
+        form: フォームデータ（get_form_data で取得したもの）
+
+    Returns:
+        list: 空き時間候補のリスト（[開始日時, 終了日時] のリスト）
+    """
+    computed_at = time.time()
+    schedule_request = schedule_request_from_form(form)
+    schedule_info = await get_schedules(schedule_request)
+    candidates = await anyio.to_thread.run_sync(compute_form_candidates, schedule_request, schedule_info)
+    try:
+        await save_form_candidates(form, candidates, computed_at)
+    except FormConflictError as e:
+        logger.info(f"フォームが更新されていたため、空き時間候補を保存しませんでした: {e}")
+    return candidates
+
+
+def refresh_in_background(token: str, form: dict = None) -> asyncio.Task:
+    """
+    フォームの空き時間候補の再計算をバックグラウンドのタスクで開始し、そのタスクを返す（実行中のイベントループから呼び出す）
+    同じフォームの再計算を実行中の場合は新たに開始せず、実行中のタスクを返す
+
+    Parameters:
+        token: フォームデータのトークン
+        form: フォームデータ（省略時は読み込む）
+
+    Returns:
+        asyncio.Task: 空き時間候補のリスト（[開始日時, 終了日時] のリスト）を結果とするタスク
+        （待つ場合は、リクエストの取り消しで共有の再計算が取り消されないように asyncio.shield で包む）
+    """
+    task = _refreshes.get(token)
+    if task is not None:
+        return task
+
+    async def run():
+        try:
+            return await refresh_form_candidates(form if form is not None else await get_form_data(token))
+        except Exception as e:
+            logger.error(f"空き時間候補の再計算に失敗しました（{token}）: {e}")
+            raise
+        finally:
+            _refreshes.pop(token, None)
+
+    task = _refreshes[token] = asyncio.create_task(run())
+    # 結果を待たない場合も、未取得の例外の警告を出さない
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+
+def precompute_form_candidates(token: str) -> None:
+    """
+    保存直後のフォームの空き時間候補を、バックグラウンドのタスクで計算して保存する（実行中のイベントループから呼び出す）
+
+    Parameters:
+        token: フォームデータのトークン
+    """
+    refresh_in_background(token)
@@ -1,102 +1,346 @@
-import requests
 import urllib.parse
 import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
 from fastapi import HTTPException
 import time
 
 from app.dependencies import get_access_token
-from app.config import SYSTEM_SENDER_EMAIL
+from app.config import (
+    GRAPH_API_BASE_URL, GRAPH_SCHEDULE_CONCURRENCY, GRAPH_SCHEDULE_BATCH_WINDOW_MS
+)
+from app.internal.availability_cache import availability_cache
+from app.internal.graph_client import graph_deadline, graph_post, send_with_retry
+from app.internal.resilience import (
+    CircuitOpenError, graph_retry_policy, is_retryable_status, retry_after_seconds
+)
+from app.internal.schedule_batcher import ScheduleBatcher
+from app.internal.single_flight import SingleFlight
+from app.utils.day_windows import plan_day_windows
 from app.utils.formatters import format_candidate_date
 
 logger = logging.getLogger(__name__)
 
+# 1回の $batch に含められるサブリクエストの最大数
+GRAPH_BATCH_LIMIT = 20
+# 1回の getSchedule で取得できるユーザー数・日数の上限
+GET_SCHEDULE_MAX_USERS = 20
+GET_SCHEDULE_MAX_DAYS = 62
+# availabilityView の1枠の長さ（分）
+AVAILABILITY_VIEW_INTERVAL = 30
+# 1日あたりの availabilityView の枠数
+SLOTS_PER_DAY = 24 * 60 // AVAILABILITY_VIEW_INTERVAL
+# 夏時間の無いタイムゾーン（Windows 名・IANA 名）
+# 夏時間の切り替え日は1日の availabilityView が SLOTS_PER_DAY 枠にならず、日ごとに分割できないため、これ以外は受け付けない
+FIXED_OFFSET_TIME_ZONES = frozenset({
+    "Tokyo Standard Time", "Asia/Tokyo",
+    "Korea Standard Time", "Asia/Seoul",
+    "China Standard Time", "Asia/Shanghai",
+    "Taipei Standard Time", "Asia/Taipei",
+    "Singapore Standard Time", "Asia/Singapore",
+    "SE Asia Standard Time", "Asia/Bangkok",
+    "India Standard Time", "Asia/Kolkata",
+    "Arabian Standard Time", "Asia/Dubai",
+    "W. Australia Standard Time", "Australia/Perth",
+    "E. Australia Standard Time", "Australia/Brisbane",
+    "Hawaiian Standard Time", "Pacific/Honolulu",
+    "US Mountain Standard Time", "America/Phoenix",
+    "UTC", "Etc/UTC",
+})
 
-def get_schedules(schedule_req):
+# 同じ取得計画の getSchedule を同時に1回だけ送信する（同じ面接担当者・期間のフォームが同時に開かれた場合など）
+schedule_flight = SingleFlight()
+
+
+def is_supported_time_zone(time_zone: str) -> bool:
     """
-    Microsoft Graph API の getSchedule エンドポイントを使用して、ユーザーのスケジュール情報を取得
-    
-    Parameters:
-        schedule_req: スケジュールリクエストオブジェクト
-        
-    Returns:
-        dict: Graph APIからのレスポンス（ユーザーの空き時間情報）
+    availabilityView を日ごとに分割できる（夏時間の無い）タイムゾーンかどうかを返す
     """
-    access_token = get_access_token()
-    # 特定ユーザーのスケジュールを取得したい場合
-    target_user_data = schedule_req.users
-    # メールアドレスのみを抽出
-    target_user_email = target_user_data[0].email
-    target_user_email = urllib.parse.quote(target_user_email)
-    url = f"https://graph.microsoft.com/v1.0/users/{target_user_email}/calendar/getSchedule"
+    return time_zone in FIXED_OFFSET_TIME_ZONES
 
-    body = {
-        "schedules": [user.email for user in schedule_req.users],
+
+def schedule_url(user_email: str) -> str:
+    """
+    getSchedule エンドポイントのリクエストURLを作成する（指定ユーザーの予定表を起点とする）
+    """
+    target_user_email = urllib.parse.quote(user_email)
+    return f"{GRAPH_API_BASE_URL}/v1.0/users/{target_user_email}/calendar/getSchedule"
+
+
+def build_schedule_body(user_emails: list, window_start: datetime, window_end: datetime, time_zone: str) -> dict:
+    """
+    getSchedule エンドポイントへのリクエストボディを作成する
+    """
+    return {
+        "schedules": user_emails,
         "startTime": {
-            "dateTime": f"{schedule_req.start_date}T{schedule_req.start_time}:00",
-            "timeZone": schedule_req.time_zone
+            "dateTime": window_start.strftime("%Y-%m-%dT%H:%M:%S"),
+            "timeZone": time_zone
         },
         "endTime": {
-            "dateTime": f"{schedule_req.end_date}T{schedule_req.end_time}:00",
-            "timeZone": schedule_req.time_zone
+            "dateTime": window_end.strftime("%Y-%m-%dT%H:%M:%S"),
+            "timeZone": time_zone
         },
-        "availabilityViewInterval": 30
+        "availabilityViewInterval": AVAILABILITY_VIEW_INTERVAL
     }
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, headers=headers, json=body)
+def split_schedule_windows(range_start: datetime, range_end: datetime) -> list:
+    """
+    取得期間を getSchedule の上限（62日）以内の連続した期間に分割する
+    各期間の境界は開始日時からの日数単位とし、availabilityView の枠がずれないようにする
+
+    Returns:
+        list: (期間の開始日時, 期間の終了日時) のリスト
+    """
+    windows = []
+    window_start = range_start
+    while True:
+        window_end = min(window_start + timedelta(days=GET_SCHEDULE_MAX_DAYS), range_end)
+        windows.append((window_start, window_end))
+        if window_end >= range_end:
+            return windows
+        window_start = window_end
+
+
+def build_schedule_shards(user_emails: list, range_start: datetime, range_end: datetime, time_zone: str) -> list:
+    """
+    getSchedule の上限（20ユーザー・62日）に収まるよう、ユーザーと期間でリクエストを分割する
+
+    Returns:
+        list: (期間の開始日時, ユーザーメールアドレスのリスト, リクエストボディ) のリスト
+    """
+    user_chunks = [
+        user_emails[i:i + GET_SCHEDULE_MAX_USERS]
+        for i in range(0, len(user_emails), GET_SCHEDULE_MAX_USERS)
+    ]
+    return [
+        (window_start, chunk, build_schedule_body(chunk, window_start, window_end, time_zone))
+        for window_start, window_end in split_schedule_windows(range_start, range_end)
+        for chunk in user_chunks
+    ]
+
+
+def split_day_views(shards: list, responses: list) -> dict:
+    """
+    0:00 始まりの期間で取得した getSchedule のレスポンスを、ユーザーごと・日ごとの availabilityView に分割する
+    availabilityView を取得できなかったユーザーの期間、枠数が期間の日数と一致しないユーザーの期間は含めない
+
+    Parameters:
+        shards: build_schedule_shards の戻り値
+        responses: 各分割リクエストのレスポンス（shards と同じ順序）
+
+    Returns:
+        dict: (メールアドレス, 日付) → 1日分の availabilityView
+    """
+    day_views = {}
+    for (window_start, chunk, body), response_json in zip(shards, responses):
+        requested = {user_email.lower(): user_email for user_email in chunk}
+        window_days = (datetime.fromisoformat(body["endTime"]["dateTime"]) - window_start).days
+        for schedule in response_json.get("value", []):
+            user_email = requested.get(schedule.get("scheduleId", "").lower())
+            view = schedule.get("availabilityView")
+            if user_email is None or view is None:
+                logger.warning(f"{schedule.get('scheduleId')} の空き時間を取得できませんでした: {schedule.get('error')}")
+                continue
+            if len(view) != window_days * SLOTS_PER_DAY:
+                # 夏時間の切り替えなどで枠数が日数と合わない場合は、日ごとの枠がずれるため使わない
+                logger.warning(f"{user_email} の availabilityView の枠数が期間と一致しません: {len(view)}")
+                continue
+            for i in range(window_days):
+                day = (window_start + timedelta(days=i)).strftime("%Y-%m-%d")
+                day_views[(user_email, day)] = view[i * SLOTS_PER_DAY:(i + 1) * SLOTS_PER_DAY]
+    return day_views
+
+
+def missing_day_views(user_emails: list, days: list, day_views: dict) -> list:
+    """
+    キャッシュに無い（または期限切れの）ユーザー・日の組を返す
+
+    Parameters:
+        user_emails: ユーザーメールアドレスのリスト
+        days: 取得が必要な日付のリスト（昇順）
+        day_views: キャッシュから取得できた (メールアドレス, 日付) → availabilityView
+
+    Returns:
+        list: (メールアドレス, 日付) のリスト（ユーザー順・日付順）
+    """
+    return [(user_email, day) for user_email in user_emails for day in days if (user_email, day) not in day_views]
+
+
+def plan_schedule_fetches(requested: list) -> list:
+    """
+    ユーザー・日の組（複数のリクエストの和集合を含む）を取得するための getSchedule の取得計画を作成する
+    要求された日の連続した期間ごとに、getSchedule の上限（62日）以内の期間に分け、
+    その期間に取得が必要な日があるユーザーをまとめて取得する
+    （どのユーザーにも要求されていない日（選択されていない曜日など）は取得しない。
+    ユーザー数の上限による分割は build_fetch_shards で行う）
+
+    Parameters:
+        requested: (メールアドレス, 日付) のリスト
+
+    Returns:
+        list: (ユーザーメールアドレスのリスト, 最初の日付, 最後の日付) のリスト
+    """
+    users_by_day = {}
+    for user_email, day in requested:
+        users_by_day.setdefault(day, {})[user_email] = None
+    days = sorted(users_by_day)
+
+    windows = []
+    for day in days:
+        current = date.fromisoformat(day)
+        # 前の日と連続していない場合、または期間が62日を超える場合は、新しい期間とする
+        if not windows or current - date.fromisoformat(windows[-1][-1]) > timedelta(days=1) \
+                or current - date.fromisoformat(windows[-1][0]) >= timedelta(days=GET_SCHEDULE_MAX_DAYS):
+            windows.append([])
+        windows[-1].append(day)
+    return [
+        (list(dict.fromkeys(user for day in window for user in users_by_day[day])), window[0], window[-1])
+        for window in windows
+    ]
+
+
+def assemble_schedule_response(schedule_req, plan, day_views: dict) -> dict:
+    """
+    日ごとの availabilityView から、選択された曜日の毎日の時間帯の枠だけを切り出して連結し、
+    getSchedule のレスポンスと同じ形式にまとめる（枠と日時の対応は plan.slot_offsets を参照）
+    取得できなかった日は埋まりとして扱い、以降の日の枠がずれないようにする
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        plan: plan_day_windows で作成した計画
+        day_views: (メールアドレス, 日付) → 1日分の availabilityView
+
+    Returns:
+        dict: {"value": [{"scheduleId", "availabilityView"}, ...]}
+    """
+    busy_day = "2" * SLOTS_PER_DAY
+    schedules = []
+    for user in schedule_req.users:
+        availability_view = "".join(
+            plan.window_view([day_views.get((user.email, day), busy_day) for day in spanned])
+            for spanned in plan.window_days
+        )
+        schedules.append({"scheduleId": user.email, "availabilityView": availability_view})
+    return {"value": schedules}
+
+
+def schedule_fetch_key(requested: list, time_zone: str) -> tuple:
+    """
+    取得するユーザー・日の組から、同じ内容の getSchedule をまとめるためのキーを作成する
+    """
+    return (tuple(requested), time_zone, AVAILABILITY_VIEW_INTERVAL)
+
+
+def fetch_schedule_shard(url: str, access_token: str, body: dict) -> dict:
+    """
+    分割した1件の getSchedule リクエストを送信する（一時的なエラーは Retry-After に従って再試行する）
+    """
+    response = send_with_retry(lambda: graph_post(url, access_token=access_token, json=body))
     response.raise_for_status()
     return response.json()
 
 
-def parse_availability(response_json, start_hour: float, end_hour: float):
+def build_fetch_shards(fetches: list, time_zone: str) -> list:
     """
-    Graph API のレスポンスデータ（availabilityView）を解析し、指定された時間の空き時間を探す
+    取得計画の各期間（first_day 0:00 〜 last_day 24:00）を、getSchedule の上限に収まるリクエストに分割する
 
     Parameters:
-        response_json: Graph APIからのレスポンス
-        start_hour: 開始時間（float形式）
-        end_hour: 終了時間（float形式）
-        
+        fetches: plan_schedule_fetches の戻り値
+        time_zone: タイムゾーン
+
+    Returns:
+        list: build_schedule_shards と同じ形式のリスト
+    """
+    return [
+        shard
+        for user_emails, first_day, last_day in fetches
+        for shard in build_schedule_shards(
+            user_emails,
+            datetime.fromisoformat(first_day),
+            datetime.fromisoformat(last_day) + timedelta(days=1),
+            time_zone
+        )
+    ]
+
+
+def fetch_day_views(url: str, access_token: str, fetches: list, time_zone: str) -> dict:
+    """
+    取得計画のすべての期間の空き時間を取得し、日ごとに分割して返す
+    複数のリクエストに分割される場合は、まとめて並行に取得する
+
+    Returns:
+        dict: (メールアドレス, 日付) → 1日分の availabilityView
+    """
+    shards = build_fetch_shards(fetches, time_zone)
+
+    if len(shards) == 1:
+        responses = [fetch_schedule_shard(url, access_token, shards[0][2])]
+    else:
+        max_workers = min(len(shards), GRAPH_SCHEDULE_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(partial(fetch_schedule_shard, url, access_token), [body for _, _, body in shards]))
+    return split_day_views(shards, responses)
+
+
+def fetch_requested_day_views(requested: list, time_zone: str) -> dict:
+    """
+    ユーザー・日の組（まとめた複数のリクエストの和集合）の空き時間を取得して、空き時間キャッシュに保存する
+
     Returns:
-        list: 空き時間スロットのリスト
+        dict: (メールアドレス, 日付) → 1日分の availabilityView
     """
-    # response_json の中に schedules 配列があり、各ユーザーの availabilityView が返却される
-    # availabilityView が '0' (空き), '1' (不明), '2' (埋まり) ... と 30分区切りで入っている
-    # 例: '022200002222220000' などの文字列 (入力の時間範囲によって、出力範囲が変化)
+    fetches = plan_schedule_fetches(requested)
+    fetched = fetch_day_views(schedule_url(fetches[0][0][0]), get_access_token(), fetches, time_zone)
+    availability_cache.put_many(fetched, AVAILABILITY_VIEW_INTERVAL, time_zone)
+    return fetched
 
-    schedules_info = response_json.get("value", [])
-    availabilityView_list = []
-    free_slots_list = []
-    # 1つのスロットが何時間か (通常 0.5 時間 = 30分)
-    slot_duration = 0.5
+
+# 短い時間内に要求された、異なるリクエストの空き時間の取得をまとめて送信する
+schedule_batcher = ScheduleBatcher(GRAPH_SCHEDULE_BATCH_WINDOW_MS / 1000, fetch_requested_day_views)
+
+
+def cached_day_views(schedule_req, after_minute: int = None) -> tuple:
+    """
+    取得・評価の計画を立て、空き時間キャッシュにあるユーザー・日の availabilityView と、取得が必要なユーザー・日を返す
+    カーソルから再開する場合、返却済みの候補より前の日は取得しない（連結時に埋まりとして扱う）
+
+    Returns:
+        tuple: (DayWindowPlan, (メールアドレス, 日付) → キャッシュ済みの availabilityView, 取得が必要な (メールアドレス, 日付) のリスト)
+    """
+    plan = plan_day_windows(schedule_req, AVAILABILITY_VIEW_INTERVAL)
+    user_emails = [user.email for user in schedule_req.users]
+    days = plan.fetch_days_from(plan.first_window_after(after_minute)) if after_minute is not None else plan.fetch_days
+    day_views = availability_cache.get_many(user_emails, days, AVAILABILITY_VIEW_INTERVAL, schedule_req.time_zone)
+    return plan, day_views, missing_day_views(user_emails, days, day_views)
+
+
+def get_schedules(schedule_req, after_minute: int = None):
+    """
+    Microsoft Graph API の getSchedule エンドポイントを使用して、ユーザーのスケジュール情報を取得
+    選択された曜日の日だけを対象とし、ユーザーごと・日ごとの空き時間キャッシュに無い（または期限切れの）分のみを取得する
+    同じ内容の取得を他のリクエストが実行中の場合は、新たに送信せずにその結果を共有する
+    面接担当者や期間が重なる他のリクエストの取得とは、GRAPH_SCHEDULE_BATCH_WINDOW_MS ミリ秒のあいだにまとめて送信する
     
-    for schedule in schedules_info:
-        user_email = schedule.get("scheduleId")
-        availability_view = schedule.get("availabilityView")
-        availabilityView_list.append(availability_view)
-
-    for availability_view in availabilityView_list:
-        # 全体で何回の 30分枠があるか
-        increments = len(availability_view)
-        # (終わり時刻 - 開始時刻) のなかに increments 回の30分枠が入っているはず
-        total_hours = increments * slot_duration
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        after_minute: 指定した場合は、この経過分（起点日 0:00 から）より後の候補の評価に必要な日だけを取得する
         
-        free_slots = []
-        for i, c in enumerate(availability_view):
-            # '0' のときだけ "空いている" と判断
-            if c == '0':
-                # i 番目のスロットの開始・終了時刻を計算
-                slot_start = start_hour + i * slot_duration
-                slot_end = slot_start + slot_duration
-                # タプルでリストに追加
-                free_slots.append((slot_start, slot_end))
-
-        free_slots_list.append(free_slots)
-    return free_slots_list
+    Returns:
+        dict: 選択された曜日の毎日の時間帯の枠だけを連結した、ユーザーごとの availabilityView
+    """
+    plan, day_views, requested = cached_day_views(schedule_req, after_minute)
+    time_zone = schedule_req.time_zone
+    if requested:
+        # 同じ取得を送信中の場合はその結果を共有し、異なる取得は他のリクエストとまとめて送信する
+        day_views.update(schedule_flight.do(
+            schedule_fetch_key(requested, time_zone),
+            lambda: schedule_batcher.fetch(requested, time_zone)
+        ))
+    return assemble_schedule_response(schedule_req, plan, day_views)
 
 
 def create_event_payload(appointment_req, start_str: str, end_str: str) -> dict:
@@ -141,71 +385,362 @@ def create_event_payload(appointment_req, start_str: str, end_str: str) -> dict:
     }
 
 
-def register_event_for_user(user_email: str, event: dict, headers: dict) -> dict:
+def event_path(user_email: str, event_id: str) -> str:
     """
-    指定された user_email の予定表に対して、Graph API を使用してイベントを登録する。
-    登録に失敗した場合は HTTPException を発生させる。
-    
+    $batch のサブリクエスト用に、ユーザーの予定表の個別イベントの相対パスを作成する
+    """
+    encoded_email = urllib.parse.quote(user_email)
+    encoded_event_id = urllib.parse.quote(event_id, safe='')
+    return f"/users/{encoded_email}/calendar/events/{encoded_event_id}"
+
+
+def raise_event_registration_error(user_email: str, status_code: int, text: str):
+    """
+    予定登録エラーをログに記録し、HTTPException を発生させる
+    """
+    logger.error(f"予定登録エラー for {user_email}: {status_code}, {text}")
+    raise HTTPException(
+        status_code=status_code,
+        detail=f"ユーザー {user_email} に対する予定登録エラー: {text}"
+    )
+
+
+def batch_url(version: str = "v1.0") -> str:
+    """
+    JSON バッチ（$batch）エンドポイントのURLを作成する
+    """
+    return f"{GRAPH_API_BASE_URL}/{version}/$batch"
+
+
+def chunk_batch_requests(sub_requests: list) -> list:
+    """
+    サブリクエストのリストを、1回の $batch で送信できる件数ごとに分割する
+    """
+    return [
+        sub_requests[i:i + GRAPH_BATCH_LIMIT]
+        for i in range(0, len(sub_requests), GRAPH_BATCH_LIMIT)
+    ]
+
+
+def parse_batch_response(chunk: list, status_code: int, response_json: dict, text: str = "") -> dict:
+    """
+    $batch のレスポンスを、サブリクエストID → {"status", "body", "headers"} の辞書に変換する
+    バッチ全体が失敗した場合は、チャンク内のすべてのサブリクエストを同じステータスの失敗として扱う
+
     Parameters:
-        user_email: イベント登録対象のユーザーメールアドレス
-        event: イベントデータ
+        chunk: 送信したサブリクエストのリスト
+        status_code: $batch 自体のHTTPステータス
+        response_json: $batch のレスポンスボディ
+        text: $batch のレスポンス本文（失敗時のエラーメッセージ用）
+    """
+    if status_code >= 400 or response_json is None:
+        return {
+            sub_request["id"]: {"status": status_code, "body": text, "headers": {}}
+            for sub_request in chunk
+        }
+
+    results = {}
+    for sub_response in response_json.get("responses", []):
+        results[sub_response["id"]] = {
+            "status": sub_response.get("status", 500),
+            "body": sub_response.get("body"),
+            "headers": sub_response.get("headers", {})
+        }
+    # レスポンスに含まれないサブリクエストは失敗扱いにする
+    for sub_request in chunk:
+        results.setdefault(sub_request["id"], {"status": 500, "body": "missing batch response", "headers": {}})
+    return results
+
+
+def circuit_open_batch_response(chunk: list, error: CircuitOpenError) -> dict:
+    """
+    サーキットブレーカーが開いているため送信しなかったチャンクを、ブレーカーが閉じるまでの時間を
+    Retry-After とする 503 の失敗として扱う
+    """
+    return {
+        sub_request["id"]: {"status": 503, "body": str(error), "headers": {"Retry-After": str(error.retry_after)}}
+        for sub_request in chunk
+    }
+
+
+def send_batch(chunk: list, headers: dict, version: str = "v1.0") -> dict:
+    """
+    最大20件のサブリクエストを1回の $batch で送信する
+
+    Parameters:
+        chunk: サブリクエストのリスト（{"id", "method", "url", "body"?, "headers"?}）
         headers: APIリクエストヘッダー
-        
+        version: Graph API のバージョン（サブリクエストのURLはこのバージョンからの相対パス）
+
     Returns:
-        dict: APIレスポンス
+        dict: サブリクエストID → {"status", "body", "headers"}
     """
-    encoded_email = urllib.parse.quote(user_email)
-    graph_url = f"https://graph.microsoft.com/beta/users/{encoded_email}/calendar/events"
-    
-    # タイムアウト設定を延長（30秒→60秒）
-    response = requests.post(
-        graph_url, 
-        headers=headers, 
-        json=event, 
-        timeout=60
-    )
+    try:
+        response = graph_post(batch_url(version), headers=headers, json={"requests": chunk})
+    except CircuitOpenError as e:
+        return circuit_open_batch_response(chunk, e)
+    except Exception as e:
+        logger.error(f"バッチリクエストの送信に失敗しました: {e}")
+        return parse_batch_response(chunk, 503, None, str(e))
+
     if response.status_code >= 400:
-        logger.error(f"予定登録エラー for {user_email}: {response.status_code}, {response.text}")
-        raise HTTPException(
-            status_code=response.status_code,
-            detail=f"ユーザー {user_email} に対する予定登録エラー: {response.text}"
-        )
-    return response.json()
+        return parse_batch_response(chunk, response.status_code, None, response.text)
+    return parse_batch_response(chunk, response.status_code, response.json())
+
+
+def is_batch_success(result: dict, success_statuses=()) -> bool:
+    """
+    サブリクエストの結果が成功かどうかを判定する（2xx/3xx または success_statuses に含まれるステータス）
+    """
+    return result["status"] < 400 or result["status"] in success_statuses
+
+
+def record_batch_results(results: dict, success_statuses, succeeded: dict, failed: dict) -> dict:
+    """
+    $batch の結果を成功・失敗に振り分け（再送で成功したサブリクエストは失敗から除く）、
+    一時的なエラー（RETRYABLE_STATUSES）で失敗した再送対象のサブリクエストの結果を返す
+
+    Parameters:
+        results: send_batch の戻り値
+        success_statuses: 4xx/5xx のうち成功として扱うステータス
+        succeeded: 成功したサブリクエストID → 結果（更新する）
+        failed: 失敗したサブリクエストID → 最後の結果（更新する）
+
+    Returns:
+        dict: 再送するサブリクエストID → 結果
+    """
+    retryable = {}
+    for request_id, result in results.items():
+        if is_batch_success(result, success_statuses):
+            succeeded[request_id] = result
+            failed.pop(request_id, None)
+        else:
+            failed[request_id] = result
+            if is_retryable_status(result["status"]):
+                retryable[request_id] = result
+    return retryable
+
+
+def batch_retry_after(results: list) -> float | None:
+    """
+    再送するサブリクエストの結果のうち、最も長い Retry-After（秒）を返す（指定が無い場合は None）
+    """
+    waits = [wait for wait in (retry_after_seconds(result["headers"]) for result in results) if wait is not None]
+    return max(waits) if waits else None
+
+
+def execute_batch_with_retry(sub_requests: list, headers: dict, version: str = "v1.0", max_retries=3,
+                             success_statuses=()):
+    """
+    サブリクエストを $batch で送信し、一時的なエラー（RETRYABLE_STATUSES）で失敗したサブリクエストのみを再送する
+    再送までは Retry-After（指定が無い場合は full jitter の指数バックオフ）だけ待ち、
+    GRAPH_REQUEST_DEADLINE 秒の期限までに再送できない場合は、その時点の結果を返す
+
+    Parameters:
+        sub_requests: サブリクエストのリスト
+        headers: APIリクエストヘッダー
+        version: Graph API のバージョン
+        max_retries: 最大試行回数
+        success_statuses: 4xx/5xx のうち成功として扱うステータス
+
+    Returns:
+        tuple: (成功したサブリクエストID → 結果, 失敗したサブリクエストID → 最後の結果)
+    """
+    succeeded = {}
+    failed = {}
+    pending = list(sub_requests)
+    deadline = graph_retry_policy.start()
+    attempt = 0
+
+    with graph_deadline(deadline):
+        while pending:
+            attempt += 1
+            retryable = {}
+            for chunk in chunk_batch_requests(pending):
+                retryable.update(record_batch_results(send_batch(chunk, headers, version), success_statuses, succeeded, failed))
+
+            # 400/403 などは再送しても成功しないため、すぐに失敗とする
+            pending = [sub_request for sub_request in pending if sub_request["id"] in retryable]
+            if not pending or attempt >= max_retries:
+                break
+            delay = graph_retry_policy.backoff(attempt, deadline, batch_retry_after(list(retryable.values())))
+            if delay is None:
+                break
+            time.sleep(delay)
 
+    return succeeded, failed
 
-def register_event_with_retry(user_email: str, event: dict, headers: dict, max_retries=3) -> dict:
+
+def build_event_batch_requests(user_emails: list, event: dict) -> list:
+    """
+    各ユーザーの予定表にイベントを登録するサブリクエストのリストを作成する
+    サブリクエストIDは user_emails のインデックスとする
+    イベントの作成は冪等ではないため、ユーザーごとに transactionId を付与する。タイムアウトや 5xx の後に
+    再送した場合も、Graph API は同じ transactionId のイベントを重複して作成せず、作成済みのイベントを返す
+    """
+    return [
+        {
+            "id": str(i),
+            "method": "POST",
+            "url": f"/users/{urllib.parse.quote(user_email)}/calendar/events",
+            "body": {**event, "transactionId": str(uuid.uuid4())},
+            "headers": {"Content-Type": "application/json"}
+        }
+        for i, user_email in enumerate(user_emails)
+    ]
+
+
+def created_event_ids(user_emails: list, succeeded: dict) -> dict:
+    """
+    登録に成功したサブリクエストの結果から、ユーザーごとのイベントIDを取り出す
+
+    Returns:
+        dict: ユーザーメールアドレス → イベントID
+    """
+    return {
+        user_emails[int(request_id)]: result["body"]["id"]
+        for request_id, result in succeeded.items()
+        if isinstance(result["body"], dict) and result["body"].get("id")
+    }
+
+
+def log_orphaned_events(event_ids: dict, outcomes: dict | None) -> None:
+    """
+    取り消せなかった予定（面接担当者の予定表に残った予定）を、手動で削除できるようにログに記録する
+
+    Parameters:
+        event_ids: 取り消す予定のイベントID（ユーザーメールアドレス → イベントID）
+        outcomes: delete_events_batch の戻り値（取り消し自体に失敗した場合は None）
+    """
+    # 結果の無い担当者の予定も、残っているものとして扱う
+    orphaned = {
+        user_email: event_id
+        for user_email, event_id in event_ids.items()
+        if not (outcomes or {}).get(user_email, {}).get("deleted")
+    }
+    if orphaned:
+        logger.error(f"取り消せなかった予定があります: {orphaned}")
+
+
+def rollback_registered_events(event_ids: dict, headers: dict) -> None:
+    """
+    登録した予定を取り消す（予約の競合や、一部の担当者への登録の失敗時）
+    取り消しに失敗しても例外は送出せず、残った予定をログに記録する
+
+    Parameters:
+        event_ids: 取り消す予定のイベントID（ユーザーメールアドレス → イベントID）
+        headers: APIリクエストヘッダー
+    """
+    try:
+        outcomes = delete_events_batch(event_ids, headers)
+    except Exception as e:
+        outcomes = None
+        logger.error(f"登録した予定の取り消しに失敗しました: {e}", exc_info=True)
+    log_orphaned_events(event_ids, outcomes)
+
+
+def collect_registered_events(user_emails: list, succeeded: dict, failed: dict) -> dict:
+    """
+    $batch の結果をユーザーごとの登録結果に変換する
+    登録に失敗したユーザーがいる場合は HTTPException を発生させる
+
+    Returns:
+        dict: ユーザーメールアドレス → 作成されたイベント
+    """
+    if failed:
+        request_id, result = next(iter(failed.items()))
+        logger.error(f"最大リトライ回数に達しました: {[user_emails[int(i)] for i in failed]}")
+        raise_event_registration_error(user_emails[int(request_id)], result["status"], str(result["body"]))
+    return {user_emails[int(request_id)]: result["body"] for request_id, result in succeeded.items()}
+
+
+def register_events_batch(user_emails: list, event: dict, headers: dict, max_retries=3) -> dict:
     """
-    リトライ機能付きでイベント登録を行う関数
+    各ユーザーの予定表に同じイベントを $batch（最大20件/回）でまとめて登録する。
+    失敗したユーザーの分だけを再送し、成功済みのユーザーには再送しない（再送は transactionId で重複を防ぐ）。
+    一部のユーザーへの登録に失敗した場合は、登録できたユーザーの予定を取り消してから HTTPException を発生させる。
     
     Parameters:
-        user_email: イベント登録対象のユーザーメールアドレス
+        user_emails: イベント登録対象のユーザーメールアドレスのリスト
         event: イベントデータ
         headers: APIリクエストヘッダー
-        max_retries: 最大リトライ回数
+        max_retries: 最大試行回数
         
     Returns:
-        dict: APIレスポンス
+        dict: ユーザーメールアドレス → 作成されたイベント
     """
-    retry_count = 0
-    last_exception = None
-    
-    while retry_count < max_retries:
-        try:
-            return register_event_for_user(user_email, event, headers)
-        except Exception as e:
-            last_exception = e
-            retry_count += 1
-            # 指数バックオフ（リトライ間隔を徐々に広げる）
-            time.sleep(2 ** retry_count)  # 2秒、4秒、8秒...
+    sub_requests = build_event_batch_requests(user_emails, event)
+    try:
+        succeeded, failed = execute_batch_with_retry(sub_requests, headers, version="beta", max_retries=max_retries)
+    finally:
+        # 予定を登録したユーザーの空き時間は変わるため、キャッシュ済みの空き時間を破棄する
+        availability_cache.invalidate(user_emails)
+    if failed and succeeded:
+        rollback_registered_events(created_event_ids(user_emails, succeeded), headers)
+    return collect_registered_events(user_emails, succeeded, failed)
+
+
+def build_delete_batch_requests(event_items: list) -> list:
+    """
+    各ユーザーの予定表からイベントを削除するサブリクエストのリストを作成する
+    サブリクエストIDは event_items のインデックスとする
+
+    Parameters:
+        event_items: (ユーザーメールアドレス, イベントID) のリスト
+    """
+    return [
+        {"id": str(i), "method": "DELETE", "url": event_path(user_email, event_id)}
+        for i, (user_email, event_id) in enumerate(event_items)
+    ]
+
+
+def collect_deletion_results(event_items: list, succeeded: dict, failed: dict) -> dict:
+    """
+    $batch の結果をユーザーごとの削除結果に変換する
+
+    Returns:
+        dict: ユーザーメールアドレス → {"deleted": bool, "status": int, "error": str | None}
+    """
+    outcomes = {}
+    for i, (user_email, _) in enumerate(event_items):
+        request_id = str(i)
+        if request_id in succeeded:
+            outcomes[user_email] = {"deleted": True, "status": succeeded[request_id]["status"], "error": None}
+        else:
+            result = failed[request_id]
+            logger.error(f"予定削除エラー for {user_email}: {result['status']} {result['body']}")
+            outcomes[user_email] = {"deleted": False, "status": result["status"], "error": str(result["body"])}
+    return outcomes
+
+
+def delete_events_batch(event_ids: dict, headers: dict, max_retries=3) -> dict:
+    """
+    各ユーザーの予定表からイベントを $batch（最大20件/回）でまとめて削除する。
+    途中で失敗しても残りのユーザーの削除は続行し、ユーザーごとの結果を返す。
+    すでに削除済み（404）のイベントは削除成功として扱う。
     
-    # リトライ上限に達した場合
-    logger.error(f"最大リトライ回数に達しました: {user_email}")
-    raise last_exception
+    Parameters:
+        event_ids: ユーザーメールアドレス → イベントID
+        headers: APIリクエストヘッダー
+        max_retries: 最大試行回数
+        
+    Returns:
+        dict: ユーザーメールアドレス → {"deleted": bool, "status": int, "error": str | None}
+    """
+    event_items = list(event_ids.items())
+    sub_requests = build_delete_batch_requests(event_items)
+    succeeded, failed = execute_batch_with_retry(
+        sub_requests, headers, max_retries=max_retries, success_statuses=(404,)
+    )
+    outcomes = collect_deletion_results(event_items, succeeded, failed)
+    # 予定を削除したユーザーの空き時間は変わるため、キャッシュ済みの空き時間を破棄する
+    availability_cache.invalidate([user_email for user_email, outcome in outcomes.items() if outcome["deleted"]])
+    return outcomes
 
 
 def send_email_graph(access_token, sender_email, to_email, subject, body):
     """
-    Microsoft Graph API を使ってメールを送信する関数
+    Microsoft Graph API を使ってメールを送信する関数（一時的なエラーは Retry-After に従って再試行する）
     
     Parameters:
         access_token: Microsoft Graph APIのアクセストークン
@@ -214,7 +749,7 @@ def send_email_graph(access_token, sender_email, to_email, subject, body):
         subject: メール件名
         body: メール本文
     """
-    endpoint = f"https://graph.microsoft.com/v1.0/users/{sender_email}/sendMail"
+    endpoint = f"{GRAPH_API_BASE_URL}/v1.0/users/{sender_email}/sendMail"
     
     # 署名の前に本文を配置するための特殊な区切り文字を追加
     modified_body = (
@@ -242,12 +777,7 @@ def send_email_graph(access_token, sender_email, to_email, subject, body):
         }
     }
     
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
-    
-    response = requests.post(endpoint, headers=headers, json=email_data)
+    response = send_with_retry(lambda: graph_post(endpoint, access_token=access_token, json=email_data))
     response.raise_for_status()
     if response.status_code == 202:
         logger.info("メールが送信されました。")
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+
+from app.config import GRAPH_SCHEDULE_CONCURRENCY, GRAPH_SCHEDULE_BATCH_WINDOW_MS
+from app.dependencies import get_access_token_async
+from app.internal.availability_cache import availability_cache
+from app.internal.graph_api import (
+    AVAILABILITY_VIEW_INTERVAL, schedule_url, build_fetch_shards, split_day_views, schedule_fetch_key,
+    cached_day_views, plan_schedule_fetches, assemble_schedule_response,
+    batch_url, chunk_batch_requests, parse_batch_response, record_batch_results,
+    circuit_open_batch_response, batch_retry_after,
+    build_event_batch_requests, collect_registered_events, created_event_ids, log_orphaned_events,
+    build_delete_batch_requests, collect_deletion_results
+)
+from app.internal.graph_client import async_graph_request, graph_deadline, send_with_retry_async
+from app.internal.resilience import CircuitOpenError, graph_retry_policy
+from app.internal.schedule_batcher import AsyncScheduleBatcher
+from app.internal.single_flight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 同じ取得計画の getSchedule を同時に1回だけ送信する
+schedule_flight = AsyncSingleFlight()
+
+
+async def fetch_schedule_shard(url: str, access_token: str, body: dict, semaphore: asyncio.Semaphore) -> dict:
+    """
+    分割した1件の getSchedule リクエストを非同期で送信する（一時的なエラーは Retry-After に従って再試行する）
+    再試行までの待機中は同時送信数の枠を占有しない
+    """
+    async def send():
+        async with semaphore:
+            return await async_graph_request("POST", url, access_token=access_token, json=body)
+
+    response = await send_with_retry_async(send)
+    response.raise_for_status()
+    return response.json()
+
+
+async def fetch_day_views(url: str, access_token: str, fetches: list, time_zone: str,
+                          semaphore: asyncio.Semaphore) -> dict:
+    """
+    取得計画のすべての期間の空き時間を非同期で並行に取得し、日ごとに分割して返す
+
+    Returns:
+        dict: (メールアドレス, 日付) → 1日分の availabilityView
+    """
+    shards = build_fetch_shards(fetches, time_zone)
+    responses = await asyncio.gather(*[
+        fetch_schedule_shard(url, access_token, body, semaphore) for _, _, body in shards
+    ])
+    return split_day_views(shards, responses)
+
+
+async def fetch_requested_day_views(requested: list, time_zone: str) -> dict:
+    """
+    ユーザー・日の組（まとめた複数のリクエストの和集合）の空き時間を非同期で取得して、空き時間キャッシュに保存する
+
+    Returns:
+        dict: (メールアドレス, 日付) → 1日分の availabilityView
+    """
+    fetches = plan_schedule_fetches(requested)
+    access_token = await get_access_token_async()
+    semaphore = asyncio.Semaphore(GRAPH_SCHEDULE_CONCURRENCY)
+    fetched = await fetch_day_views(schedule_url(fetches[0][0][0]), access_token, fetches, time_zone, semaphore)
+    availability_cache.put_many(fetched, AVAILABILITY_VIEW_INTERVAL, time_zone)
+    return fetched
+
+
+# 短い時間内に要求された、異なるリクエストの空き時間の取得をまとめて送信する
+schedule_batcher = AsyncScheduleBatcher(GRAPH_SCHEDULE_BATCH_WINDOW_MS / 1000, fetch_requested_day_views)
+
+
+async def get_schedules(schedule_req, after_minute: int = None):
+    """
+    getSchedule エンドポイントを使用して、ユーザーのスケジュール情報を非同期で取得
+    選択された曜日の日のうち、空き時間キャッシュに無い（または期限切れの）ユーザー・日のみを取得する
+    同じ内容の取得を他のリクエストが実行中の場合は、新たに送信せずにその結果を共有する
+    面接担当者や期間が重なる他のリクエストの取得とは、GRAPH_SCHEDULE_BATCH_WINDOW_MS ミリ秒のあいだにまとめて送信する
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        after_minute: 指定した場合は、この経過分（起点日 0:00 から）より後の候補の評価に必要な日だけを取得する
+
+    Returns:
+        dict: 選択された曜日の毎日の時間帯の枠だけを連結した、ユーザーごとの availabilityView
+    """
+    plan, day_views, requested = cached_day_views(schedule_req, after_minute)
+    time_zone = schedule_req.time_zone
+    if requested:
+        # 同じ取得を送信中の場合はその結果を共有し、異なる取得は他のリクエストとまとめて送信する
+        day_views.update(await schedule_flight.do(
+            schedule_fetch_key(requested, time_zone),
+            lambda: schedule_batcher.fetch(requested, time_zone)
+        ))
+    return assemble_schedule_response(schedule_req, plan, day_views)
+
+
+async def send_batch(chunk: list, headers: dict, version: str = "v1.0") -> dict:
+    """
+    最大20件のサブリクエストを1回の $batch で非同期に送信する
+
+    Returns:
+        dict: サブリクエストID → {"status", "body", "headers"}
+    """
+    try:
+        response = await async_graph_request("POST", batch_url(version), headers=headers, json={"requests": chunk})
+    except CircuitOpenError as e:
+        return circuit_open_batch_response(chunk, e)
+    except Exception as e:
+        logger.error(f"バッチリクエストの送信に失敗しました: {e}")
+        return parse_batch_response(chunk, 503, None, str(e))
+
+    if response.status_code >= 400:
+        return parse_batch_response(chunk, response.status_code, None, response.text)
+    return parse_batch_response(chunk, response.status_code, response.json())
+
+
+async def execute_batch_with_retry(sub_requests: list, headers: dict, version: str = "v1.0", max_retries=3,
+                                   success_statuses=()):
+    """
+    サブリクエストを $batch で非同期に送信し、一時的なエラーで失敗したサブリクエストのみを再送する
+    20件を超える場合の各バッチは並行して送信する（再送までの待ち時間は execute_batch_with_retry と同じ）
+
+    Returns:
+        tuple: (成功したサブリクエストID → 結果, 失敗したサブリクエストID → 最後の結果)
+    """
+    succeeded = {}
+    failed = {}
+    pending = list(sub_requests)
+    deadline = graph_retry_policy.start()
+    attempt = 0
+
+    with graph_deadline(deadline):
+        while pending:
+            attempt += 1
+            retryable = {}
+            chunk_results = await asyncio.gather(*[
+                send_batch(chunk, headers, version) for chunk in chunk_batch_requests(pending)
+            ])
+            for results in chunk_results:
+                retryable.update(record_batch_results(results, success_statuses, succeeded, failed))
+
+            pending = [sub_request for sub_request in pending if sub_request["id"] in retryable]
+            if not pending or attempt >= max_retries:
+                break
+            delay = graph_retry_policy.backoff(attempt, deadline, batch_retry_after(list(retryable.values())))
+            if delay is None:
+                break
+            # 待機中はイベントループをブロックしない
+            await asyncio.sleep(delay)
+
+    return succeeded, failed
+
+
+async def register_events_batch(user_emails: list, event: dict, headers: dict, max_retries=3) -> dict:
+    """
+    各ユーザーの予定表に同じイベントを $batch でまとめて非同期に登録する。
+    失敗したユーザーの分だけを再送し、成功済みのユーザーには再送しない（再送は transactionId で重複を防ぐ）。
+    一部のユーザーへの登録に失敗した場合は、登録できたユーザーの予定を取り消してから HTTPException を発生させる。
+
+    Returns:
+        dict: ユーザーメールアドレス → 作成されたイベント
+    """
+    sub_requests = build_event_batch_requests(user_emails, event)
+    try:
+        succeeded, failed = await execute_batch_with_retry(sub_requests, headers, version="beta", max_retries=max_retries)
+    finally:
+        # 予定を登録したユーザーの空き時間は変わるため、キャッシュ済みの空き時間を破棄する
+        availability_cache.invalidate(user_emails)
+    if failed and succeeded:
+        await rollback_registered_events(created_event_ids(user_emails, succeeded), headers)
+    return collect_registered_events(user_emails, succeeded, failed)
+
+
+async def delete_events_batch(event_ids: dict, headers: dict, max_retries=3) -> dict:
+    """
+    各ユーザーの予定表からイベントを $batch でまとめて非同期に削除する。
+    途中で失敗しても残りのユーザーの削除は続行し、ユーザーごとの結果を返す。
+
+    Returns:
+        dict: ユーザーメールアドレス → {"deleted": bool, "status": int, "error": str | None}
+    """
+    event_items = list(event_ids.items())
+    sub_requests = build_delete_batch_requests(event_items)
+    succeeded, failed = await execute_batch_with_retry(
+        sub_requests, headers, max_retries=max_retries, success_statuses=(404,)
+    )
+    outcomes = collect_deletion_results(event_items, succeeded, failed)
+    # 予定を削除したユーザーの空き時間は変わるため、キャッシュ済みの空き時間を破棄する
+    availability_cache.invalidate([user_email for user_email, outcome in outcomes.items() if outcome["deleted"]])
+    return outcomes
+
+
+async def rollback_registered_events(event_ids: dict, headers: dict) -> None:
+    """
+    登録した予定を非同期で取り消す（予約の競合や、一部の担当者への登録の失敗時）
+    取り消しに失敗しても例外は送出せず、残った予定をログに記録する
+    """
+    try:
+        outcomes = await delete_events_batch(event_ids, headers)
+    except Exception as e:
+        outcomes = None
+        logger.error(f"登録した予定の取り消しに失敗しました: {e}", exc_info=True)
+    log_orphaned_events(event_ids, outcomes)
@@ -0,0 +1,304 @@
+import asyncio
+import contextvars
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    GRAPH_POOL_CONNECTIONS, GRAPH_POOL_MAXSIZE,
+    GRAPH_CONNECT_TIMEOUT, GRAPH_READ_TIMEOUT
+)
+from app.internal.resilience import graph_breaker, graph_retry_policy, is_retryable_status, retry_after_seconds
+
+if TYPE_CHECKING:  # httpx は非同期モードでのみ使用するため、最初の利用時にインポートする（起動時間の短縮）
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# すべての Graph API 呼び出しに付与する既定ヘッダー
+DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
+
+_session = None
+_session_lock = threading.Lock()
+_async_client = None
+# 実行中の処理（再試行を含む）の期限（time.monotonic() の値）。各リクエストのタイムアウトを期限までの残り時間に収める
+_deadline = contextvars.ContextVar("graph_request_deadline", default=None)
+
+
+@contextmanager
+def graph_deadline(deadline: float):
+    """
+    with ブロック内の Graph API のリクエストのタイムアウトを、期限（time.monotonic() の値）までの残り時間に収める
+    """
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def request_timeouts() -> tuple:
+    """
+    (接続タイムアウト, 読み取りタイムアウト) を返す（期限内の場合は、期限までの残り時間を上限とする）
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return GRAPH_CONNECT_TIMEOUT, GRAPH_READ_TIMEOUT
+    remaining = max(deadline - time.monotonic(), 0.1)
+    return min(GRAPH_CONNECT_TIMEOUT, remaining), min(GRAPH_READ_TIMEOUT, remaining)
+
+
+def _create_session() -> requests.Session:
+    """
+    Keep-Alive による接続プールを持つ Graph API 用のセッションを作成する
+    """
+    session = requests.Session()
+    # リトライはアプリケーション側で制御するため、アダプタでは行わない
+    adapter = HTTPAdapter(
+        pool_connections=GRAPH_POOL_CONNECTIONS,
+        pool_maxsize=GRAPH_POOL_MAXSIZE,
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def get_graph_session() -> requests.Session:
+    """
+    プロセス全体で共有する Graph API 用のセッションを取得する
+    初回呼び出し時にのみセッションを作成し、以降は同じ接続プールを再利用する
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def close_graph_session() -> None:
+    """
+    共有セッションを閉じ、保持している接続を解放する
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def graph_request(method: str, url: str, access_token: str = None, headers: dict = None,
+                  timeout=None, **kwargs) -> requests.Response:
+    """
+    共有セッションを使って Graph API にリクエストを送信する
+
+    Parameters:
+        method: HTTPメソッド
+        url: リクエスト先URL
+        access_token: アクセストークン（指定時は Authorization ヘッダーを付与）
+        headers: 追加のリクエストヘッダー
+        timeout: タイムアウト（未指定時は設定値の (接続, 読み取り) タイムアウト。graph_deadline の期限内では残り時間まで）
+        **kwargs: requests に渡すその他の引数（json など）
+
+    Returns:
+        requests.Response: APIレスポンス
+    """
+    request_headers = {}
+    if access_token:
+        request_headers["Authorization"] = f"Bearer {access_token}"
+    if headers:
+        request_headers.update(headers)
+    if timeout is None:
+        timeout = request_timeouts()
+
+    # Graph API が障害中と判断している間は、送信せずに CircuitOpenError とする
+    probe = graph_breaker.before_request()
+    try:
+        response = get_graph_session().request(
+            method,
+            url,
+            headers=request_headers,
+            timeout=timeout,
+            **kwargs
+        )
+    except Exception:
+        graph_breaker.record(False)
+        raise
+    except BaseException:
+        # 中断（KeyboardInterrupt など）は障害として数えないが、試しの送信だった場合はその枠を解放する
+        if probe:
+            graph_breaker.release_probe()
+        raise
+    graph_breaker.record(not is_retryable_status(response.status_code))
+    return response
+
+
+def graph_post(url: str, **kwargs) -> requests.Response:
+    """
+    共有セッションを使って POST リクエストを送信する
+    """
+    return graph_request("POST", url, **kwargs)
+
+
+def graph_delete(url: str, **kwargs) -> requests.Response:
+    """
+    共有セッションを使って DELETE リクエストを送信する
+    """
+    return graph_request("DELETE", url, **kwargs)
+
+
+def get_async_graph_client() -> "httpx.AsyncClient":
+    """
+    非同期モードで使用する、プロセス全体で共有する Graph API 用の非同期クライアントを取得する
+    接続プールの上限・タイムアウトは同期クライアントと同じ設定値を使用する
+    """
+    global _async_client
+    if _async_client is None:
+        import httpx
+
+        _async_client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            limits=httpx.Limits(
+                max_connections=GRAPH_POOL_MAXSIZE,
+                max_keepalive_connections=GRAPH_POOL_MAXSIZE
+            ),
+            timeout=httpx.Timeout(GRAPH_READ_TIMEOUT, connect=GRAPH_CONNECT_TIMEOUT)
+        )
+    return _async_client
+
+
+async def close_async_graph_client() -> None:
+    """
+    共有の非同期クライアントを閉じ、保持している接続を解放する
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def async_graph_request(method: str, url: str, access_token: str = None,
+                              headers: dict = None, **kwargs) -> "httpx.Response":
+    """
+    共有の非同期クライアントを使って Graph API にリクエストを送信する
+
+    Parameters:
+        method: HTTPメソッド
+        url: リクエスト先URL
+        access_token: アクセストークン（指定時は Authorization ヘッダーを付与）
+        headers: 追加のリクエストヘッダー
+        **kwargs: httpx に渡すその他の引数（json など）
+
+    Returns:
+        httpx.Response: APIレスポンス
+    """
+    request_headers = {}
+    if access_token:
+        request_headers["Authorization"] = f"Bearer {access_token}"
+    if headers:
+        request_headers.update(headers)
+    if "timeout" not in kwargs and _deadline.get() is not None:
+        import httpx
+
+        connect_timeout, read_timeout = request_timeouts()
+        kwargs["timeout"] = httpx.Timeout(read_timeout, connect=connect_timeout)
+
+    probe = graph_breaker.before_request()
+    try:
+        response = await get_async_graph_client().request(method, url, headers=request_headers, **kwargs)
+    except Exception:
+        graph_breaker.record(False)
+        raise
+    except BaseException:
+        # 取り消し（CancelledError、asyncio.timeout など）は障害として数えないが、試しの送信だった場合はその枠を解放する
+        if probe:
+            graph_breaker.release_probe()
+        raise
+    graph_breaker.record(not is_retryable_status(response.status_code))
+    return response
+
+
+def is_transport_error(error: Exception) -> bool:
+    """
+    レスポンスを受け取れなかったエラー（接続エラー・タイムアウト）かどうか（requests・httpx のどちらにも対応する）
+    """
+    if isinstance(error, requests.RequestException):
+        return True
+    httpx = sys.modules.get("httpx")
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+def send_with_retry(send, policy=graph_retry_policy):
+    """
+    Graph API へのリクエストを再試行の方針に従って送信する
+    再試行するのは一時的なエラー（接続エラー・タイムアウト・RETRYABLE_STATUSES）のみで、Retry-After が指定された場合は
+    その秒数だけ待つ。各試行のタイムアウトは、期限までの残り時間に収める
+    （再試行しても成功しないレスポンスや、期限までに再試行できない場合は、最後のレスポンスをそのまま返す）
+
+    Parameters:
+        send: 引数なしでリクエストを送信し、レスポンスを返す関数（graph_post などを呼び出す）
+        policy: 再試行の方針
+
+    Returns:
+        requests.Response: 最後の試行のレスポンス
+
+    Raises:
+        requests.RequestException: 最後の試行が接続エラー・タイムアウトの場合
+        CircuitOpenError: Graph API が障害中と判断されている場合（再試行しない）
+    """
+    deadline = policy.start()
+    attempt = 0
+    with graph_deadline(deadline):
+        while True:
+            attempt += 1
+            try:
+                response = send()
+            except Exception as e:
+                delay = policy.backoff(attempt, deadline) if is_transport_error(e) else None
+                if delay is None:
+                    raise
+                logger.warning(f"Graph API への接続に失敗したため、{delay:.1f} 秒後に再試行します: {e}")
+            else:
+                delay = policy.backoff(attempt, deadline, retry_after_seconds(response.headers)) \
+                    if is_retryable_status(response.status_code) else None
+                if delay is None:
+                    return response
+                logger.warning(f"Graph API が {response.status_code} を返したため、{delay:.1f} 秒後に再試行します")
+            time.sleep(delay)
+
+
+async def send_with_retry_async(send, policy=graph_retry_policy):
+    """
+    send_with_retry の非同期版（send はレスポンスを返すコルーチン関数）
+    再試行までの待ち時間はイベントループをブロックしない
+    """
+    deadline = policy.start()
+    attempt = 0
+    with graph_deadline(deadline):
+        while True:
+            attempt += 1
+            try:
+                response = await send()
+            except Exception as e:
+                delay = policy.backoff(attempt, deadline) if is_transport_error(e) else None
+                if delay is None:
+                    raise
+                logger.warning(f"Graph API への接続に失敗したため、{delay:.1f} 秒後に再試行します: {e}")
+            else:
+                delay = policy.backoff(attempt, deadline, retry_after_seconds(response.headers)) \
+                    if is_retryable_status(response.status_code) else None
+                if delay is None:
+                    return response
+                logger.warning(f"Graph API が {response.status_code} を返したため、{delay:.1f} 秒後に再試行します")
+            await asyncio.sleep(delay)
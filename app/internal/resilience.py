@@ -0,0 +1,226 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from app.config import (
+    GRAPH_RETRY_MAX_ATTEMPTS, GRAPH_RETRY_BASE_DELAY, GRAPH_RETRY_MAX_DELAY, GRAPH_REQUEST_DEADLINE,
+    GRAPH_BREAKER_FAILURE_THRESHOLD, GRAPH_BREAKER_RESET_SECONDS,
+    COSMOS_RETRY_MAX_ATTEMPTS, COSMOS_RETRY_BASE_DELAY, COSMOS_RETRY_MAX_DELAY, COSMOS_REQUEST_DEADLINE
+)
+
+logger = logging.getLogger(__name__)
+
+# 再試行すれば成功する可能性があるステータス（タイムアウト・スロットリング・一時的なサーバーエラー）
+# 400/401/403/404 などは再試行しても成功しないため、すぐに失敗とする
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# Cosmos DB の一時的なエラー（449: 同時書き込みによる再試行要求）
+COSMOS_RETRYABLE_STATUSES = RETRYABLE_STATUSES | {449}
+
+
+class CircuitOpenError(Exception):
+    """
+    サーキットブレーカーが開いている（連携先が障害中と判断した）ため、リクエストを送信しなかった場合のエラー
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} は障害中と判断されたため、{retry_after:.0f} 秒間リクエストを送信しません")
+        self.retry_after = retry_after
+
+
+def is_retryable_status(status_code: int | None, retryable_statuses=RETRYABLE_STATUSES) -> bool:
+    """
+    再試行すべきステータスかどうか（None はタイムアウト・接続エラーなどレスポンスが無い場合）
+    """
+    return status_code is None or status_code in retryable_statuses
+
+
+def retry_after_seconds(headers) -> float | None:
+    """
+    レスポンスヘッダーから、再試行までに待つべき秒数を取得する
+    Retry-After（秒数または HTTP 日付）と、Cosmos DB の x-ms-retry-after-ms（ミリ秒）に対応する
+
+    Returns:
+        float | None: 待つべき秒数（指定が無い、または解釈できない場合は None）
+    """
+    if not headers:
+        headers = {}
+    # requests・httpx のヘッダーは大文字・小文字を区別しないが、$batch のサブレスポンスは通常の dict のため揃える
+    headers = {key.lower(): value for key, value in headers.items()}
+    if "x-ms-retry-after-ms" in headers:
+        try:
+            return max(float(headers["x-ms-retry-after-ms"]) / 1000, 0.0)
+        except (TypeError, ValueError):
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy:
+    """
+    再試行の方針（最大試行回数・full jitter の指数バックオフ・リクエストごとの期限）
+
+    - n 回目の失敗後は 0 〜 min(max_delay, base_delay × 2^n) 秒のランダムな時間だけ待つ（full jitter）
+    - レスポンスが Retry-After を指定している場合は、その秒数だけ待つ
+    - 待った後の再試行が期限（最初の試行から deadline 秒）を過ぎる場合は、待たずに失敗とする
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, deadline: float):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def start(self) -> float:
+        """
+        最初の試行の前に呼び出し、期限（time.monotonic() の値）を返す
+        """
+        return time.monotonic() + self.deadline
+
+    def backoff(self, attempt: int, deadline: float, retry_after: float = None) -> float | None:
+        """
+        attempt 回目の試行が失敗した後に、再試行までに待つ秒数を返す
+
+        Parameters:
+            attempt: 失敗した試行の回数（1 から数える）
+            deadline: start() が返した期限
+            retry_after: レスポンスが指定した待ち時間（秒）
+
+        Returns:
+            float | None: 待つ秒数（試行回数の上限に達した、または期限までに再試行できない場合は None）
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    連携先の障害を検知して、リクエストを送信せずにすぐに失敗とするサーキットブレーカー
+
+    - closed: 通常の状態。一時的なエラー（RETRYABLE_STATUSES・接続エラー）が failure_threshold 回連続すると open にする
+    - open: reset_timeout 秒間は、リクエストを送信せずに CircuitOpenError とする
+    - half-open: reset_timeout 秒の経過後、1件だけ試しに送信し、成功すれば closed、失敗すれば再び open にする
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._rejected = 0
+        self._opened = 0
+
+    def before_request(self) -> bool:
+        """
+        リクエストの送信前に呼び出す
+
+        Returns:
+            bool: half-open の試しの送信の場合は True（結果を記録せずに終わった場合は release_probe を呼び出す）
+
+        Raises:
+            CircuitOpenError: open の間、または half-open で試しの送信を実行中の場合
+        """
+        if self._failure_threshold <= 0:
+            return False
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            remaining = self._opened_at + self._reset_timeout - time.monotonic()
+            if remaining <= 0 and not self._probing:
+                # half-open: この1件だけを試しに送信する
+                self._probing = True
+                return True
+            self._rejected += 1
+            raise CircuitOpenError(self.name, max(remaining, 0.0))
+
+    def record(self, success: bool) -> None:
+        """
+        リクエストの結果を記録する（success は、レスポンスが一時的なエラーでなかったかどうか）
+        """
+        if self._failure_threshold <= 0:
+            return
+        with self._lock:
+            if success:
+                if self._opened_at is not None:
+                    logger.info(f"{self.name} のサーキットブレーカーを閉じました")
+                self._failures = 0
+                self._opened_at = None
+                self._probing = False
+                return
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self._failure_threshold):
+                logger.warning(f"{self.name} でエラーが {self._failures} 回連続したため、サーキットブレーカーを開きました")
+                self._opened_at = time.monotonic()
+                self._opened += 1
+                self._probing = False
+
+    def release_probe(self) -> None:
+        """
+        half-open の試しの送信が、結果を記録せずに終わった場合（取り消し・タイムアウトによる中断）に呼び出す
+        失敗としては数えず、次のリクエストが試しの送信を行えるようにする
+        """
+        if self._failure_threshold <= 0:
+            return
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> dict:
+        """
+        状態・連続失敗回数・開いた回数・送信しなかったリクエストの数を返す
+        """
+        with self._lock:
+            if self._opened_at is None:
+                state = "closed"
+            elif self._probing or time.monotonic() >= self._opened_at + self._reset_timeout:
+                state = "half-open"
+            else:
+                state = "open"
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "opened": self._opened,
+                "rejected": self._rejected
+            }
+
+
+# Graph API（アクセストークンの取得を含む）の呼び出しの再試行の方針
+graph_retry_policy = RetryPolicy(
+    max_attempts=GRAPH_RETRY_MAX_ATTEMPTS,
+    base_delay=GRAPH_RETRY_BASE_DELAY,
+    max_delay=GRAPH_RETRY_MAX_DELAY,
+    deadline=GRAPH_REQUEST_DEADLINE
+)
+# Cosmos DB の呼び出しの再試行の方針
+cosmos_retry_policy = RetryPolicy(
+    max_attempts=COSMOS_RETRY_MAX_ATTEMPTS,
+    base_delay=COSMOS_RETRY_BASE_DELAY,
+    max_delay=COSMOS_RETRY_MAX_DELAY,
+    deadline=COSMOS_REQUEST_DEADLINE
+)
+
+# プロセス全体で共有する Graph API のサーキットブレーカー（すべての Graph API のリクエストで使用する）
+graph_breaker = CircuitBreaker(
+    name="Graph API",
+    failure_threshold=GRAPH_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=GRAPH_BREAKER_RESET_SECONDS
+)
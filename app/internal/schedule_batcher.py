@@ -0,0 +1,187 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+def slice_day_views(fetched: dict, requested: list) -> dict:
+    """
+    まとめて取得した日ごとの availabilityView から、呼び出し元が要求したユーザー・日の分だけを取り出す
+    """
+    return {pair: fetched[pair] for pair in requested if pair in fetched}
+
+
+class ScheduleBatcher:
+    """
+    短い時間（window 秒）のあいだに要求された空き時間の取得（ユーザー・日の組）をまとめて、1回の取得で送信する。
+    ウィンドウ内の最初の呼び出し元が、要求されたすべてのユーザー・日の和集合を取得し、各呼び出し元には要求した分だけを返す。
+    最初の呼び出し元が待つのは、同じタイムゾーンの他の呼び出し元が実行中（まだまとめに加わっていない）の間だけで、
+    他に実行中の呼び出し元が無い場合や、実行中のすべての呼び出し元がまとめに加わった場合は、すぐに送信する。
+    タイムゾーンが異なる要求はまとめない。
+    """
+
+    def __init__(self, window: float, fetch):
+        """
+        Parameters:
+            window: 要求をまとめる時間（秒、0 の場合はまとめない）
+            fetch: (ユーザー・日の組のリスト, タイムゾーン) を受け取り、(メールアドレス, 日付) → availabilityView を返す関数
+        """
+        self._window = window
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        # 実行中の呼び出し元の数、またはまとめる要求が変わったことを、待っている最初の呼び出し元に知らせる
+        self._changed = threading.Condition(self._lock)
+        # タイムゾーン → [(要求されたユーザー・日の組のリスト, 結果の Future)]
+        self._pending = {}
+        # タイムゾーン → 実行中の呼び出し元の数
+        self._in_flight = {}
+        self._batches = 0
+        self._lookups = 0
+
+    def fetch(self, requested: list, time_zone: str) -> dict:
+        """
+        ユーザー・日の組の空き時間を、同じウィンドウ内の他の要求とまとめて取得する
+
+        Parameters:
+            requested: (メールアドレス, 日付) のリスト
+            time_zone: タイムゾーン
+
+        Returns:
+            dict: (メールアドレス, 日付) → 1日分の availabilityView（要求した分のみ）
+        """
+        future = Future()
+        with self._lock:
+            self._lookups += 1
+            self._in_flight[time_zone] = self._in_flight.get(time_zone, 0) + 1
+            batch = self._pending.get(time_zone)
+            leader = batch is None
+            if leader:
+                batch = self._pending[time_zone] = []
+            batch.append((requested, future))
+            self._changed.notify_all()
+        try:
+            if leader:
+                with self._lock:
+                    # 他の呼び出し元が実行中の間だけ、最大 window 秒待つ
+                    self._changed.wait_for(lambda: self._in_flight[time_zone] <= len(batch), timeout=self._window)
+                    batch = self._pending.pop(time_zone)
+                    self._batches += 1
+                self._flush(batch, time_zone)
+            return future.result()
+        finally:
+            with self._lock:
+                self._in_flight[time_zone] -= 1
+                if not self._in_flight[time_zone]:
+                    del self._in_flight[time_zone]
+                self._changed.notify_all()
+
+    def _flush(self, batch: list, time_zone: str) -> None:
+        union = list(dict.fromkeys(pair for requested, _ in batch for pair in requested))
+        try:
+            fetched = self._fetch(union, time_zone)
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for requested, future in batch:
+            future.set_result(slice_day_views(fetched, requested))
+
+    def stats(self) -> dict:
+        """
+        取得の要求数（lookups）と、実際に送信した取得の回数（batches）などの統計情報を返す
+        """
+        with self._lock:
+            return {"lookups": self._lookups, "batches": self._batches, "pending": len(self._pending)}
+
+
+class AsyncScheduleBatcher:
+    """
+    ScheduleBatcher の非同期版（同じイベントループから呼び出す）
+    同じイベントループの反復で要求されたものはまとめ、他の呼び出し元が実行中の間だけ最大 window 秒待つ
+    まとめた取得はバックグラウンドのタスクで送信するため、呼び出し元のリクエストが取り消された場合も
+    同じウィンドウの他の呼び出し元には結果を返す
+    """
+
+    def __init__(self, window: float, fetch):
+        """
+        Parameters:
+            window: 要求をまとめる時間（秒、0 の場合はまとめない）
+            fetch: (ユーザー・日の組のリスト, タイムゾーン) を受け取り、(メールアドレス, 日付) → availabilityView を返すコルーチン関数
+        """
+        self._window = window
+        self._fetch = fetch
+        # タイムゾーン → [(要求されたユーザー・日の組のリスト, 結果の Future)]
+        self._pending = {}
+        # タイムゾーン → 実行中の呼び出し元の数
+        self._in_flight = {}
+        # 実行中の呼び出し元の数、またはまとめる要求が変わったことを、送信を待っているタスクに知らせる
+        self._changed = asyncio.Event()
+        # 実行中の送信のタスク（完了前にガベージコレクションされないように参照を保持する）
+        self._tasks = set()
+        self._batches = 0
+        self._lookups = 0
+
+    async def fetch(self, requested: list, time_zone: str) -> dict:
+        """
+        ユーザー・日の組の空き時間を、同じウィンドウ内の他の要求とまとめて非同期で取得する
+
+        Parameters:
+            requested: (メールアドレス, 日付) のリスト
+            time_zone: タイムゾーン
+
+        Returns:
+            dict: (メールアドレス, 日付) → 1日分の availabilityView（要求した分のみ）
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._lookups += 1
+        self._in_flight[time_zone] = self._in_flight.get(time_zone, 0) + 1
+        batch = self._pending.get(time_zone)
+        if batch is None:
+            batch = self._pending[time_zone] = []
+            task = asyncio.create_task(self._run(time_zone))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.append((requested, future))
+        self._changed.set()
+        try:
+            return await future
+        finally:
+            self._in_flight[time_zone] -= 1
+            if not self._in_flight[time_zone]:
+                del self._in_flight[time_zone]
+            self._changed.set()
+
+    async def _run(self, time_zone: str) -> None:
+        # 同じイベントループの反復で要求されたものはまとめる
+        await asyncio.sleep(0)
+        # 他の呼び出し元が実行中の間だけ、最大 window 秒待つ
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._window
+        while self._in_flight.get(time_zone, 0) > len(self._pending[time_zone]):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        batch = self._pending.pop(time_zone)
+        self._batches += 1
+        union = list(dict.fromkeys(pair for requested, _ in batch for pair in requested))
+        try:
+            fetched = await self._fetch(union, time_zone)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for requested, future in batch:
+            # 取り消されたリクエストの Future には結果を設定しない
+            if not future.done():
+                future.set_result(slice_day_views(fetched, requested))
+
+    def stats(self) -> dict:
+        """
+        取得の要求数（lookups）と、実際に送信した取得の回数（batches）などの統計情報を返す
+        """
+        return {"lookups": self._lookups, "batches": self._batches, "pending": len(self._pending)}
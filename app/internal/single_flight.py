@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    同じキーの処理を同時に1回だけ実行し、実行中に同じキーで呼び出された場合は、その結果（または例外）を共有する。
+    結果は呼び出し元のあいだで同じオブジェクトを共有するため、呼び出し元は結果を変更しないこと。
+    完了後の呼び出しは新たに実行する（結果を保持するキャッシュではない）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # キー → 実行中の処理の結果の Future
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key, func):
+        """
+        キーに対応する処理を実行する（実行中の場合は完了を待って結果を共有する）
+
+        Parameters:
+            key: 処理を識別するキー（ハッシュ可能な値）
+            func: 引数なしで呼び出す処理
+
+        Returns:
+            func の戻り値
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._executed += 1
+            else:
+                self._coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result, error = func(), None
+        except BaseException as e:
+            result, error = None, e
+        # 完了後の呼び出しが、完了済みの結果を共有しないように、先に登録を解除する
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+            raise error
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        """
+        実行回数・結果を共有した（実行を省略した）回数などの統計情報を返す
+        """
+        with self._lock:
+            return {"executed": self._executed, "coalesced": self._coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight の非同期版（同じイベントループから呼び出す）
+    呼び出し元のリクエストが取り消された場合も、実行中の処理は取り消さずに他の呼び出し元へ結果を返す
+    """
+
+    def __init__(self):
+        # キー → 実行中の処理のタスク
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    async def do(self, key, func):
+        """
+        キーに対応する処理を実行する（実行中の場合は完了を待って結果を共有する）
+
+        Parameters:
+            key: 処理を識別するキー（ハッシュ可能な値）
+            func: 引数なしで呼び出すコルーチン関数
+
+        Returns:
+            func の戻り値
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            async def run():
+                try:
+                    return await func()
+                finally:
+                    self._calls.pop(key, None)
+
+            task = self._calls[key] = asyncio.create_task(run())
+            # すべての呼び出し元が取り消された場合も、未取得の例外の警告を出さない
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._executed += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """
+        実行回数・結果を共有した（実行を省略した）回数などの統計情報を返す
+        """
+        return {"executed": self._executed, "coalesced": self._coalesced, "in_flight": len(self._calls)}
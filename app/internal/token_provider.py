@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+
+from msal import ConfidentialClientApplication, TokenCache
+
+from app.config import (
+    TENANT_ID, CLIENT_ID, CLIENT_SECRET,
+    GRAPH_SCOPES, GRAPH_TOKEN_REFRESH_MARGIN
+)
+from app.internal.resilience import graph_retry_policy
+
+logger = logging.getLogger(__name__)
+
+# 有効期限のこの秒数前を過ぎたトークンはリクエストで使用しない
+EXPIRY_SKEW_SECONDS = 60
+# バックグラウンド更新に失敗した場合の再試行間隔（秒）
+REFRESH_RETRY_SECONDS = 30
+# 再試行すれば成功する可能性がある MSAL のエラーコード（invalid_client などの設定の誤りは再試行しない）
+RETRYABLE_TOKEN_ERRORS = frozenset({"temporarily_unavailable", "server_error"})
+
+
+class TokenAcquisitionError(Exception):
+    """
+    MSAL がトークンを返さなかった場合のエラー
+    """
+
+    def __init__(self, error: str, description: str):
+        super().__init__(f"トークン取得失敗: {description}")
+        self.error = error
+        self.retryable = error in RETRYABLE_TOKEN_ERRORS
+
+
+class GraphTokenProvider:
+    """
+    Microsoft Graph API 用のアクセストークンをメモリ上にキャッシュし、
+    有効期限が切れる前にバックグラウンドで更新するトークンプロバイダー。
+
+    - ConfidentialClientApplication はプロセス内で1つだけ作成し、トークンキャッシュを共有する
+    - 同時に複数のリクエストがトークンを必要とした場合、取得処理は1つだけ実行し、
+      他のリクエストはその完了を待って同じトークンを使用する
+    """
+
+    def __init__(self, client_id: str, client_secret: str, authority: str,
+                 scopes: list, refresh_margin: float, retry_policy=graph_retry_policy):
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._authority = authority
+        self._scopes = scopes
+        self._refresh_margin = refresh_margin
+        self._retry_policy = retry_policy
+
+        self._app = None
+        self._condition = threading.Condition()
+        self._token = None
+        self._expires_at = 0.0
+        self._acquiring = False
+        self._refresh_timer = None
+
+    def get_token(self) -> str:
+        """
+        有効なアクセストークンを返す。
+        キャッシュ済みのトークンが有効な場合はネットワークアクセスを行わない。
+        """
+        with self._condition:
+            while True:
+                if self._is_valid():
+                    return self._token
+                if not self._acquiring:
+                    # このスレッドが取得を担当する
+                    self._acquiring = True
+                    break
+                # 他のスレッドが取得中のため完了を待つ
+                self._condition.wait()
+
+        return self._acquire_and_store()
+
+    def get_cached_token(self):
+        """
+        キャッシュ済みの有効なトークンを返す（無い場合は None）。ネットワークアクセスは行わない。
+        """
+        with self._condition:
+            return self._token if self._is_valid() else None
+
+    def start(self) -> None:
+        """
+        トークンを事前に取得し、以降の定期更新を開始する（アプリ起動時に呼び出す）
+        """
+        threading.Thread(target=self._refresh, name="graph-token-prefetch", daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        バックグラウンド更新を停止する
+        """
+        with self._condition:
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - EXPIRY_SKEW_SECONDS
+
+    def _get_app(self) -> ConfidentialClientApplication:
+        if self._app is None:
+            self._app = ConfidentialClientApplication(
+                client_id=self._client_id,
+                client_credential=self._client_secret,
+                authority=self._authority,
+                token_cache=TokenCache()
+            )
+        return self._app
+
+    def _acquire_and_store(self) -> str:
+        """
+        トークンを取得してキャッシュに保存する（呼び出し前に _acquiring を立てておくこと）
+        """
+        try:
+            token, expires_in = self._acquire()
+        except Exception:
+            with self._condition:
+                self._acquiring = False
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._token = token
+            self._expires_at = time.time() + expires_in
+            self._acquiring = False
+            self._condition.notify_all()
+            self._schedule_refresh(max(expires_in - self._refresh_margin, REFRESH_RETRY_SECONDS))
+        return token
+
+    def _acquire(self):
+        """
+        MSAL を使ってトークンを取得する
+        一時的なエラー（接続エラー・temporarily_unavailable など）は再試行の方針（full jitter の指数バックオフ・期限）に従って
+        再試行し、認証情報やスコープの誤りなど再試行しても成功しないエラーはすぐに失敗とする
+
+        Returns:
+            tuple: (アクセストークン, 残り有効秒数)
+        """
+        deadline = self._retry_policy.start()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = self._get_app().acquire_token_for_client(scopes=self._scopes)
+                if "access_token" in result:
+                    return result["access_token"], int(result.get("expires_in", 3600))
+                logger.error(f"トークン取得に失敗しました: {result.get('error_description')}")
+                raise TokenAcquisitionError(result.get("error"), result.get("error_description"))
+            except Exception as e:
+                retryable = not isinstance(e, TokenAcquisitionError) or e.retryable
+                delay = self._retry_policy.backoff(attempt, deadline) if retryable else None
+                if delay is None:
+                    logger.error(f"トークンの取得を中止しました（{attempt} 回試行）: {e}")
+                    raise
+                time.sleep(delay)
+
+    def _schedule_refresh(self, delay: float) -> None:
+        """
+        delay 秒後にバックグラウンド更新を予約する（_condition を保持した状態で呼び出す）
+        """
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+        self._refresh_timer = threading.Timer(delay, self._refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _refresh(self) -> None:
+        """
+        有効期限前にトークンを更新する。
+        更新中もキャッシュ済みのトークンが有効な間は、リクエストはそのトークンを使用する。
+        """
+        with self._condition:
+            if self._acquiring:
+                return
+            self._acquiring = True
+        try:
+            self._acquire_and_store()
+        except Exception as e:
+            logger.error(f"トークンのバックグラウンド更新に失敗しました: {e}")
+            with self._condition:
+                self._schedule_refresh(REFRESH_RETRY_SECONDS)
+
+
+# プロセス全体で共有するトークンプロバイダー
+token_provider = GraphTokenProvider(
+    client_id=CLIENT_ID,
+    client_secret=CLIENT_SECRET,
+    authority=f"https://login.microsoftonline.com/{TENANT_ID}",
+    scopes=GRAPH_SCOPES,
+    refresh_margin=GRAPH_TOKEN_REFRESH_MARGIN
+)
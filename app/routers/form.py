@@ -1,11 +1,12 @@
 import logging
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Response
 from fastapi.responses import JSONResponse
 
 from app.internal.cosmos import create_form_data, get_form_data
-from app.internal.graph_api import get_schedules, parse_availability
-from app.utils.time_utils import time_string_to_float, slot_to_time, find_common_availability
-from app.schemas import ScheduleRequest, FormData
+from app.internal.form_candidates import (
+    CANDIDATES_AGE_HEADER, candidates_age, candidates_fresh, precompute_form_candidates, refresh_in_background
+)
+from app.schemas import FormData
 
 router = APIRouter(tags=["forms"])
 logger = logging.getLogger(__name__)
@@ -16,59 +17,46 @@ def store_form_data(payload: FormData = Body(...)):
     """
     クライアントから送信されたフォームデータを Cosmos DB に保存し、一意のトークン（id）を返すエンドポイント
     payload には、users, candidates, start_time, end_time, duration_minutes などが含まれる前提
+    空き時間候補は、レスポンスを返した後にバックグラウンドで計算してフォームに保存する
     """
     try:
         token = create_form_data(payload.model_dump())
-        return JSONResponse(content={"token": token})
     except Exception as e:
         logger.error(f"フォームデータの保存に失敗しました: {e}")
         raise HTTPException(status_code=500, detail="Failed to store form data")
+    precompute_form_candidates(token)
+    return JSONResponse(content={"token": token})
 
 
 @router.get("/retrieve_form_data", response_model=FormData)
-def retrieve_form_data(token: str = Query(..., description="保存済みフォームデータのトークン")):
+def retrieve_form_data(
+    response: Response,
+    token: str = Query(..., description="保存済みフォームデータのトークン")
+):
     """
     指定されたトークンから Cosmos DB に保存されたフォームデータ（JSON）を復元して返すエンドポイント。
-    また、面接担当者の最新の空き時間も取得して返します。
+    未確定のフォームは、保存済みの空き時間候補をすぐに返します。計算から FORM_CANDIDATES_MAX_AGE 秒を過ぎている場合は、
+    バックグラウンドで面接担当者の最新の空き時間から計算し直して保存します（stale-while-revalidate）。
+    返した候補の計算からの経過時間（秒）は X-Candidates-Age ヘッダーで返します。
     """
     try:
         item = get_form_data(token)
-        
-        # フォームが未確定の場合のみ、最新の空き時間を取得
-        if not item.get("isConfirmed", False):           
-            try:
-                # フォームデータから ScheduleRequest を作成
-                schedule_request = ScheduleRequest(
-                    start_date=item["start_date"],  
-                    end_date=item["end_date"], 
-                    start_time=item["start_time"],
-                    end_time=item["end_time"],
-                    selected_days=item["selected_days"],
-                    duration_minutes=item["duration_minutes"],
-                    users=item["users"],
-                    time_zone="Tokyo Standard Time"       
-                )                
 
-                # 最新の空き時間を取得
-                schedule_info = get_schedules(schedule_request)
-                start_hour = time_string_to_float(schedule_request.start_time)
-                end_hour = time_string_to_float(schedule_request.end_time)
-                free_slots_list = parse_availability(schedule_info, start_hour, end_hour)
-                common_slots = find_common_availability(free_slots_list, schedule_request.duration_minutes)
-                common_times = slot_to_time(schedule_request.start_date, common_slots)
-                
-                # datetime オブジェクトを文字列に変換
-                formatted_candidates = []
-                for start_dt, end_dt in common_times:
-                    formatted_candidates.append([
-                        start_dt.strftime("%Y-%m-%dT%H:%M:%S"),
-                        end_dt.strftime("%Y-%m-%dT%H:%M:%S")
-                    ])
-                
-                # フォームデータに最新の空き時間を追加
-                item["candidates"] = formatted_candidates
-            except Exception as e:
-                logger.error(f"空き時間の取得に失敗しました: {e}")
+        # フォームが未確定の場合のみ、空き時間候補を返す
+        if not item.get("isConfirmed", False):
+            age = candidates_age(item)
+            if age is None:
+                # 一度も計算されていない場合は、計算（保存直後の事前計算を実行中の場合はその計算）の完了を待つ
+                try:
+                    item["candidates"] = refresh_in_background(token, item).result()
+                    age = 0.0
+                except Exception as e:
+                    logger.error(f"空き時間の取得に失敗しました: {e}")
+            elif not candidates_fresh(item):
+                # 古い候補をそのまま返し、再計算はバックグラウンドで行う（同じフォームの再計算は1回だけ実行する）
+                refresh_in_background(token, item)
+            if age is not None:
+                response.headers[CANDIDATES_AGE_HEADER] = str(int(age))
 
         return FormData(**item)
     except Exception as e:
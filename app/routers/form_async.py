@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException, Query, Body, Response
+from fastapi.responses import JSONResponse
+
+from app.internal.cosmos_async import create_form_data, get_form_data
+from app.internal.form_candidates import CANDIDATES_AGE_HEADER, candidates_age, candidates_fresh
+from app.internal.form_candidates_async import precompute_form_candidates, refresh_in_background
+from app.schemas import FormData
+
+router = APIRouter(tags=["forms"])
+logger = logging.getLogger(__name__)
+
+
+@router.post("/store_form_data", response_model=dict)
+async def store_form_data(payload: FormData = Body(...)):
+    """
+    フォームデータを Cosmos DB に保存し、一意のトークン（id）を返すエンドポイント（非同期版）
+    """
+    try:
+        token = await create_form_data(payload.model_dump())
+    except Exception as e:
+        logger.error(f"フォームデータの保存に失敗しました: {e}")
+        raise HTTPException(status_code=500, detail="Failed to store form data")
+    precompute_form_candidates(token)
+    return JSONResponse(content={"token": token})
+
+
+@router.get("/retrieve_form_data", response_model=FormData)
+async def retrieve_form_data(
+    response: Response,
+    token: str = Query(..., description="保存済みフォームデータのトークン")
+):
+    """
+    保存されたフォームデータと空き時間候補を返すエンドポイント（非同期版）
+    """
+    try:
+        item = await get_form_data(token)
+
+        # フォームが未確定の場合のみ、空き時間候補を返す
+        if not item.get("isConfirmed", False):
+            age = candidates_age(item)
+            if age is None:
+                # 一度も計算されていない場合は、計算（保存直後の事前計算を実行中の場合はその計算）の完了を待つ
+                try:
+                    item["candidates"] = await asyncio.shield(refresh_in_background(token, item))
+                    age = 0.0
+                except Exception as e:
+                    logger.error(f"空き時間の取得に失敗しました: {e}")
+            elif not candidates_fresh(item):
+                # 古い候補をそのまま返し、再計算はバックグラウンドで行う（同じフォームの再計算は1回だけ実行する）
+                refresh_in_background(token, item)
+            if age is not None:
+                response.headers[CANDIDATES_AGE_HEADER] = str(int(age))
+
+        return FormData(**item)
+    except Exception as e:
+        logger.error(f"Token が見つかりません: {e}")
+        raise HTTPException(status_code=404, detail="Token not found")
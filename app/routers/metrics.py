@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+
+from app.config import ASYNC_MODE
+from app.internal.availability_cache import availability_cache
+from app.internal.form_cache import form_cache
+from app.internal.resilience import graph_breaker
+
+if ASYNC_MODE:
+    from app.internal.graph_api_async import schedule_batcher, schedule_flight
+else:
+    from app.internal.graph_api import schedule_batcher, schedule_flight
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics/cache", response_model=dict)
+def get_cache_metrics():
+    """
+    メモリ上のキャッシュのヒット数・ミス数や、getSchedule の共有回数、Graph API のサーキットブレーカーの状態などの統計情報を返すエンドポイント
+    """
+    return {
+        "availability": availability_cache.stats(),
+        "forms": form_cache.stats(),
+        # 空き時間の取得の実行回数（executed）と、実行中の同じ取得の結果を共有して実行を省略した回数（coalesced）
+        "schedule_requests": schedule_flight.stats(),
+        # まとめる前の取得の要求数（lookups）と、まとめて送信した回数（batches）
+        "schedule_batches": schedule_batcher.stats(),
+        # Graph API のサーキットブレーカーの状態と、障害中として送信しなかったリクエストの数（rejected）
+        "graph_breaker": graph_breaker.stats()
+    }
@@ -1,17 +1,27 @@
 import logging
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Body
-from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
-import urllib.parse
-import requests
+from datetime import date
 
-from app.config import FRONT_URL, BACKEND_URL
-from app.dependencies import container
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Body, Request
+from fastapi.responses import RedirectResponse, HTMLResponse, StreamingResponse
+
+from app.config import FRONT_URL, MAX_AVAILABILITY_LIMIT, AVAILABILITY_STREAM_BLOCK_DAYS
 from app.dependencies import get_access_token
-from app.internal.cosmos import get_form_data, update_form_with_events, finalize_form
-from app.internal.graph_api import get_schedules, parse_availability, create_event_payload, register_event_with_retry
+from app.internal.availability import (
+    compute_common_times, find_candidate_page, iter_common_slots, split_schedule_request
+)
+from app.internal.cosmos import get_form_data, finalize_form, reset_form, FormConflictError
+from app.internal.graph_api import (
+    get_schedules, create_event_payload, register_events_batch, delete_events_batch, rollback_registered_events,
+    is_supported_time_zone
+)
 from app.internal.mail import send_confirmation_emails, send_no_available_schedule_emails
-from app.utils.time_utils import time_string_to_float, slot_to_time, find_common_availability, find_common_availability_participants
+from app.internal.resilience import CircuitOpenError
 from app.utils.formatters import parse_candidate
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, wants_ndjson, error_line
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.responses import availability_response
+from app.utils.slots import SlotRuns
+from app.utils.pages import render_reschedule_confirm_page, render_reschedule_done_page, render_reschedule_partial_page
 from app.schemas import (
     ScheduleRequest,
     AppointmentRequest,
@@ -24,55 +34,161 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("/get_availability", response_model=AvailabilityResponse)
-def get_availability(schedule_req: ScheduleRequest):
+def get_availability(
+    request: Request,
+    schedule_req: ScheduleRequest,
+    limit: int | None = Query(
+        None,
+        ge=1,
+        le=MAX_AVAILABILITY_LIMIT,
+        description="返す候補の最大件数（省略時はすべての候補を返す）"
+    ),
+    cursor: str | None = Query(
+        None,
+        description="前のページの next_cursor（続きの候補を取得する場合）"
+    ),
+    stream: bool = Query(
+        False,
+        description="候補を NDJSON（1行に1件の [開始日時, 終了日時]）で日ごとに順次返す（Accept: application/x-ndjson でも指定可）"
+    )
+):
     """
     指定されたユーザリストと日付・時間帯における空き時間候補を返す
     """
+    check_time_zone(schedule_req)
+    check_date_range(schedule_req)
+    if wants_ndjson(request.headers.get("accept"), stream):
+        if cursor is not None:
+            raise HTTPException(status_code=400, detail="cursor is not supported with streaming")
+        return stream_availability(schedule_req, limit)
+
+    after_minute = parse_cursor(schedule_req, cursor)
     try:
-        schedule_info = get_schedules(schedule_req)
-        start_hour = time_string_to_float(schedule_req.start_time)
-        end_hour = time_string_to_float(schedule_req.end_time)
-        free_slots_list = parse_availability(
-            schedule_info, 
-            start_hour,
-            end_hour
-        )
-        if len(schedule_req.users) == schedule_req.required_participants:
-            # required_participantsが全員の場合は、全員の空き時間を返す
-            common_slots = find_common_availability(free_slots_list, schedule_req.duration_minutes)
-            # スロットを時間形式に変換
-            datetime_tuples = slot_to_time(schedule_req.start_date, common_slots)
-            
-            # datetimeオブジェクトを文字列に変換
-            common_times = [
-                [dt1.strftime("%Y-%m-%dT%H:%M:%S"), dt2.strftime("%Y-%m-%dT%H:%M:%S")]
-                for dt1, dt2 in datetime_tuples
-            ]
-        else:
-            # required_participantsに基づいて共通の空き時間を計算
-            common_slots_users = find_common_availability_participants(
-                free_slots_list, 
-                schedule_req.duration_minutes,
-                schedule_req.required_participants,
-                schedule_req.users
-            )
-            import ipdb; ipdb.set_trace()
-            # スロット（文字列）とその時間に空いているユーザ(list)を時間形式に変換
-            for common_slots in common_slots_users:
-                datetime_tuples.append(slot_to_time(schedule_req.start_date, common_slots))
-            # datetimeオブジェクトを文字列に変換
-            common_times = [
-                [dt1.strftime("%Y-%m-%dT%H:%M:%S"), dt2.strftime("%Y-%m-%dT%H:%M:%S")]
-                for dt1, dt2 in datetime_tuples
-            ]
-        
-        return AvailabilityResponse(
-            common_availability=common_times
-        )
+        schedule_info = get_schedules(schedule_req, after_minute)
+        return availability_page(schedule_req, schedule_info, limit, after_minute)
+    except CircuitOpenError as e:
+        raise schedule_unavailable(e)
+    except Exception as e:
+        logger.error(f"候補日の取得に失敗しました: {e}")
+        raise HTTPException(status_code=500, detail="候補日の取得に失敗しました")
+
+
+def check_time_zone(schedule_req: ScheduleRequest) -> None:
+    """
+    日ごとの空き時間に分割できない（夏時間のある）タイムゾーンを拒否する
+
+    Raises:
+        HTTPException: 対応していないタイムゾーンの場合（400）
+    """
+    if not is_supported_time_zone(schedule_req.time_zone):
+        logger.warning(f"対応していないタイムゾーンが指定されました: {schedule_req.time_zone}")
+        raise HTTPException(status_code=400, detail="Unsupported time_zone")
+
+
+def check_date_range(schedule_req: ScheduleRequest) -> None:
+    """
+    取得期間（start_date〜end_date）が正しい日付の範囲かどうかを検証する
+
+    Raises:
+        HTTPException: 日付の形式が正しくない場合、または終了日が開始日より前の場合（400）
+    """
+    try:
+        start = date.fromisoformat(schedule_req.start_date)
+        end = date.fromisoformat(schedule_req.end_date)
+    except ValueError as e:
+        logger.warning(f"不正な取得期間が指定されました: {e}")
+        raise HTTPException(status_code=400, detail="Invalid date range")
+    if end < start:
+        logger.warning(f"終了日が開始日より前です: {schedule_req.start_date}〜{schedule_req.end_date}")
+        raise HTTPException(status_code=400, detail="Invalid date range")
+
+
+def parse_cursor(schedule_req: ScheduleRequest, cursor: str | None) -> int | None:
+    """
+    前のページの next_cursor から、返却済みの最後の候補の開始分を復元する（cursor が無い場合は None）
+
+    Raises:
+        HTTPException: 不正なカーソル、または別の条件のリクエストで発行されたカーソルの場合（400）
+    """
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(schedule_req, cursor)
+    except ValueError as e:
+        logger.warning(f"不正なカーソルが指定されました: {e}")
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def availability_page(schedule_req: ScheduleRequest, schedule_info: dict, limit: int | None, after_minute: int | None):
+    """
+    取得した空き時間から空き時間候補を求め、レスポンスを作成する（I/O を行わない、CPU のみの処理）
+    limit・カーソルの指定が無い場合はすべての候補を返し、指定された場合は limit 件に達した時点で以降の日の評価をやめ、
+    続きがある場合はカーソルを返す
+    """
+    if limit is None and after_minute is None:
+        return availability_response(compute_common_times(schedule_req, schedule_info))
+
+    page, has_more = find_candidate_page(schedule_req, schedule_info, limit or MAX_AVAILABILITY_LIMIT, after_minute)
+    return availability_response(
+        page.to_iso_pairs(),
+        encode_cursor(schedule_req, int(page.starts[-1])) if has_more else None
+    )
+
+
+def schedule_unavailable(error: CircuitOpenError) -> HTTPException:
+    """
+    Graph API の障害中（サーキットブレーカーが開いている）に返すエラー（503、再試行までの秒数を Retry-After で返す）
+    """
+    logger.warning(f"候補日の取得を中止しました: {error}")
+    return HTTPException(status_code=503, detail="候補日の取得に失敗しました",
+                         headers={"Retry-After": str(max(int(error.retry_after), 1))})
+
+
+def take_slots(slots: SlotRuns, remaining: int | None) -> tuple:
+    """
+    ストリーミングで返す候補を、残りの件数までに切り詰める
+
+    Returns:
+        tuple: (返す候補, 残りの件数（上限が無い場合は None）)
+    """
+    if remaining is None:
+        return slots, None
+    slots = slots[:remaining]
+    return slots, remaining - len(slots)
+
+
+def stream_availability(schedule_req: ScheduleRequest, limit: int | None) -> StreamingResponse:
+    """
+    空き時間候補を NDJSON で日ごとに順次返す
+    取得期間を AVAILABILITY_STREAM_BLOCK_DAYS 日ごとに分けて取得・評価するため、
+    最初の候補を返すまでの時間とメモリ使用量は取得期間の長さに比例しない
+    """
+    # 最初の期間は応答を開始する前に取得し、失敗した場合はステータスコードで返す
+    try:
+        blocks = split_schedule_request(schedule_req, AVAILABILITY_STREAM_BLOCK_DAYS)
+        first_info = get_schedules(blocks[0])
+    except CircuitOpenError as e:
+        raise schedule_unavailable(e)
     except Exception as e:
         logger.error(f"候補日の取得に失敗しました: {e}")
         raise HTTPException(status_code=500, detail="候補日の取得に失敗しました")
 
+    def generate():
+        remaining = limit
+        try:
+            for i, block in enumerate(blocks):
+                schedule_info = first_info if i == 0 else get_schedules(block)
+                for slots in iter_common_slots(block, schedule_info, chunk_days=1):
+                    slots, remaining = take_slots(slots, remaining)
+                    yield slots.to_ndjson()
+                    if remaining == 0:
+                        return
+        except Exception as e:
+            logger.error(f"候補日のストリーミングに失敗しました: {e}")
+            yield error_line("候補日の取得に失敗しました")
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
 
 @router.post("/appointment", response_model=AppointmentResponse)
 def create_appointment(
@@ -86,7 +202,7 @@ def create_appointment(
     """
     try:
         # candidate が None または "none" の場合は、予定登録せずその旨返す
-        if appointment_req.candidate is None or appointment_req.candidate.lower() == "none":
+        if is_no_candidate(appointment_req):
             # 担当者にメールを送信
             access_token = get_access_token()
             background_tasks.add_task(
@@ -94,13 +210,7 @@ def create_appointment(
                 access_token,
                 appointment_req
             )
-
-            return AppointmentResponse(
-                message="候補として '可能な日程がない' が選択されました。予定は登録されません。",
-                subjects=[],
-                meeting_urls=[],
-                users=appointment_req.users
-            )
+            return no_candidate_response(appointment_req)
 
         # 候補文字列をパースして開始・終了時刻を取得
         start_str, end_str, selected_candidate = parse_candidate(appointment_req.candidate)
@@ -110,47 +220,30 @@ def create_appointment(
 
         # アクセストークン取得
         access_token = get_access_token()
+        headers = graph_headers(access_token)
 
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json"
-        }
-
-        created_events = []
-        event_ids = {}  # ユーザー毎のイベントIDを格納する辞書
-
-        # 各面接担当者の予定表にイベントを登録
-        for user_email in appointment_req.users:
-            event_resp = register_event_with_retry(user_email, event, headers)
-            created_events.append(event_resp)
-            # イベント登録に成功した場合、Graph API のレスポンスからイベントIDを取得
-            event_id = event_resp.get("id")
-            if event_id:
-                event_ids[user_email] = event_id
+        # 各面接担当者の予定表にイベントを $batch でまとめて登録
+        registered_events = register_events_batch(appointment_req.users, event, headers)
+        # イベント登録に成功した場合、Graph API のレスポンスからイベントIDを取得
+        event_ids = registered_event_ids(registered_events)
 
-        # イベントIDをフォームデータに保存しておく（後でキャンセル時に利用）
-        update_form_with_events(appointment_req.token, event_ids)
-
-        # Outlook への登録完了後、他フォームから候補日の削除およびフォームの確定処理を実行
-        finalize_form(appointment_req.token, selected_candidate)
-
-        # 作成された各イベントから件名とオンライン会議のURLを抽出
-        subjects = [evt.get("subject") for evt in created_events]
-        meeting_urls = [evt.get("onlineMeeting", {}).get("joinUrl") for evt in created_events]
+        # Outlook への登録完了後、フォームの確定（イベントIDは後でキャンセル時に利用）および他フォームから候補日の削除を実行
+        finalize_form(appointment_req.token, selected_candidate, event_ids)
 
+        result = appointment_response(appointment_req, registered_events)
         # 非重要な処理は非同期で行う
         background_tasks.add_task(
-            send_confirmation_emails, 
-            access_token, 
-            appointment_req, 
-            meeting_urls
-        )
-        return AppointmentResponse(
-            message="予定を登録しました。確認メールは別途送信されます。",
-            subjects=subjects,
-            meeting_urls=meeting_urls,
-            users=appointment_req.users
+            send_confirmation_emails,
+            access_token,
+            appointment_req,
+            result.meeting_urls
         )
+        return result
+    except FormConflictError:
+        # 同じフォームが同時に予約された場合は、登録した予定を取り消す
+        # （取り消しに失敗した場合も、予約の競合として 409 を返す）
+        rollback_registered_events(event_ids, headers)
+        raise reservation_conflict()
     except Exception as e:
         # 詳細なエラーログ
         error_detail = str(e)
@@ -163,6 +256,69 @@ def create_appointment(
         )
 
 
+def is_no_candidate(appointment_req: AppointmentRequest) -> bool:
+    """
+    候補として「可能な日程がない」（candidate が null または "none"）が選択されたかどうか
+    """
+    return appointment_req.candidate is None or appointment_req.candidate.lower() == "none"
+
+
+def no_candidate_response(appointment_req: AppointmentRequest) -> AppointmentResponse:
+    """
+    「可能な日程がない」が選択された場合のレスポンス（予定は登録しない）
+    """
+    return AppointmentResponse(
+        message="候補として '可能な日程がない' が選択されました。予定は登録されません。",
+        subjects=[],
+        meeting_urls=[],
+        users=appointment_req.users
+    )
+
+
+def graph_headers(access_token: str) -> dict:
+    """
+    Graph API の $batch に使用するリクエストヘッダー
+    """
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+
+
+def registered_event_ids(registered_events: dict) -> dict:
+    """
+    登録したイベントから、ユーザーごとのイベントID（キャンセル時に使用する）を取り出す
+
+    Returns:
+        dict: ユーザーメールアドレス → イベントID
+    """
+    return {
+        user_email: evt["id"]
+        for user_email, evt in registered_events.items()
+        if evt.get("id")
+    }
+
+
+def appointment_response(appointment_req: AppointmentRequest, registered_events: dict) -> AppointmentResponse:
+    """
+    登録した各イベントの件名とオンライン会議のURL（面接担当者の順）からレスポンスを作成する
+    """
+    created_events = [registered_events[user_email] for user_email in appointment_req.users]
+    return AppointmentResponse(
+        message="予定を登録しました。確認メールは別途送信されます。",
+        subjects=[evt.get("subject") for evt in created_events],
+        meeting_urls=[evt.get("onlineMeeting", {}).get("joinUrl") for evt in created_events],
+        users=appointment_req.users
+    )
+
+
+def reservation_conflict() -> HTTPException:
+    """
+    同じフォームが同時に予約された場合のエラー（409）
+    """
+    return HTTPException(status_code=409, detail="このフォームは既に予約されています。")
+
+
 @router.get("/reschedule")
 def reschedule(
     token: str = Query(
@@ -183,49 +339,16 @@ def reschedule(
     
     ※ confirm が False の場合、確認画面を表示します。
     """
-    # フォームデータを取得
+    # フォームデータを取得（予定を削除する場合は、キャッシュ済みのフォームが最新であることを ETag で確認する）
     try:
-        form = get_form_data(token)
+        form = get_form_data(token, revalidate=confirm)
     except Exception as e:
         logger.error(f"Token が見つかりません: {e}")
         raise HTTPException(status_code=404, detail="Token not found")
 
-    # イベントが存在しなければキャンセル処理は不要 → そのままフォームへ遷移
-    if "event_ids" not in form:
-        redirect_url = f"{FRONT_URL}/appointment?token={token}"
-        return RedirectResponse(url=redirect_url, status_code=302)
-
-    # 未確認の場合、確認画面を表示する
-    if not confirm:
-        confirm_url = f"{BACKEND_URL}/reschedule?token={token}&confirm=true"
-        cancel_url = f"{FRONT_URL}/appointment?token={token}"
-        html_content = f"""
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>日程再調整の確認</title>
-            <script src="https://cdn.tailwindcss.com"></script>
-        </head>
-        <body class="bg-gray-100 flex items-center justify-center min-h-screen">
-            <div class="bg-white shadow-xl rounded-lg p-12 max-w-xl text-center">
-            <h1 class="text-3xl font-bold mb-6">日程再調整の確認</h1>
-            <p class="mb-8 text-lg">
-                本当に日程の再調整を行いますか？<br>
-                ※この操作を実行すると、既存の予定が削除されます。
-            </p>
-            <div class="flex justify-center space-x-6">
-                <a href="{confirm_url}" class="inline-block bg-red-500 hover:bg-red-700 text-white font-bold py-3 px-6 rounded text-xl">
-                    再調整する
-                </a>
-                <a href="{cancel_url}" class="inline-block bg-gray-500 hover:bg-gray-700 text-white font-bold py-3 px-6 rounded text-xl">
-                    キャンセル
-                </a>
-            </div>
-            </div>
-        </body>
-        </html>
-        """
-        return HTMLResponse(content=html_content, status_code=200)
+    page = reschedule_precheck_page(token, form, confirm)
+    if page is not None:
+        return page
 
     # 確認済みの場合、処理を実行する
     try:
@@ -234,51 +357,59 @@ def reschedule(
         logger.error(f"トークン取得に失敗しました: {e}")
         raise HTTPException(status_code=500, detail="認証トークンの取得に失敗しました。")
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
+    event_ids = form["event_ids"]
+    # 各面接担当者のカレンダーから該当イベントを $batch でまとめて削除する（担当者ごとに結果を集計）
+    outcomes = delete_events_batch(event_ids, graph_headers(access_token))
+    remaining_event_ids = undeleted_event_ids(event_ids, outcomes)
+
+    # 削除できた予定の分だけフォームを更新する
+    # すべて削除できた場合は、isConfirmed を False に戻し、event_ids を削除してフォームを再利用可能にする
+    try:
+        reset_form(form, remaining_event_ids)
+    except FormConflictError as e:
+        raise reschedule_conflict(e)
+    return reschedule_result_page(token, outcomes, remaining_event_ids)
+
+
+def reschedule_precheck_page(token: str, form: dict, confirm: bool):
+    """
+    予定を削除する前に返すページ（削除する場合は None）
+    - イベントが存在しなければキャンセル処理は不要のため、そのままフォームへ遷移する
+    - 未確認の場合は、確認画面を表示する
+    """
+    if "event_ids" not in form:
+        redirect_url = f"{FRONT_URL}/appointment?token={token}"
+        return RedirectResponse(url=redirect_url, status_code=302)
+    if not confirm:
+        return HTMLResponse(content=render_reschedule_confirm_page(token), status_code=200)
+    return None
+
+
+def undeleted_event_ids(event_ids: dict, outcomes: dict) -> dict:
+    """
+    削除できなかった担当者のイベントID（ユーザーメールアドレス → イベントID）を返す
+    """
+    return {
+        user_email: event_id
+        for user_email, event_id in event_ids.items()
+        if not outcomes[user_email]["deleted"]
     }
 
-    event_ids = form["event_ids"]
-    # 各面接担当者のカレンダーから該当イベントを削除する
-    for user_email, event_id in event_ids.items():
-        encoded_email = urllib.parse.quote(user_email)
-        encoded_event_id = urllib.parse.quote(event_id, safe='')
-        delete_url = f"https://graph.microsoft.com/v1.0/users/{encoded_email}/calendar/events/{encoded_event_id}"
-        response = requests.delete(delete_url, headers=headers)
-        if response.status_code >= 400:
-            logger.error(f"予定削除エラー for {user_email}: {response.status_code} {response.text}")
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"ユーザー {user_email} の予定削除エラー: {response.text}"
-            )
 
-    # フォームを再利用可能にするため、isConfirmed を False に戻し、event_ids を削除する
-    form["isConfirmed"] = False
-    form.pop("event_ids", None)
-    container.replace_item(item=form["id"], body=form)
-
-    # 処理完了後、再調整用のリンクをボタンにして表示する
-    link = f"{FRONT_URL}/appointment?token={token}"
-    html_content = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>再調整完了</title>
-        <script src="https://cdn.tailwindcss.com"></script>
-    </head>
-    <body class="bg-gray-100 flex items-center justify-center min-h-screen">
-        <div class="bg-white shadow-xl rounded-lg p-12 max-w-xl text-center">
-        <h1 class="text-3xl font-bold mb-6">キャンセル処理完了</h1>
-        <p class="mb-8 text-lg">
-            既存の予定は削除されました。<br>
-            以下のボタンから新たに日程をご入力ください。
-        </p>
-        <a href="{link}" class="inline-block bg-blue-500 hover:bg-blue-700 text-white font-bold py-3 px-6 rounded text-xl">
-            日程再調整画面へ
-        </a>
-        </div>
-    </body>
-    </html>
-    """
-    return HTMLResponse(content=html_content, status_code=200)
+def reschedule_conflict(error: FormConflictError) -> HTTPException:
+    """
+    予定の削除後のフォームの更新が、他の操作と競合した場合のエラー（409）
+    """
+    logger.warning(f"フォームの更新が競合しました: {error}")
+    return HTTPException(status_code=409, detail="フォームが他の操作によって更新されました。再度お試しください。")
+
+
+def reschedule_result_page(token: str, outcomes: dict, remaining_event_ids: dict) -> HTMLResponse:
+    """
+    予定の削除結果のページ
+    削除できなかった担当者がいる場合は、担当者ごとの結果と再試行用のリンクを表示し、
+    すべて削除できた場合は、再調整用のリンクをボタンにして表示する
+    """
+    if remaining_event_ids:
+        return HTMLResponse(content=render_reschedule_partial_page(token, outcomes), status_code=502)
+    return HTMLResponse(content=render_reschedule_done_page(token), status_code=200)
@@ -0,0 +1,221 @@
+import logging
+
+import anyio.to_thread
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Body, Request
+from fastapi.responses import StreamingResponse
+
+from app.config import MAX_AVAILABILITY_LIMIT, AVAILABILITY_STREAM_BLOCK_DAYS
+from app.dependencies import get_access_token_async
+from app.internal.availability import iter_common_slots, split_schedule_request
+from app.internal.cosmos_async import get_form_data, finalize_form, reset_form, FormConflictError
+from app.internal.graph_api import create_event_payload
+from app.internal.graph_api_async import (
+    get_schedules, register_events_batch, delete_events_batch, rollback_registered_events
+)
+from app.internal.mail import send_confirmation_emails, send_no_available_schedule_emails
+from app.internal.resilience import CircuitOpenError
+from app.routers.schedule import (
+    check_time_zone, check_date_range, parse_cursor, availability_page, schedule_unavailable, take_slots,
+    is_no_candidate, no_candidate_response, graph_headers, registered_event_ids, appointment_response,
+    reservation_conflict,
+    reschedule_precheck_page, undeleted_event_ids, reschedule_conflict, reschedule_result_page
+)
+from app.utils.formatters import parse_candidate
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, wants_ndjson, error_line
+from app.schemas import (
+    ScheduleRequest,
+    AppointmentRequest,
+    AppointmentResponse,
+    AvailabilityResponse
+)
+
+router = APIRouter(tags=["schedule"])
+logger = logging.getLogger(__name__)
+
+
+@router.post("/get_availability", response_model=AvailabilityResponse)
+async def get_availability(
+    request: Request,
+    schedule_req: ScheduleRequest,
+    limit: int | None = Query(
+        None,
+        ge=1,
+        le=MAX_AVAILABILITY_LIMIT,
+        description="返す候補の最大件数（省略時はすべての候補を返す）"
+    ),
+    cursor: str | None = Query(
+        None,
+        description="前のページの next_cursor（続きの候補を取得する場合）"
+    ),
+    stream: bool = Query(
+        False,
+        description="候補を NDJSON（1行に1件の [開始日時, 終了日時]）で日ごとに順次返す（Accept: application/x-ndjson でも指定可）"
+    )
+):
+    """
+    指定されたユーザリストと日付・時間帯における空き時間候補を返す（非同期版）
+    候補の計算（NumPy・ビットマップの CPU 処理）はワーカースレッドで行い、イベントループを止めない
+    """
+    check_time_zone(schedule_req)
+    check_date_range(schedule_req)
+    if wants_ndjson(request.headers.get("accept"), stream):
+        if cursor is not None:
+            raise HTTPException(status_code=400, detail="cursor is not supported with streaming")
+        return await stream_availability(schedule_req, limit)
+
+    after_minute = parse_cursor(schedule_req, cursor)
+    try:
+        schedule_info = await get_schedules(schedule_req, after_minute)
+        return await anyio.to_thread.run_sync(availability_page, schedule_req, schedule_info, limit, after_minute)
+    except CircuitOpenError as e:
+        raise schedule_unavailable(e)
+    except Exception as e:
+        logger.error(f"候補日の取得に失敗しました: {e}")
+        raise HTTPException(status_code=500, detail="候補日の取得に失敗しました")
+
+
+async def stream_availability(schedule_req: ScheduleRequest, limit: int | None) -> StreamingResponse:
+    """
+    空き時間候補を NDJSON で日ごとに順次返す（非同期版）
+    1日分の候補の評価ごとにワーカースレッドで行うため、期間が長くてもイベントループを止めない
+    """
+    # 最初の期間は応答を開始する前に取得し、失敗した場合はステータスコードで返す
+    try:
+        blocks = split_schedule_request(schedule_req, AVAILABILITY_STREAM_BLOCK_DAYS)
+        first_info = await get_schedules(blocks[0])
+    except CircuitOpenError as e:
+        raise schedule_unavailable(e)
+    except Exception as e:
+        logger.error(f"候補日の取得に失敗しました: {e}")
+        raise HTTPException(status_code=500, detail="候補日の取得に失敗しました")
+
+    async def generate():
+        remaining = limit
+        try:
+            for i, block in enumerate(blocks):
+                schedule_info = first_info if i == 0 else await get_schedules(block)
+                days = iter_common_slots(block, schedule_info, chunk_days=1)
+                while (slots := await anyio.to_thread.run_sync(next, days, None)) is not None:
+                    slots, remaining = take_slots(slots, remaining)
+                    yield slots.to_ndjson()
+                    if remaining == 0:
+                        return
+        except Exception as e:
+            logger.error(f"候補日のストリーミングに失敗しました: {e}")
+            yield error_line("候補日の取得に失敗しました")
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/appointment", response_model=AppointmentResponse)
+async def create_appointment(
+    background_tasks: BackgroundTasks,
+    appointment_req: AppointmentRequest = Body(...)
+):
+    """
+    面接担当者の予定表に Outlook の予定を登録する（非同期版）。
+    仕様は同期版の create_appointment と同じ。
+    """
+    try:
+        # candidate が None または "none" の場合は、予定登録せずその旨返す
+        if is_no_candidate(appointment_req):
+            # 担当者にメールを送信
+            access_token = await get_access_token_async()
+            background_tasks.add_task(
+                send_no_available_schedule_emails,
+                access_token,
+                appointment_req
+            )
+            return no_candidate_response(appointment_req)
+
+        # 候補文字列をパースして開始・終了時刻を取得
+        start_str, end_str, selected_candidate = parse_candidate(appointment_req.candidate)
+
+        # Outlook に登録するイベント情報の構築
+        event = create_event_payload(appointment_req, start_str, end_str)
+
+        # アクセストークン取得
+        access_token = await get_access_token_async()
+        headers = graph_headers(access_token)
+
+        # 各面接担当者の予定表にイベントを $batch でまとめて登録
+        registered_events = await register_events_batch(appointment_req.users, event, headers)
+        # イベント登録に成功した場合、Graph API のレスポンスからイベントIDを取得
+        event_ids = registered_event_ids(registered_events)
+
+        # Outlook への登録完了後、フォームの確定（イベントIDは後でキャンセル時に利用）および他フォームから候補日の削除を実行
+        await finalize_form(appointment_req.token, selected_candidate, event_ids)
+
+        result = appointment_response(appointment_req, registered_events)
+        # 非重要な処理はレスポンス返却後に行う
+        background_tasks.add_task(
+            send_confirmation_emails,
+            access_token,
+            appointment_req,
+            result.meeting_urls
+        )
+        return result
+    except FormConflictError:
+        # 同じフォームが同時に予約された場合は、登録した予定を取り消す
+        # （取り消しに失敗した場合も、予約の競合として 409 を返す）
+        await rollback_registered_events(event_ids, headers)
+        raise reservation_conflict()
+    except Exception as e:
+        # 詳細なエラーログ
+        error_detail = str(e)
+        logger.error(f"予定作成エラー: {error_detail}", exc_info=True)
+
+        # クライアントに詳細なエラーメッセージを返す
+        raise HTTPException(
+            status_code=500,
+            detail=f"予定作成中にエラーが発生しました: {error_detail}"
+        )
+
+
+@router.get("/reschedule")
+async def reschedule(
+    token: str = Query(
+        ...,
+        description="再調整用のフォームのトークン",
+        example="sample-token-123"
+    ),
+    confirm: bool = Query(
+        False,
+        description="キャンセル処理実行の確認フラグ",
+        example=False
+    )
+):
+    """
+    面接担当者のカレンダーから作成済みのイベントを削除し、フォームを再利用可能にする（非同期版）。
+    仕様は同期版の reschedule と同じ。
+    """
+    # フォームデータを取得（予定を削除する場合は、キャッシュ済みのフォームが最新であることを ETag で確認する）
+    try:
+        form = await get_form_data(token, revalidate=confirm)
+    except Exception as e:
+        logger.error(f"Token が見つかりません: {e}")
+        raise HTTPException(status_code=404, detail="Token not found")
+
+    page = reschedule_precheck_page(token, form, confirm)
+    if page is not None:
+        return page
+
+    # 確認済みの場合、処理を実行する
+    try:
+        access_token = await get_access_token_async()
+    except Exception as e:
+        logger.error(f"トークン取得に失敗しました: {e}")
+        raise HTTPException(status_code=500, detail="認証トークンの取得に失敗しました。")
+
+    event_ids = form["event_ids"]
+    # 各面接担当者のカレンダーから該当イベントを $batch でまとめて削除する（担当者ごとに結果を集計）
+    outcomes = await delete_events_batch(event_ids, graph_headers(access_token))
+    remaining_event_ids = undeleted_event_ids(event_ids, outcomes)
+
+    # 削除できた予定の分だけフォームを更新する
+    # すべて削除できた場合は、isConfirmed を False に戻し、event_ids を削除してフォームを再利用可能にする
+    try:
+        await reset_form(form, remaining_event_ids)
+    except FormConflictError as e:
+        raise reschedule_conflict(e)
+    return reschedule_result_page(token, outcomes, remaining_event_ids)
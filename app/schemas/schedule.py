@@ -53,6 +53,10 @@ class AvailabilityResponse(BaseModel):
         ...,
         description="共通の空き時間候補のリスト（開始日時と終了日時のリストのリスト）"
     )
+    next_cursor: str | None = Field(
+        None,
+        description="続きの候補を取得するためのカーソル（limit を指定し、続きがある場合のみ）"
+    )
 
     class Config:
         json_schema_extra = {
@@ -60,6 +64,7 @@ class AvailabilityResponse(BaseModel):
                 "common_availability": [
                     ["2025-01-10T10:00:00", "2025-01-10T11:00:00"],
                     ["2025-01-10T14:00:00", "2025-01-10T15:00:00"]
-                ]
+                ],
+                "next_cursor": None
             }
         } 
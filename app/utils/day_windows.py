@@ -0,0 +1,136 @@
+import logging
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.utils.time_utils import time_string_to_minutes
+
+logger = logging.getLogger(__name__)
+
+# 曜日名 → 曜日番号（月曜日 = 0）
+WEEKDAYS = {}
+for _number, _names in enumerate([
+    ("月", "月曜", "月曜日", "monday", "mon"),
+    ("火", "火曜", "火曜日", "tuesday", "tue"),
+    ("水", "水曜", "水曜日", "wednesday", "wed"),
+    ("木", "木曜", "木曜日", "thursday", "thu"),
+    ("金", "金曜", "金曜日", "friday", "fri"),
+    ("土", "土曜", "土曜日", "saturday", "sat"),
+    ("日", "日曜", "日曜日", "sunday", "sun"),
+]):
+    for _name in _names:
+        WEEKDAYS[_name] = _number
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_selected_weekdays(selected_days: list) -> set:
+    """
+    選択された曜日のリスト（"月" / "Monday" など）を曜日番号の集合に変換する
+    指定が無い場合は、すべての曜日を対象とする
+    """
+    weekdays = set()
+    for name in selected_days or []:
+        number = WEEKDAYS.get(name.strip().lower())
+        if number is None:
+            logger.warning(f"曜日として解釈できない値を無視しました: {name}")
+            continue
+        weekdays.add(number)
+    return weekdays or set(range(7))
+
+
+class DayWindowPlan:
+    """
+    選択された曜日の、毎日の開始時刻〜終了時刻の時間帯（ウィンドウ）だけを対象とする取得・評価の計画。
+
+    - 各ウィンドウの枠を日付順に連結した「詰めたグリッド」上で空き時間を評価する
+    - 夜間や選択されていない曜日の枠はグリッドに含めない
+    - slot_offsets でグリッドの各枠を起点日（start_date 0:00）からの経過分に対応付ける
+    - 終了時刻が開始時刻以前の場合は、翌日の終了時刻までを1つのウィンドウとする
+    """
+    __slots__ = ("start_date", "days", "window_start", "window_slots", "interval", "slot_offsets",
+                 "window_days", "fetch_days")
+
+    def __init__(self, start_date: str, days: list, window_start: int, window_slots: int, interval: int):
+        self.start_date = start_date
+        self.days = days
+        self.window_start = window_start
+        self.window_slots = window_slots
+        self.interval = interval
+
+        # グリッドの各枠の、起点日 0:00 からの経過分
+        epoch = date.fromisoformat(start_date)
+        day_offsets = np.array([(date.fromisoformat(day) - epoch).days for day in days], dtype=np.int64)
+        slot_minutes = (window_start + np.arange(window_slots, dtype=np.int64)) * interval
+        self.slot_offsets = (day_offsets[:, np.newaxis] * MINUTES_PER_DAY + slot_minutes).ravel()
+
+        # 各ウィンドウが含まれる日（日をまたぐウィンドウの場合は翌日も含める）と、取得が必要な日
+        slots_per_day = MINUTES_PER_DAY // interval
+        spanned_days = (window_start + max(window_slots, 1) - 1) // slots_per_day + 1
+        self.window_days = [
+            tuple((date.fromisoformat(day) + timedelta(days=i)).isoformat() for i in range(spanned_days))
+            for day in days
+        ]
+        self.fetch_days = sorted({day for spanned in self.window_days for day in spanned})
+
+    def __len__(self) -> int:
+        return len(self.slot_offsets)
+
+    def first_window_after(self, after_minute: int) -> int:
+        """
+        起点日 0:00 からの経過分 after_minute より後に開始する枠を含む、最初のウィンドウの番号を返す
+        """
+        if self.window_slots <= 0:
+            return len(self.days)
+        return int(np.searchsorted(self.slot_offsets, after_minute, side="right")) // self.window_slots
+
+    def fetch_days_from(self, first_window: int) -> list:
+        """
+        first_window 番目以降のウィンドウの評価に必要な日を返す
+        """
+        if first_window <= 0:
+            return self.fetch_days
+        return sorted({day for spanned in self.window_days[first_window:] for day in spanned})
+
+    def window_view(self, day_views: list) -> str:
+        """
+        window_days の1件に対応する1日ごとの availabilityView を受け取り、ウィンドウ内の枠を切り出す
+        """
+        return "".join(day_views)[self.window_start:self.window_start + self.window_slots]
+
+    def run_start_mask(self, required_slots: int) -> np.ndarray:
+        """
+        required_slots 枠の区間がウィンドウをまたがずに収まる開始位置を True とする、グリッドと同じ長さの配列
+        """
+        position = np.arange(len(self), dtype=np.int64) % max(self.window_slots, 1)
+        return position <= self.window_slots - required_slots
+
+
+def plan_day_windows(schedule_req, interval: int = 30) -> DayWindowPlan:
+    """
+    スケジュールリクエストから、選択された曜日の毎日の時間帯の計画を作成する
+    時間帯に一部だけ含まれる枠は対象外とする（開始時刻は切り上げ、終了時刻は切り捨て）
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        interval: 1枠の長さ（分）
+
+    Returns:
+        DayWindowPlan: 取得・評価の計画
+    """
+    start_minute = time_string_to_minutes(schedule_req.start_time)
+    end_minute = time_string_to_minutes(schedule_req.end_time)
+    if end_minute <= start_minute:
+        end_minute += MINUTES_PER_DAY
+    window_start = -(-start_minute // interval)
+    window_slots = max(end_minute // interval - window_start, 0)
+
+    weekdays = parse_selected_weekdays(schedule_req.selected_days)
+    start = date.fromisoformat(schedule_req.start_date)
+    end = date.fromisoformat(schedule_req.end_date)
+    days = [
+        (start + timedelta(days=i)).isoformat()
+        for i in range((end - start).days + 1)
+        if (start + timedelta(days=i)).weekday() in weekdays
+    ]
+    return DayWindowPlan(schedule_req.start_date, days, window_start, window_slots, interval)
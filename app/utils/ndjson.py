@@ -0,0 +1,20 @@
+import json
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(accept: str | None, stream: bool) -> bool:
+    """
+    クエリパラメータ stream または Accept ヘッダーで、NDJSON のストリーミングが指定されているかどうか
+    """
+    if stream:
+        return True
+    media_types = [part.split(";")[0].strip().lower() for part in (accept or "").split(",")]
+    return NDJSON_MEDIA_TYPE in media_types
+
+
+def error_line(message: str) -> str:
+    """
+    ストリーミングの途中で失敗した場合に、最後の行として出力するエラー
+    """
+    return json.dumps({"error": message}, ensure_ascii=False) + "\n"
@@ -0,0 +1,118 @@
+import html
+
+from app.config import FRONT_URL, BACKEND_URL
+
+
+def render_reschedule_confirm_page(token: str) -> str:
+    """
+    日程再調整の確認画面のHTMLを作成する
+
+    Parameters:
+        token: フォームデータのトークン
+    """
+    confirm_url = f"{BACKEND_URL}/reschedule?token={token}&confirm=true"
+    cancel_url = f"{FRONT_URL}/appointment?token={token}"
+    return f"""
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>日程再調整の確認</title>
+            <script src="https://cdn.tailwindcss.com"></script>
+        </head>
+        <body class="bg-gray-100 flex items-center justify-center min-h-screen">
+            <div class="bg-white shadow-xl rounded-lg p-12 max-w-xl text-center">
+            <h1 class="text-3xl font-bold mb-6">日程再調整の確認</h1>
+            <p class="mb-8 text-lg">
+                本当に日程の再調整を行いますか？<br>
+                ※この操作を実行すると、既存の予定が削除されます。
+            </p>
+            <div class="flex justify-center space-x-6">
+                <a href="{confirm_url}" class="inline-block bg-red-500 hover:bg-red-700 text-white font-bold py-3 px-6 rounded text-xl">
+                    再調整する
+                </a>
+                <a href="{cancel_url}" class="inline-block bg-gray-500 hover:bg-gray-700 text-white font-bold py-3 px-6 rounded text-xl">
+                    キャンセル
+                </a>
+            </div>
+            </div>
+        </body>
+        </html>
+        """
+
+
+def render_reschedule_done_page(token: str) -> str:
+    """
+    キャンセル処理完了後の、再調整用リンクをボタンにした画面のHTMLを作成する
+
+    Parameters:
+        token: フォームデータのトークン
+    """
+    link = f"{FRONT_URL}/appointment?token={token}"
+    return f"""
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>再調整完了</title>
+        <script src="https://cdn.tailwindcss.com"></script>
+    </head>
+    <body class="bg-gray-100 flex items-center justify-center min-h-screen">
+        <div class="bg-white shadow-xl rounded-lg p-12 max-w-xl text-center">
+        <h1 class="text-3xl font-bold mb-6">キャンセル処理完了</h1>
+        <p class="mb-8 text-lg">
+            既存の予定は削除されました。<br>
+            以下のボタンから新たに日程をご入力ください。
+        </p>
+        <a href="{link}" class="inline-block bg-blue-500 hover:bg-blue-700 text-white font-bold py-3 px-6 rounded text-xl">
+            日程再調整画面へ
+        </a>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def render_reschedule_partial_page(token: str, outcomes: dict) -> str:
+    """
+    一部の予定を削除できなかった場合に、担当者ごとの削除結果と再試行用のリンクを表示する画面のHTMLを作成する
+
+    Parameters:
+        token: フォームデータのトークン
+        outcomes: ユーザーメールアドレス → {"deleted": bool, "status": int, "error": str | None}
+    """
+    retry_url = f"{BACKEND_URL}/reschedule?token={token}&confirm=true"
+    rows = ""
+    for user_email, outcome in outcomes.items():
+        result = "削除済み" if outcome["deleted"] else f"削除失敗（{outcome['status']}）"
+        rows += f"""
+            <tr>
+                <td class="border px-4 py-2">{html.escape(user_email)}</td>
+                <td class="border px-4 py-2">{result}</td>
+            </tr>"""
+    return f"""
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>キャンセル処理未完了</title>
+        <script src="https://cdn.tailwindcss.com"></script>
+    </head>
+    <body class="bg-gray-100 flex items-center justify-center min-h-screen">
+        <div class="bg-white shadow-xl rounded-lg p-12 max-w-xl text-center">
+        <h1 class="text-3xl font-bold mb-6">キャンセル処理未完了</h1>
+        <p class="mb-8 text-lg">
+            一部の担当者の予定を削除できませんでした。<br>
+            時間をおいて再度お試しください。
+        </p>
+        <table class="table-auto mx-auto mb-8">
+            <thead>
+                <tr><th class="px-4 py-2">担当者</th><th class="px-4 py-2">結果</th></tr>
+            </thead>
+            <tbody>{rows}
+            </tbody>
+        </table>
+        <a href="{retry_url}" class="inline-block bg-red-500 hover:bg-red-700 text-white font-bold py-3 px-6 rounded text-xl">
+            再試行する
+        </a>
+        </div>
+    </body>
+    </html>
+    """
@@ -0,0 +1,43 @@
+import base64
+import hashlib
+import json
+
+
+def request_fingerprint(schedule_req) -> str:
+    """
+    カーソルを発行したリクエストと同じ条件で再開されることを確認するための、リクエストのハッシュ値
+    """
+    return hashlib.sha256(schedule_req.model_dump_json().encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(schedule_req, after_minute: int) -> str:
+    """
+    次のページの取得を再開するための不透明なカーソルを作成する
+
+    Parameters:
+        schedule_req: スケジュールリクエストオブジェクト
+        after_minute: 返却済みの最後の候補の開始（起点日 0:00 からの経過分）
+
+    Returns:
+        str: URL セーフな Base64 文字列
+    """
+    payload = json.dumps({"f": request_fingerprint(schedule_req), "m": int(after_minute)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(schedule_req, cursor: str) -> int:
+    """
+    カーソルを解析し、返却済みの最後の候補の開始（起点日 0:00 からの経過分）を返す
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合、または別の条件のリクエストで発行されたカーソルの場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        fingerprint, after_minute = payload["f"], int(payload["m"])
+    except Exception as e:
+        raise ValueError(f"カーソルの形式が不正です: {e}") from e
+    if fingerprint != request_fingerprint(schedule_req):
+        raise ValueError("カーソルが別の条件のリクエストで発行されています")
+    return after_minute
@@ -0,0 +1,20 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    orjson でエンコードする JSON レスポンス（アプリケーション全体の既定のレスポンスクラス）
+    """
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def availability_response(common_availability: list, next_cursor: str | None = None) -> ORJSONResponse:
+    """
+    空き時間候補のレスポンスを作成する
+    候補はサーバー側で生成した [開始日時, 終了日時] の文字列のリストのため、
+    AvailabilityResponse による検証（候補数に比例して遅くなる）を行わずにそのままエンコードする
+    （レスポンスの形式は AvailabilityResponse と同じ）
+    """
+    return ORJSONResponse(content={"common_availability": common_availability, "next_cursor": next_cursor})
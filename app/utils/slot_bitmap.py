@@ -0,0 +1,85 @@
+from functools import reduce
+
+import numpy as np
+
+# availabilityView の '0'（空き）を 1、それ以外を 0 に変換するテーブル
+_FREE_BIT_TABLE = str.maketrans("0123456789", "1000000000")
+
+
+def view_to_bitmask(availability_view: str) -> int:
+    """
+    availabilityView を、空いている枠のビットを立てた整数に変換する
+    i 番目の枠が空いている場合に、下位から i ビット目が 1 になる
+
+    例:
+        "0220" -> 0b1001
+    """
+    if not availability_view:
+        return 0
+    return int(availability_view.translate(_FREE_BIT_TABLE)[::-1], 2)
+
+
+def bools_to_bitmask(free: np.ndarray) -> int:
+    """
+    真偽値の配列を、True の位置のビットを立てた整数に変換する
+    """
+    return int.from_bytes(np.packbits(free, bitorder="little").tobytes(), "little")
+
+
+def bitmask_positions(mask: int) -> np.ndarray:
+    """
+    立っているビットの位置を昇順の配列で返す
+    """
+    if mask <= 0:
+        return np.empty(0, dtype=np.int64)
+    data = np.frombuffer(mask.to_bytes((mask.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder="little"))
+
+
+def common_bitmask(masks: list) -> int:
+    """
+    全ユーザーの空き枠のビットマスクの AND（全員が空いている枠）を返す
+    """
+    if not masks:
+        return 0
+    return reduce(lambda a, b: a & b, masks)
+
+
+def run_start_bitmask(mask: int, required_slots: int) -> int:
+    """
+    連続して required_slots 枠以上空いている区間の開始位置のビットを立てた整数を返す
+    i ビット目が 1 の場合、i 〜 i + required_slots - 1 番目の枠がすべて空いている
+
+    シフトと AND を、連続長を倍々に伸ばしながら行う（O(log required_slots) 回）
+    """
+    if required_slots <= 1:
+        return mask
+    runs = mask
+    length = 1
+    while length * 2 <= required_slots:
+        runs &= runs >> length
+        length *= 2
+    if length < required_slots:
+        runs &= runs >> (required_slots - length)
+    return runs
+
+
+def find_common_run_starts(availability_views: list, required_slots: int,
+                           allowed_starts: np.ndarray = None) -> np.ndarray:
+    """
+    全ユーザーが required_slots 枠以上続けて空いている区間の開始枠のインデックスを、
+    availabilityView から直接求める
+
+    Parameters:
+        availability_views: 各ユーザーの availabilityView
+        required_slots: 必要な連続枠数
+        allowed_starts: 区間の開始位置として許可する枠を True とする真偽値の配列（省略時はすべて許可）
+
+    Returns:
+        np.ndarray: 開始枠のインデックスの配列（昇順）
+    """
+    common = common_bitmask([view_to_bitmask(view) for view in availability_views])
+    runs = run_start_bitmask(common, max(required_slots, 1))
+    if allowed_starts is not None:
+        runs &= bools_to_bitmask(allowed_starts)
+    return bitmask_positions(runs)
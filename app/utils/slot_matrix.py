@@ -0,0 +1,63 @@
+import numpy as np
+
+# availabilityView の '0'（空き）の文字コード
+_FREE_CODE = ord("0")
+
+
+def views_to_matrix(availability_views: list) -> np.ndarray:
+    """
+    各ユーザーの availabilityView を、ユーザー × 枠 の真偽値行列（True が空き）に変換する
+    長さが異なる場合は、短いユーザーの末尾を埋まりとして扱う
+    """
+    length = max((len(view or "") for view in availability_views), default=0)
+    free = np.zeros((len(availability_views), length), dtype=bool)
+    for i, view in enumerate(availability_views):
+        if view:
+            free[i, :len(view)] = np.frombuffer(view.encode("ascii"), dtype=np.uint8) == _FREE_CODE
+    return free
+
+
+def sliding_all(free: np.ndarray, window: int) -> np.ndarray:
+    """
+    各行について、長さ window の区間がすべて True かどうかを累積和で求める
+
+    Parameters:
+        free: 行 × 枠 の真偽値行列
+        window: 区間の枠数
+
+    Returns:
+        np.ndarray: 行 × (枠数 - window + 1) の真偽値行列（j 列目は j 〜 j + window - 1 番目の区間）
+    """
+    rows, length = free.shape
+    if window <= 0:
+        return np.ones((rows, length + 1), dtype=bool)
+    if length < window:
+        return np.zeros((rows, 0), dtype=bool)
+    counts = np.zeros((rows, length + 1), dtype=np.int32)
+    np.cumsum(free, axis=1, out=counts[:, 1:])
+    return (counts[:, window:] - counts[:, :-window]) == window
+
+
+def find_k_of_n_windows(free: np.ndarray, required_slots: int, required_participants: int,
+                        allowed_starts: np.ndarray = None) -> tuple:
+    """
+    required_participants 人以上が required_slots 枠続けて空いている区間を求める
+
+    Parameters:
+        free: ユーザー × 枠 の真偽値行列
+        required_slots: 区間の枠数
+        required_participants: 必要な人数
+        allowed_starts: 区間の開始位置として許可する枠を True とする真偽値の配列（省略時はすべて許可）
+
+    Returns:
+        np.ndarray: 区間の開始枠のインデックスの配列
+    """
+    window_free = sliding_all(free, required_slots)
+    enough = np.count_nonzero(window_free, axis=0) >= required_participants
+    if allowed_starts is not None:
+        allowed = np.zeros(enough.shape, dtype=bool)
+        length = min(len(allowed), len(allowed_starts))
+        allowed[:length] = allowed_starts[:length]
+        enough &= allowed
+    return np.flatnonzero(enough)
+
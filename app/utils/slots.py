@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+
+
+class SlotRuns:
+    """
+    空き時間候補の時間帯の集合。
+    各時間帯は、起点日（取得期間の開始日 0:00）からの経過分（整数）の開始・終了で表し、
+    日時への変換はレスポンスの作成時に配列全体に対して一度だけ行う。
+    """
+    __slots__ = ("epoch", "starts", "ends")
+
+    def __init__(self, epoch: np.datetime64, starts: np.ndarray, ends: np.ndarray):
+        self.epoch = epoch
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_slot_offsets(cls, start_date: str, slot_offsets: np.ndarray, run_starts, required_slots: int,
+                          interval: int = 30) -> "SlotRuns":
+        """
+        日ごとの時間帯だけを連結したグリッドの枠のインデックスから時間帯を作成する
+
+        Parameters:
+            start_date: 起点日（"YYYY-MM-DD"）
+            slot_offsets: グリッドの各枠の、起点日 0:00 からの経過分（DayWindowPlan.slot_offsets）
+            run_starts: 時間帯の開始枠のインデックス
+            required_slots: 1つの時間帯の枠数
+            interval: 1枠の長さ（分）
+        """
+        starts = slot_offsets[np.asarray(run_starts, dtype=np.int64)]
+        return cls(np.datetime64(start_date, "m"), starts, starts + required_slots * interval)
+
+    @classmethod
+    def concat(cls, start_date: str, slot_runs: list) -> "SlotRuns":
+        """
+        同じ起点日の複数の時間帯の集合を連結する
+        """
+        if not slot_runs:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(np.datetime64(start_date, "m"), empty, empty)
+        if len(slot_runs) == 1:
+            return slot_runs[0]
+        return cls(
+            slot_runs[0].epoch,
+            np.concatenate([runs.starts for runs in slot_runs]),
+            np.concatenate([runs.ends for runs in slot_runs])
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index) -> "SlotRuns":
+        return SlotRuns(self.epoch, self.starts[index], self.ends[index])
+
+    def to_datetimes(self) -> tuple:
+        """
+        開始・終了日時を datetime64 の配列で返す
+        """
+        return (
+            self.epoch + self.starts.astype("timedelta64[m]"),
+            self.epoch + self.ends.astype("timedelta64[m]")
+        )
+
+    def to_iso_pairs(self) -> list:
+        """
+        "YYYY-MM-DDTHH:MM:SS" 形式の [開始日時, 終了日時] のリストに変換する
+        """
+        starts, ends = self.to_datetimes()
+        return np.stack([
+            np.datetime_as_string(starts, unit="s"),
+            np.datetime_as_string(ends, unit="s")
+        ], axis=1).tolist()
+
+    def to_ndjson(self) -> str:
+        """
+        1行に1件の [開始日時, 終了日時] を出力する NDJSON 形式の文字列に変換する
+        """
+        return "".join(json.dumps(pair) + "\n" for pair in self.to_iso_pairs())
@@ -0,0 +1,291 @@
+"""
+getSchedule のレスポンスから空き時間候補（[開始日時, 終了日時] のリスト）を求める処理について、
+従来の実装と現在の実装（compute_common_times）の処理時間を比較するベンチマーク。
+- 従来: float の時間のタプル → 集合の積 + BFS / スロットごとの辞書 + 集合の積 → 文字列 → datetime
+- 現在: 選択された曜日の毎日の時間帯の枠だけを連結した availabilityView → ビットマスク / NumPy の行列
+        → 整数の分 → 一括で日時文字列に変換
+既定では 50 ユーザー × 90 日分（30分枠）の予定を生成し、平日 9:00〜18:00 を対象として計測する。
+従来の実装は期間全体を連続した枠として評価するため、結果は毎日の時間帯に収まる候補だけに絞って比較する。
+
+実行方法:
+    python -m benchmarks.bench_availability --users 50 --days 90
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.internal.availability import compute_common_times
+from app.internal.graph_api import assemble_schedule_response
+from app.schemas import ScheduleRequest, User
+from app.utils.day_windows import plan_day_windows
+
+SLOTS_PER_DAY = 48
+BENCH_START = datetime(2025, 1, 6)
+
+
+def legacy_find_common_availability(free_slots_list, duration_minutes):
+    """
+    比較用：ビットマスク実装に置き換える前の find_common_availability（集合の積 + BFS）
+    """
+    required_slots = duration_minutes // 30
+    user_availability_sets = [set(slots) for slots in free_slots_list]
+    if len(user_availability_sets) == 0:
+        return []
+    common_slots = set.intersection(*user_availability_sets)
+    sorted_common_slots = sorted(common_slots, key=lambda slot: slot[0])
+
+    adjacency = {slot: [] for slot in sorted_common_slots}
+    for i in range(len(sorted_common_slots) - 1):
+        curr_slot = sorted_common_slots[i]
+        next_slot = sorted_common_slots[i + 1]
+        if abs(curr_slot[1] - next_slot[0]) < 1e-2:
+            adjacency[curr_slot].append(next_slot)
+        if abs(next_slot[1] - curr_slot[0]) < 1e-2:
+            adjacency[next_slot].append(curr_slot)
+
+    visited = set()
+    connected_components = []
+    for slot in sorted_common_slots:
+        if slot not in visited:
+            queue = [slot]
+            visited.add(slot)
+            connected_component = []
+            while queue:
+                current = queue.pop(0)
+                connected_component.append(current)
+                for neighbor in adjacency[current]:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append(neighbor)
+            connected_component.sort(key=lambda x: x[0])
+            connected_components.append(connected_component)
+
+    result = []
+    for component in connected_components:
+        for i in range(len(component) - required_slots + 1):
+            start = component[i][0]
+            end = component[i + required_slots - 1][1]
+            result.append(f"{start} - {end}")
+    return list(sorted(set(result), key=lambda x: float(x.split(" - ")[0])))
+
+
+def legacy_find_common_availability_participants(free_slots_list, duration_minutes, required_participants, users):
+    """
+    比較用：NumPy 実装に置き換える前の find_common_availability_participants
+    """
+    if not free_slots_list or required_participants <= 0:
+        return []
+    slot_users = {}
+    for i, user_slots in enumerate(free_slots_list):
+        user = users[i] if i < len(users) else f"User-{i}"
+        for slot in user_slots:
+            slot_users.setdefault(slot, []).append(user)
+    available_slots = [
+        (slot, available_users) for slot, available_users in slot_users.items()
+        if len(available_users) >= required_participants
+    ]
+    available_slots.sort(key=lambda x: x[0][0])
+    if not available_slots:
+        return []
+
+    result = []
+    required_slots = (duration_minutes + 29) // 30
+    continuous_groups = []
+    current_group = [available_slots[0]]
+    for i in range(1, len(available_slots)):
+        prev_slot, _ = current_group[-1]
+        curr_slot, _ = available_slots[i]
+        if abs(prev_slot[1] - curr_slot[0]) < 1e-2:
+            current_group.append(available_slots[i])
+        else:
+            if len(current_group) >= required_slots:
+                continuous_groups.append(current_group)
+            current_group = [available_slots[i]]
+    if len(current_group) >= required_slots:
+        continuous_groups.append(current_group)
+
+    for group in continuous_groups:
+        for i in range(len(group) - required_slots + 1):
+            window = group[i: i + required_slots]
+            common_users = set(window[0][1])
+            for _, users_list in window[1:]:
+                common_users &= set(users_list)
+            if len(common_users) >= required_participants:
+                result.append((f"{window[0][0][0]} - {window[required_slots - 1][0][1]}", list(common_users)))
+    return result
+
+
+def legacy_parse_availability(response_json, start_hour: float):
+    """
+    比較用：整数の分に置き換える前の parse_availability（float の時間のタプル）
+    """
+    free_slots_list = []
+    for schedule in response_json.get("value", []):
+        free_slots = []
+        for i, c in enumerate(schedule.get("availabilityView")):
+            if c == "0":
+                slot_start = start_hour + i * 0.5
+                free_slots.append((slot_start, slot_start + 0.5))
+        free_slots_list.append(free_slots)
+    return free_slots_list
+
+
+def legacy_slot_to_iso_pairs(start_date: str, common_slots: list) -> list:
+    """
+    比較用：文字列のスロット（"21.5 - 22.5"）を再度パースして日時文字列に変換する従来の処理
+    """
+    base = datetime.strptime(start_date, "%Y-%m-%d")
+    result = []
+    for common_slot in common_slots:
+        pair = []
+        for value in common_slot.split("-"):
+            float_hour = float(value.strip())
+            day_offset = int(float_hour // 24)
+            remainder_hours = float_hour % 24
+            hour = int(remainder_hours)
+            minute = int(round((remainder_hours - hour) * 60))
+            dt = base + timedelta(days=day_offset, hours=hour, minutes=minute)
+            pair.append(dt.strftime("%Y-%m-%dT%H:%M:%S"))
+        result.append(pair)
+    return result
+
+
+def legacy_compute_common_times(schedule_req, schedule_info) -> list:
+    """
+    比較用：従来の compute_common_times
+    """
+    hour, minute = schedule_req.start_time.split(":")
+    free_slots_list = legacy_parse_availability(schedule_info, int(hour) + int(minute) / 60.0)
+    if len(schedule_req.users) == schedule_req.required_participants:
+        common_slots = legacy_find_common_availability(free_slots_list, schedule_req.duration_minutes)
+    else:
+        common_slots = [
+            slot for slot, _ in legacy_find_common_availability_participants(
+                free_slots_list,
+                schedule_req.duration_minutes,
+                schedule_req.required_participants,
+                [user.email for user in schedule_req.users]
+            )
+        ]
+    return legacy_slot_to_iso_pairs(schedule_req.start_date, common_slots)
+
+
+def generate_day_views(users: int, days: int, seed: int) -> dict:
+    """
+    平日の営業時間に予定が入る、1日ごとの availabilityView を生成する
+
+    Returns:
+        dict: (メールアドレス, 日付) → 1日分の availabilityView
+    """
+    rng = random.Random(seed)
+    day_views = {}
+    for i in range(users):
+        for day in range(days):
+            # 夜間・週末は空き、営業時間内は 1 割程度の枠に予定が入る
+            day_views[(f"user{i}@example.com", (BENCH_START + timedelta(days=day)).strftime("%Y-%m-%d"))] = "".join(
+                "2" if day % 7 < 5 and 18 <= slot < 36 and rng.random() < 0.1 else "0"
+                for slot in range(SLOTS_PER_DAY)
+            )
+    return day_views
+
+
+def legacy_schedule_info(schedule_req, day_views: dict) -> dict:
+    """
+    比較用：開始日時〜終了日時を1つの連続した期間として取得した、従来の getSchedule のレスポンス
+    """
+    hour, minute = map(int, schedule_req.start_time.split(":"))
+    end_hour, end_minute = map(int, schedule_req.end_time.split(":"))
+    days = sorted({day for _, day in day_views})
+    offset = (hour * 60 + minute) // 30
+    total_slots = (len(days) - 1) * SLOTS_PER_DAY + (end_hour * 60 + end_minute) // 30 - offset
+    return {"value": [
+        {
+            "scheduleId": user.email,
+            "availabilityView": "".join(day_views[(user.email, day)] for day in days)[offset:offset + total_slots]
+        }
+        for user in schedule_req.users
+    ]}
+
+
+def within_windows(schedule_req, candidates: list) -> list:
+    """
+    比較用：従来の実装の結果から、選択された曜日の毎日の時間帯に収まる候補だけを残す
+    """
+    plan = plan_day_windows(schedule_req)
+    selected = set(plan.days)
+    return [
+        [start, end] for start, end in candidates
+        if start[:10] == end[:10] and start[:10] in selected
+        and schedule_req.start_time <= start[11:16] and end[11:16] <= schedule_req.end_time
+    ]
+
+
+def measure(call, count: int) -> list:
+    """
+    call を count 回実行し、各呼び出しの処理時間（ミリ秒）を返す
+    """
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    print(f"{label:<28} mean={statistics.mean(latencies):9.2f}ms p50={statistics.median(latencies):9.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50, help="ユーザー数")
+    parser.add_argument("--days", type=int, default=90, help="日数")
+    parser.add_argument("--duration", type=int, default=60, help="必要な空き時間の長さ（分）")
+    parser.add_argument("--required", type=int, default=None, help="必要な人数（省略時はユーザー数の 8 割）")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+
+    day_views = generate_day_views(args.users, args.days, args.seed)
+    users = [User(email=f"user{i}@example.com") for i in range(args.users)]
+    required = args.required or max(args.users * 8 // 10, 1)
+
+    for label, required_participants in (("all", args.users), (f"{required} of", required)):
+        schedule_req = ScheduleRequest(
+            start_date=BENCH_START.strftime("%Y-%m-%d"),
+            end_date=(BENCH_START + timedelta(days=args.days - 1)).strftime("%Y-%m-%d"),
+            start_time="09:00",
+            end_time="18:00",
+            selected_days=["月", "火", "水", "木", "金"],
+            duration_minutes=args.duration,
+            users=users,
+            required_participants=required_participants,
+            time_zone="Tokyo Standard Time"
+        )
+
+        legacy_info = legacy_schedule_info(schedule_req, day_views)
+        schedule_info = assemble_schedule_response(schedule_req, plan_day_windows(schedule_req), day_views)
+        print(f"\n{label} {args.users} users x {args.days} days, "
+              f"slots per user: legacy={len(legacy_info['value'][0]['availabilityView'])} "
+              f"current={len(schedule_info['value'][0]['availabilityView'])}")
+
+        # 結果が、従来の実装の結果を毎日の時間帯に絞ったものと一致することを確認する
+        expected = within_windows(schedule_req, legacy_compute_common_times(schedule_req, legacy_info))
+        assert compute_common_times(schedule_req, schedule_info) == expected
+        print(f"{len(expected)} candidates")
+
+        legacy = measure(lambda: legacy_compute_common_times(schedule_req, legacy_info), args.repeat)
+        current = measure(lambda: compute_common_times(schedule_req, schedule_info), args.repeat)
+        report("legacy", legacy)
+        report("current", current)
+        print(f"speedup: {statistics.mean(legacy) / statistics.mean(current):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+コールドスタート（新しいプロセスでの function_app のインポートと最初のリクエスト）の処理時間を計測するベンチマーク。
+- legacy: インポート時にデータベース・コンテナを作成する（従来の app.dependencies の動作を再現）
+- current: インポート時にはネットワークアクセスを行わず、最初のリクエストでクライアントを作成する
+Cosmos DB の代わりに、1回の呼び出しごとに遅延を加えるローカルの代替クライアントを使用する
+（create_*_if_not_exists は --provision-latency ミリ秒、データの読み込みは --rtt ミリ秒）。
+最初のリクエストは、確定済みのフォームに対する /retrieve_form_data（Cosmos DB の読み込みのみ）。
+
+実行方法:
+    python -m benchmarks.bench_cold_start --runs 5 --provision-latency 300 --rtt 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+FORM = {
+    "start_date": "2025-01-10", "end_date": "2025-01-15", "start_time": "09:00", "end_time": "18:00",
+    "selected_days": ["月", "火", "水", "木", "金"], "duration_minutes": 60,
+    "users": [{"email": "interviewer@example.com"}], "isConfirmed": True
+}
+
+
+class StandInContainer:
+    """確定済みのフォームを返すコンテナの代替（1往復ごとに rtt 秒待つ）"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+
+    def read_item(self, item, partition_key, **kwargs):
+        time.sleep(self.rtt)
+        return {"id": item, "partitionKey": partition_key, "_etag": '"1"', **FORM}
+
+
+class StandInDatabase:
+    def __init__(self, provision_latency: float, rtt: float):
+        self.provision_latency = provision_latency
+        self.rtt = rtt
+
+    def create_container_if_not_exists(self, **kwargs):
+        time.sleep(self.provision_latency)
+        return StandInContainer(self.rtt)
+
+    def get_container_client(self, container):
+        return StandInContainer(self.rtt)
+
+
+def stand_in_client(provision_latency: float, rtt: float):
+    """azure.cosmos.CosmosClient の代わりに使用するクラスを作成する"""
+    class StandInCosmosClient:
+        def __init__(self, url, credential=None, **kwargs):
+            pass
+
+        def create_database_if_not_exists(self, **kwargs):
+            time.sleep(provision_latency)
+            return StandInDatabase(provision_latency, rtt)
+
+        def get_database_client(self, database):
+            return StandInDatabase(provision_latency, rtt)
+
+    return StandInCosmosClient
+
+
+def child(mode: str, provision_latency: float, rtt: float) -> None:
+    """新しいプロセスで1回分のコールドスタートを計測し、結果を JSON で出力する"""
+    import azure.cosmos
+    azure.cosmos.CosmosClient = stand_in_client(provision_latency, rtt)
+
+    started = time.perf_counter()
+    import function_app  # noqa: F401
+    if mode == "legacy":
+        from azure.cosmos import CosmosClient
+        from tools.bootstrap_cosmos import provision
+        provision(CosmosClient(None))
+    imported = time.perf_counter()
+
+    from fastapi.testclient import TestClient
+    from app import app
+    with TestClient(app) as client:
+        request_started = time.perf_counter()
+        response = client.get("/retrieve_form_data", params={"token": "cold-start"})
+        finished = time.perf_counter()
+    assert response.status_code == 200, response.text
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "first_request_ms": (finished - request_started) * 1000,
+        "total_ms": (imported - started + finished - request_started) * 1000
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="各モードの計測回数（毎回新しいプロセスで計測）")
+    parser.add_argument("--provision-latency", type=float, default=300.0,
+                        help="create_*_if_not_exists 1回あたりの遅延（ミリ秒）")
+    parser.add_argument("--rtt", type=float, default=5.0, help="データの読み込み1回あたりの遅延（ミリ秒）")
+    parser.add_argument("--child", choices=["legacy", "current"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.provision_latency / 1000, args.rtt / 1000)
+        return
+
+    root = Path(__file__).parent.parent
+    for mode in ("legacy", "current"):
+        results = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", mode,
+                 "--provision-latency", str(args.provision_latency), "--rtt", str(args.rtt)],
+                cwd=root, capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        summary = " ".join(
+            f"{key}={statistics.median(result[key] for result in results):8.1f}"
+            for key in ("import_ms", "first_request_ms", "total_ms")
+        )
+        print(f"{mode:<8} (median of {args.runs}) {summary}")
+
+
+if __name__ == "__main__":
+    main()
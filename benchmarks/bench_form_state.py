@@ -0,0 +1,110 @@
+"""
+予約時の対象フォームの状態更新について、Cosmos DB への往復回数・転送量・処理時間を比較するベンチマーク。
+- 従来: イベントIDの保存（read_item + replace_item）→ 確定（query_items + replace_item）
+- 現在: confirm_form（isConfirmed と event_ids を1回の patch_item で更新）
+Cosmos DB の代わりにインメモリのコンテナを使い、1往復ごとに --rtt ミリ秒の遅延を加えて計測する。
+転送量は、各リクエスト・レスポンスのドキュメント（またはパッチ操作）を JSON にした概算のバイト数。
+
+実行方法:
+    python -m benchmarks.bench_form_state --candidates 200 --repeat 50 --rtt 5
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.internal import cosmos
+from tests.mocks import FakeCosmosContainer
+
+
+class MeteredContainer(FakeCosmosContainer):
+    """1往復ごとに遅延を加え、往復回数と転送量を数えるインメモリのコンテナ"""
+
+    def __init__(self, rtt: float, **kwargs):
+        super().__init__(**kwargs)
+        self.rtt = rtt
+        self.round_trips = 0
+        self.bytes = 0
+
+    def _meter(self, *payloads):
+        self.round_trips += 1
+        self.bytes += sum(len(json.dumps(payload, ensure_ascii=False)) for payload in payloads)
+        time.sleep(self.rtt)
+
+    def read_item(self, item, partition_key, **kwargs):
+        doc = super().read_item(item, partition_key, **kwargs)
+        self._meter(doc)
+        return doc
+
+    def query_items(self, query, parameters, **kwargs):
+        docs = [doc for (doc_id, _), doc in self.items.items() if doc_id == parameters[-1]["value"]]
+        self._meter(query, parameters, docs)
+        return [dict(doc) for doc in docs]
+
+    def replace_item(self, item, body, **kwargs):
+        doc = super().replace_item(item, body, **kwargs)
+        self._meter(body, doc)
+        return doc
+
+    def patch_item(self, item, partition_key, patch_operations, **kwargs):
+        doc = super().patch_item(item, partition_key, patch_operations, **kwargs)
+        self._meter(patch_operations, doc)
+        return doc
+
+
+def legacy_finalize(container, token: str, event_ids: dict) -> None:
+    """従来の状態更新（読み込み + 置き換え、クエリ + 置き換え）"""
+    form = container.read_item(item=token, partition_key=token)
+    form["event_ids"] = event_ids
+    container.replace_item(item=token, body=form)
+    query = "SELECT * FROM c WHERE c.partitionKey = @partitionKey AND c.id = @currentToken"
+    parameters = [{"name": "@partitionKey", "value": token}, {"name": "@currentToken", "value": token}]
+    for form in container.query_items(query=query, parameters=parameters):
+        form["isConfirmed"] = True
+        container.replace_item(item=token, body=form)
+
+
+def run(label: str, finalize, candidates: int, repeat: int, rtt: float) -> float:
+    container = MeteredContainer(rtt, filters={cosmos.UNCONFIRMED_FILTER: lambda doc: not doc.get("isConfirmed")})
+    slots = [[f"2025-01-{day:02d}T{hour:02d}:00:00", f"2025-01-{day:02d}T{hour + 1:02d}:00:00"]
+             for day in range(1, 32) for hour in range(24)][:candidates]
+    event_ids = {f"user{i}@example.com": f"event-{i}" for i in range(5)}
+    latencies = []
+    for i in range(repeat):
+        token = f"form-{i}"
+        container.create_item(body={"id": token, "partitionKey": token, "candidates": slots, "isConfirmed": False})
+        container.round_trips = container.bytes = 0
+        started = time.perf_counter()
+        finalize(container, token, event_ids)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<34} round trips={container.round_trips:>2} "
+          f"transfer={container.bytes:>8,} bytes mean={statistics.mean(latencies):7.2f}ms")
+    return statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=200, help="フォームの候補日数（ドキュメントのサイズ）")
+    parser.add_argument("--repeat", type=int, default=50, help="計測回数")
+    parser.add_argument("--rtt", type=float, default=5.0, help="Cosmos DB への1往復の遅延（ミリ秒）")
+    args = parser.parse_args()
+
+    rtt = args.rtt / 1000
+    legacy = run("legacy: read/replace/query/replace", legacy_finalize, args.candidates, args.repeat, rtt)
+
+    def current_finalize(container, token, event_ids):
+        with patch.object(cosmos, "get_container", lambda: container):
+            cosmos.confirm_form(token, event_ids)
+
+    current = run("current: patch (if unconfirmed)", current_finalize, args.candidates, args.repeat, rtt)
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
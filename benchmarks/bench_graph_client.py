@@ -0,0 +1,144 @@
+"""
+共有 Graph クライアント（接続プール）と素の requests 呼び出しの 1 リクエストあたりの
+レイテンシを、ローカルの HTTPS スタブサーバーに対して比較するベンチマーク。
+
+実行方法:
+    python -m benchmarks.bench_graph_client --requests 200
+"""
+import argparse
+import datetime
+import json
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.internal.graph_client import graph_post, close_graph_session
+
+
+class StubGraphHandler(BaseHTTPRequestHandler):
+    """getSchedule 相当の固定レスポンスを返すスタブ"""
+    protocol_version = "HTTP/1.1"  # Keep-Alive を有効にする
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps({"value": [{"availabilityView": "0022000022"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_self_signed_cert(directory: Path):
+    """
+    スタブサーバー用の自己署名証明書を作成する
+    """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+    import ipaddress
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = directory / "cert.pem"
+    key_path = directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption()
+    ))
+    return cert_path, key_path
+
+
+def start_stub_server(cert_path: Path, key_path: Path):
+    """
+    スタブサーバーを別スレッドで起動し、サーバーオブジェクトを返す
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGraphHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def measure(call, count: int) -> list:
+    """
+    call を count 回実行し、各呼び出しのレイテンシ（ミリ秒）を返す
+    """
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<24} mean={statistics.mean(latencies):7.2f}ms "
+        f"p50={statistics.median(latencies):7.2f}ms p99={p99:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200, help="計測するリクエスト数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert_path, key_path = create_self_signed_cert(Path(tmp))
+        server = start_stub_server(cert_path, key_path)
+        url = f"https://127.0.0.1:{server.server_address[1]}/v1.0/users/me/calendar/getSchedule"
+        body = {"schedules": ["user@example.com"]}
+
+        bare = measure(
+            lambda: requests.post(url, json=body, verify=str(cert_path)).json(),
+            args.requests
+        )
+        pooled = measure(
+            lambda: graph_post(url, access_token="dummy", json=body, verify=str(cert_path)).json(),
+            args.requests
+        )
+        close_graph_session()
+        server.shutdown()
+
+    report("requests.post (no pool)", bare)
+    report("graph_client (pooled)", pooled)
+    saved = statistics.mean(bare) - statistics.mean(pooled)
+    print(f"saved per call: {saved:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
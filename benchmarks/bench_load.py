@@ -0,0 +1,71 @@
+"""
+起動中の API に同時リクエストを送り、requests/sec と p50/p99 レイテンシを計測する負荷ツール。
+同期モードと非同期モード（ASYNC_MODE=true）でそれぞれ起動したホストに対して実行し、結果を比較する。
+
+実行方法:
+    ASYNC_MODE=false func start   # または ASYNC_MODE=true func start
+    python -m benchmarks.bench_load --url http://localhost:7071/retrieve_form_data?token=<token> \
+        --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, method: str, url: str, body, queue: asyncio.Queue,
+                 latencies: list, errors: list):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, json=body)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run(args):
+    body = json.loads(args.body) if args.body else None
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(None)
+
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, args.method, args.url, body, queue, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests:    {len(latencies)} (errors: {len(errors)})")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50: {statistics.median(latencies):.1f}ms")
+    print(f"latency p99: {latencies[int(len(latencies) * 0.99) - 1]:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="計測対象のURL")
+    parser.add_argument("--method", default="GET", help="HTTPメソッド")
+    parser.add_argument("--body", default=None, help="リクエストボディ（JSON文字列）")
+    parser.add_argument("--concurrency", type=int, default=64, help="同時接続数")
+    parser.add_argument("--requests", type=int, default=2000, help="総リクエスト数")
+    parser.add_argument("--timeout", type=float, default=120, help="1リクエストのタイムアウト（秒）")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+空き時間候補のレスポンスについて、JSON エンコードの処理時間と、圧縮によるサイズ・処理時間を比較するベンチマーク。
+- エンコード: 従来（AvailabilityResponse の検証 + 標準の json）と現在（orjson でそのままエンコード）
+- 圧縮: なし / gzip / brotli（CompressionMiddleware と同じ圧縮レベル）
+ペイロードは、一般的なケース（2週間の平日 9:00〜18:00、1時間枠）と
+最悪のケース（90日 × 24時間、30分刻み、すべて空き）の候補を生成して計測する。
+
+実行方法:
+    python -m benchmarks.bench_responses --repeat 50
+"""
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import orjson
+
+from app.schemas import AvailabilityResponse
+from app.utils.compression import GZIP_LEVEL, BROTLI_QUALITY, brotli
+from app.utils.slots import SlotRuns
+
+
+def generate_candidates(days: int, start_minute: int, end_minute: int, duration: int, weekdays_only: bool) -> list:
+    """
+    毎日 start_minute〜end_minute の間に、30分刻みで duration 分の候補が並ぶ空き時間候補を生成する
+    """
+    starts = [
+        day * 1440 + minute
+        for day in range(days)
+        if not weekdays_only or day % 7 < 5
+        for minute in range(start_minute, end_minute - duration + 1, 30)
+    ]
+    return SlotRuns.from_slot_offsets(
+        "2025-01-06", np.array(starts, dtype=np.int64), np.arange(len(starts)), duration // 30
+    ).to_iso_pairs()
+
+
+def measure(call, count: int) -> tuple:
+    """
+    call を count 回実行し、各呼び出しの処理時間（ミリ秒）と最後の戻り値を返す
+    """
+    latencies = []
+    result = None
+    for _ in range(count):
+        started = time.perf_counter()
+        result = call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, result
+
+
+def report(label: str, latencies: list, size: int) -> None:
+    print(f"{label:<28} mean={statistics.mean(latencies):8.3f}ms size={size:>9,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50, help="計測回数")
+    args = parser.parse_args()
+
+    payloads = {
+        "typical": generate_candidates(14, 9 * 60, 18 * 60, 60, weekdays_only=True),
+        "worst": generate_candidates(90, 0, 24 * 60, 30, weekdays_only=False),
+    }
+    for label, candidates in payloads.items():
+        print(f"\n{label}: {len(candidates)} candidates")
+
+        legacy, legacy_body = measure(
+            lambda: json.dumps(
+                AvailabilityResponse(common_availability=candidates).model_dump(),
+                ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8"),
+            args.repeat
+        )
+        current, body = measure(
+            lambda: orjson.dumps({"common_availability": candidates, "next_cursor": None}),
+            args.repeat
+        )
+        report("encode: model + json", legacy, len(legacy_body))
+        report("encode: orjson", current, len(body))
+        print(f"encode speedup: {statistics.mean(legacy) / statistics.mean(current):.1f}x")
+
+        compressed, gzip_body = measure(lambda: gzip.compress(body, GZIP_LEVEL), args.repeat)
+        report(f"gzip (level {GZIP_LEVEL})", compressed, len(gzip_body))
+        if brotli is not None:
+            compressed, brotli_body = measure(lambda: brotli.compress(body, quality=BROTLI_QUALITY), args.repeat)
+            report(f"brotli (quality {BROTLI_QUALITY})", compressed, len(brotli_body))
+
+
+if __name__ == "__main__":
+    main()
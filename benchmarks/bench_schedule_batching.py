@@ -0,0 +1,103 @@
+"""
+採用キャンペーンのピーク（面接担当者・期間が重なる多数のフォームが同時に開かれる状況）での、
+getSchedule の送信回数と get_schedules の処理時間を比較するベンチマーク。
+- window=0: 同じ内容の取得の共有のみ（異なるフォームの取得はまとめない）
+- window=N: N ミリ秒のあいだに要求された取得をまとめて送信する
+Graph API の代わりに、1回の送信ごとに --rtt ミリ秒の遅延を加えるローカルの代替関数を使用する。
+各フォームは --pool 人の面接担当者から --users 人を選び、開始日を少しずつずらした期間の空き時間を取得する。
+
+実行方法:
+    python -m benchmarks.bench_schedule_batching --forms 60 --pool 8 --users 3 --rtt 150 --window 25
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.internal import graph_api
+from app.internal.availability_cache import availability_cache
+from app.internal.schedule_batcher import ScheduleBatcher
+from app.schemas import ScheduleRequest, User
+
+
+def stand_in_graph_post(rtt: float, sent: list):
+    """getSchedule の代わりに、要求された期間をすべて空きとするレスポンスを rtt 秒後に返す関数を作成する"""
+    def graph_post(url, access_token, json):
+        sent.append(json)
+        time.sleep(rtt)
+        start = datetime.fromisoformat(json["startTime"]["dateTime"])
+        end = datetime.fromisoformat(json["endTime"]["dateTime"])
+        slots = int((end - start).total_seconds() // 1800)
+        response = MagicMock()
+        response.json.return_value = {"value": [
+            {"scheduleId": email, "availabilityView": "0" * slots} for email in json["schedules"]
+        ]}
+        return response
+    return graph_post
+
+
+def form_requests(forms: int, pool: int, users: int, seed: int = 0) -> list:
+    """面接担当者・期間が重なるフォームのスケジュールリクエストを作成する"""
+    rng = random.Random(seed)
+    interviewers = [f"interviewer{i}@example.com" for i in range(pool)]
+    requests = []
+    for _ in range(forms):
+        start = date(2025, 1, 6) + timedelta(days=rng.randrange(5))
+        requests.append(ScheduleRequest(
+            start_date=start.isoformat(),
+            end_date=(start + timedelta(days=13)).isoformat(),
+            start_time="09:00",
+            end_time="18:00",
+            selected_days=["月", "火", "水", "木", "金"],
+            duration_minutes=60,
+            users=[User(email=email) for email in rng.sample(interviewers, users)],
+            required_participants=users
+        ))
+    return requests
+
+
+def run(label: str, window: float, requests: list, rtt: float) -> None:
+    availability_cache.clear()
+    sent = []
+    batcher = ScheduleBatcher(window, graph_api.fetch_requested_day_views)
+    with patch.object(graph_api, "get_access_token", return_value="token"), \
+         patch.object(graph_api, "graph_post", stand_in_graph_post(rtt, sent)), \
+         patch.object(graph_api, "schedule_batcher", batcher), \
+         ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        def timed(schedule_req):
+            started = time.perf_counter()
+            graph_api.get_schedules(schedule_req)
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        latencies = list(executor.map(timed, requests))
+        elapsed = (time.perf_counter() - started) * 1000
+    print(f"{label:<12} getSchedule calls={len(sent):>3} "
+          f"mean={statistics.mean(latencies):7.1f}ms p95={statistics.quantiles(latencies, n=20)[-1]:7.1f}ms "
+          f"wall={elapsed:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--forms", type=int, default=60, help="同時に開かれるフォームの数")
+    parser.add_argument("--pool", type=int, default=8, help="面接担当者の人数")
+    parser.add_argument("--users", type=int, default=3, help="1フォームあたりの面接担当者の人数")
+    parser.add_argument("--rtt", type=float, default=150.0, help="getSchedule 1回あたりの遅延（ミリ秒）")
+    parser.add_argument("--window", type=float, default=25.0, help="取得をまとめる時間（ミリ秒）")
+    args = parser.parse_args()
+
+    requests = form_requests(args.forms, args.pool, args.users)
+    run("window=0", 0, requests, args.rtt / 1000)
+    run(f"window={args.window:g}", args.window / 1000, requests, args.rtt / 1000)
+
+
+if __name__ == "__main__":
+    main()
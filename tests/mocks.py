@@ -1,5 +1,9 @@
+from contextlib import ExitStack
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+
 def mock_cosmos_client():
     """Cosmos DBクライアントのモック"""
     mock_container = MagicMock()
@@ -55,3 +59,205 @@ def mock_send_email():
 def mock_send_no_available_schedule_emails():
     """可能な日程がない場合のメール送信のモック"""
     return None 
+
+
+class FakeCosmosContainer:
+    """
+    Cosmos DB のコンテナクライアントのインメモリ実装（ポイント操作とパッチのみ）
+    書き込みのたびに _etag を更新し、etag / match_condition と filter_predicate の前提条件を検査する
+    （filter_predicate は filters に登録した条件文字列 → 判定関数で評価する）
+    """
+
+    def __init__(self, filters=None):
+        # (id, partitionKey) → ドキュメント
+        self.items = {}
+        self.calls = []
+        self.filters = filters or {}
+        self._version = 0
+
+    def _get(self, item, partition_key):
+        from azure.cosmos import exceptions
+        doc = self.items.get((item, partition_key))
+        if doc is None:
+            raise exceptions.CosmosResourceNotFoundError(status_code=404, message=f"{item} not found")
+        return doc
+
+    def _check(self, doc, etag=None, match_condition=None, filter_predicate=None, **kwargs):
+        from azure.core import MatchConditions
+        from azure.cosmos import exceptions
+        if match_condition == MatchConditions.IfNotModified and doc.get("_etag") != etag:
+            raise exceptions.CosmosAccessConditionFailedError(status_code=412, message="etag mismatch")
+        if filter_predicate is not None and not self.filters[filter_predicate](doc):
+            raise exceptions.CosmosAccessConditionFailedError(status_code=412, message="filter not satisfied")
+
+    def _store(self, body):
+        self._version += 1
+        doc = {**body, "_etag": f'"{self._version}"'}
+        self.items[(doc["id"], doc.get("partitionKey"))] = doc
+        return dict(doc)
+
+    def get(self, item):
+        """パーティションを問わず、指定した id のドキュメントを返す（無い場合は None）"""
+        return next((doc for (doc_id, _), doc in self.items.items() if doc_id == item), None)
+
+    def discard(self, item):
+        """パーティションを問わず、指定した id のドキュメントを削除する"""
+        for key in [key for key in self.items if key[0] == item]:
+            del self.items[key]
+
+    def create_item(self, body, **kwargs):
+        from azure.cosmos import exceptions
+        self.calls.append(("create_item", body["id"]))
+        if (body["id"], body.get("partitionKey")) in self.items:
+            raise exceptions.CosmosResourceExistsError(status_code=409, message=f"{body['id']} exists")
+        return self._store(body)
+
+    def upsert_item(self, body, **kwargs):
+        self.calls.append(("upsert_item", body["id"]))
+        return self._store(body)
+
+    def read_item(self, item, partition_key, etag=None, match_condition=None, **kwargs):
+        from azure.core import MatchConditions
+        self.calls.append(("read_item", item))
+        doc = self._get(item, partition_key)
+        if match_condition == MatchConditions.IfModified and doc.get("_etag") == etag:
+            # 304 Not Modified（本文なし）
+            return {}
+        return dict(doc)
+
+    def replace_item(self, item, body, **kwargs):
+        self.calls.append(("replace_item", item))
+        self._check(self._get(item, body.get("partitionKey")), **kwargs)
+        return self._store(body)
+
+    def patch_item(self, item, partition_key, patch_operations, **kwargs):
+        self.calls.append(("patch_item", item))
+        return self._patch(item, partition_key, patch_operations, **kwargs)
+
+    def _patch(self, item, partition_key, patch_operations, **kwargs):
+        self._check(self._get(item, partition_key), **kwargs)
+        doc = dict(self._get(item, partition_key))
+        for operation in patch_operations:
+            path = operation["path"].strip("/").split("/")
+            if operation["op"] == "add" and path[-1] == "-":
+                doc.setdefault(path[0], []).append(operation["value"])
+            elif operation["op"] in ("set", "add", "replace"):
+                doc[path[0]] = operation["value"]
+            elif operation["op"] == "remove":
+                doc.pop(path[0], None)
+        return self._store(doc)
+
+    def execute_item_batch(self, batch_operations, partition_key, **kwargs):
+        """トランザクションバッチ（patch / delete のみ）。いずれかが失敗した場合は、どの操作も反映しない"""
+        from azure.core import MatchConditions
+        from azure.cosmos import exceptions
+        self.calls.append(("execute_item_batch", partition_key))
+        snapshot = (dict(self.items), self._version)
+        for index, operation in enumerate(batch_operations):
+            name, args = operation[0], operation[1]
+            options = operation[2] if len(operation) > 2 else {}
+            conditions = {}
+            if "if_match_etag" in options:
+                conditions = {"etag": options["if_match_etag"], "match_condition": MatchConditions.IfNotModified}
+            try:
+                if name == "patch":
+                    self._patch(args[0], partition_key, args[1], **conditions)
+                elif name == "delete":
+                    self._delete(args[0], partition_key, **conditions)
+                else:
+                    raise NotImplementedError(name)
+            except exceptions.CosmosHttpResponseError as e:
+                self.items, self._version = snapshot
+                raise exceptions.CosmosBatchOperationError(
+                    error_index=index, headers={}, status_code=e.status_code, message=str(e), operation_responses=[]
+                )
+        return []
+
+    def delete_item(self, item, partition_key, **kwargs):
+        self.calls.append(("delete_item", item))
+        self._delete(item, partition_key, **kwargs)
+
+    def _delete(self, item, partition_key, **kwargs):
+        self._check(self._get(item, partition_key), **kwargs)
+        del self.items[(item, partition_key)]
+
+    def count(self, name):
+        """指定した操作が呼び出された回数"""
+        return sum(1 for call, _ in self.calls if call == name)
+
+
+class AsyncFakeCosmosContainer:
+    """
+    FakeCosmosContainer の非同期版（azure.cosmos.aio のコンテナクライアントと同じく、操作はコルーチン）
+    状態の確認（items, calls, get, count など）は内部の FakeCosmosContainer に委譲する
+    """
+
+    def __init__(self, filters=None):
+        self.sync = FakeCosmosContainer(filters)
+
+    def __getattr__(self, name):
+        return getattr(self.sync, name)
+
+    async def create_item(self, body, **kwargs):
+        return self.sync.create_item(body, **kwargs)
+
+    async def upsert_item(self, body, **kwargs):
+        return self.sync.upsert_item(body, **kwargs)
+
+    async def read_item(self, item, partition_key, **kwargs):
+        return self.sync.read_item(item, partition_key, **kwargs)
+
+    async def replace_item(self, item, body, **kwargs):
+        return self.sync.replace_item(item, body, **kwargs)
+
+    async def patch_item(self, item, partition_key, patch_operations, **kwargs):
+        return self.sync.patch_item(item, partition_key, patch_operations, **kwargs)
+
+    async def execute_item_batch(self, batch_operations, partition_key, **kwargs):
+        return self.sync.execute_item_batch(batch_operations, partition_key, **kwargs)
+
+    async def delete_item(self, item, partition_key, **kwargs):
+        return self.sync.delete_item(item, partition_key, **kwargs)
+
+
+@pytest.fixture
+def cosmos_patches():
+    """
+    container・async_container フィクスチャで、あわせて差し替える (対象, 属性名, 値) のリスト
+    （パーティションの方式など、テストファイルごとに変える場合はテストファイルで同じ名前のフィクスチャを定義する）
+    """
+    return []
+
+
+def unconfirmed_filters() -> dict:
+    """未確定のフォームだけを更新する条件（cosmos.UNCONFIRMED_FILTER）の判定関数"""
+    from app.internal import cosmos
+    return {cosmos.UNCONFIRMED_FILTER: lambda doc: not doc.get("isConfirmed")}
+
+
+@pytest.fixture
+def container(cosmos_patches):
+    """インメモリの Cosmos DB コンテナ（フォームキャッシュを空にし、cosmos.get_container を差し替える）"""
+    from app.internal import cosmos
+    from app.internal.form_cache import form_cache
+    form_cache.clear()
+    fake = FakeCosmosContainer(filters=unconfirmed_filters())
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(cosmos, "get_container", lambda: fake))
+        for target, name, value in cosmos_patches:
+            stack.enter_context(patch.object(target, name, value))
+        yield fake
+
+
+@pytest.fixture
+def async_container(cosmos_patches):
+    """インメモリの Cosmos DB コンテナ（非同期版、cosmos_async.get_async_container を差し替える）"""
+    from app.internal import cosmos_async
+    from app.internal.form_cache import form_cache
+    form_cache.clear()
+    fake = AsyncFakeCosmosContainer(filters=unconfirmed_filters())
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(cosmos_async, "get_async_container", lambda: fake))
+        for target, name, value in cosmos_patches:
+            stack.enter_context(patch.object(target, name, value))
+        yield fake
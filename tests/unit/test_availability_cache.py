@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal import availability_cache as cache_module
+from app.internal.availability_cache import AvailabilityCache, ENTRY_OVERHEAD_BYTES
+
+DAY_VIEW = "0" * 48
+
+
+def test_entries_expire_after_ttl():
+    """TTL を過ぎたエントリはミスとして扱われることのテスト"""
+    cache = AvailabilityCache(ttl=60, max_bytes=1024 * 1024)
+    with patch.object(cache_module.time, "monotonic", return_value=1000.0):
+        cache.put_many({("a@example.com", "2025-01-06"): DAY_VIEW}, 30, "Tokyo Standard Time")
+        assert cache.get_many(["A@example.com"], ["2025-01-06"], 30, "Tokyo Standard Time") == {
+            ("A@example.com", "2025-01-06"): DAY_VIEW
+        }
+    with patch.object(cache_module.time, "monotonic", return_value=1060.0):
+        assert cache.get_many(["a@example.com"], ["2025-01-06"], 30, "Tokyo Standard Time") == {}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 0)
+
+
+def test_least_recently_used_entries_are_evicted():
+    """メモリ上限を超えた場合に、最も長く使われていないエントリから破棄されることのテスト"""
+    cache = AvailabilityCache(ttl=60, max_bytes=2 * (len(DAY_VIEW) + ENTRY_OVERHEAD_BYTES))
+    cache.put_many({("a@example.com", "2025-01-06"): DAY_VIEW, ("b@example.com", "2025-01-06"): DAY_VIEW}, 30, "UTC")
+    cache.get_many(["a@example.com"], ["2025-01-06"], 30, "UTC")
+    cache.put_many({("c@example.com", "2025-01-06"): DAY_VIEW}, 30, "UTC")
+
+    found = cache.get_many(["a@example.com", "b@example.com", "c@example.com"], ["2025-01-06"], 30, "UTC")
+    assert set(found) == {("a@example.com", "2025-01-06"), ("c@example.com", "2025-01-06")}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_removes_user_entries():
+    """指定したユーザーのエントリのみが破棄されることのテスト"""
+    cache = AvailabilityCache(ttl=60, max_bytes=1024 * 1024)
+    cache.put_many({("a@example.com", "2025-01-06"): DAY_VIEW, ("b@example.com", "2025-01-06"): DAY_VIEW}, 30, "UTC")
+    cache.invalidate(["A@example.com"])
+
+    found = cache.get_many(["a@example.com", "b@example.com"], ["2025-01-06"], 30, "UTC")
+    assert set(found) == {("b@example.com", "2025-01-06")}
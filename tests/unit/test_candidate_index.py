@@ -0,0 +1,106 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal import cosmos
+
+# container フィクスチャ（インメモリの Cosmos DB コンテナ）は tests/mocks.py で定義する
+pytest_plugins = ["tests.mocks"]
+
+SLOT_A = ["2025-01-10T10:00:00", "2025-01-10T11:00:00"]
+SLOT_B = ["2025-01-10T13:00:00", "2025-01-10T14:00:00"]
+
+
+def store(candidates):
+    """候補日を含むフォームを保存する"""
+    return cosmos.create_form_data({"candidates": candidates, "isConfirmed": False})
+
+
+def test_slot_key_normalizes_formats():
+    """表記が異なる同じ日時の候補日が、同じインデックスのキーになることのテスト"""
+    assert cosmos.slot_key(SLOT_A) == cosmos.slot_key(["2025-01-10 10:00", "2025-01-10T11:00:00.000"])
+    assert cosmos.exclude_candidate([SLOT_A, SLOT_B], ["2025-01-10 10:00", "2025-01-10 11:00"]) == [SLOT_B]
+
+
+def test_create_form_data_indexes_candidates(container):
+    """フォームの保存時に、候補日ごとのインデックスにトークンが登録されることのテスト"""
+    first = store([SLOT_A, SLOT_B])
+    second = store([SLOT_A])
+
+    assert container.get(cosmos.slot_key(SLOT_A))["tokens"] == [first, second]
+    assert container.get(cosmos.slot_key(SLOT_B))["tokens"] == [first]
+
+
+def test_slot_index_expires_after_slot_end(container):
+    """インデックスの有効期限が最終更新からではなく、候補日の終了日時から設定されることのテスト"""
+    future = ["2099-01-10T10:00:00", "2099-01-10T11:00:00"]
+    store([SLOT_A, future])
+    store([future])
+
+    # 終了日時を過ぎた候補日は SLOT_INDEX_TTL_MARGIN だけ保持する
+    assert container.get(cosmos.slot_key(SLOT_A))["ttl"] == cosmos.SLOT_INDEX_TTL_MARGIN
+    remaining = (datetime(2099, 1, 10, 11) - datetime.now()).total_seconds() + cosmos.SLOT_INDEX_TTL_MARGIN
+    assert abs(container.get(cosmos.slot_key(future))["ttl"] - remaining) < 60
+
+
+def test_remove_candidate_touches_only_indexed_forms(container):
+    """予約時に、インデックスに登録されたフォームだけが読み込み・更新されることのテスト"""
+    selected = store([SLOT_A, SLOT_B])
+    other = store([SLOT_A, SLOT_B])
+    unrelated = store([SLOT_B])
+    expired = store([SLOT_A])
+    container.discard(expired)
+    container.calls.clear()
+
+    cosmos.remove_candidate_from_other_forms(selected, SLOT_A)
+
+    assert container.get(other)["candidates"] == [SLOT_B]
+    assert container.get(selected)["candidates"] == [SLOT_A, SLOT_B]
+    assert container.get(unrelated)["candidates"] == [SLOT_B]
+    assert container.get(cosmos.slot_key(SLOT_A)) is None
+    assert ("read_item", unrelated) not in container.calls
+    assert container.count("patch_item") == 1
+
+
+def test_remove_candidate_batches_forms_in_same_partition(container):
+    """同じパーティションのフォームが、上限件数ごとのトランザクションバッチでまとめて更新されることのテスト"""
+    with patch.object(cosmos, "PARTITION_STRATEGY", "legacy"), patch.object(cosmos, "BATCH_MAX_OPERATIONS", 2):
+        selected = store([SLOT_A])
+        others = [store([SLOT_A, SLOT_B]) for _ in range(5)]
+        container.calls.clear()
+
+        cosmos.remove_candidate_from_other_forms(selected, SLOT_A)
+
+    assert all(container.get(other)["candidates"] == [SLOT_B] for other in others)
+    assert container.count("execute_item_batch") == 3
+    assert container.count("patch_item") == 0
+
+
+def test_remove_candidate_falls_back_when_batch_fails(container):
+    """バッチ内のフォームが読み込み後に更新されていた場合、フォームごとに読み込み直して更新されることのテスト"""
+    with patch.object(cosmos, "PARTITION_STRATEGY", "legacy"):
+        selected = store([SLOT_A])
+        first, second = store([SLOT_A, SLOT_B]), store([SLOT_A])
+        read_form = cosmos.read_form_or_none
+        modified = []
+
+        def read_then_modify(token):
+            form = read_form(token)
+            if token == second and not modified:
+                # 最初の読み込みの直後に、他のリクエストがフォームを更新する
+                modified.append(token)
+                container.patch_item(item=second, partition_key=cosmos.PARTITION_KEY,
+                                     patch_operations=[{"op": "set", "path": "/note", "value": "edited"}])
+            return form
+
+        with patch.object(cosmos, "read_form_or_none", read_then_modify):
+            cosmos.remove_candidate_from_other_forms(selected, SLOT_A)
+
+    assert container.get(first)["candidates"] == [SLOT_B]
+    assert container.get(second)["candidates"] == []
+    assert container.get(second)["note"] == "edited"
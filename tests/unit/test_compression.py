@@ -0,0 +1,80 @@
+import gzip
+import sys
+from pathlib import Path
+
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.utils.compression import CompressionMiddleware, select_encoding
+from app.utils.responses import ORJSONResponse
+
+LARGE_BODY = '["2025-01-10T09:00:00","2025-01-10T10:00:00"]' * 100
+
+
+def create_client():
+    """テスト用のアプリケーション（圧縮の閾値は 1024 バイト）"""
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/small")
+    def small():
+        return {"message": "ok"}
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_BODY)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([LARGE_BODY, "\n", LARGE_BODY]), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_select_encoding():
+    """brotli を優先し、q=0 のエンコーディングを選ばないことのテスト"""
+    assert select_encoding("gzip, deflate, br") == "br"
+    assert select_encoding("gzip, br;q=0") == "gzip"
+    assert select_encoding("identity") is None
+    assert select_encoding(None) is None
+
+
+def test_compresses_only_large_responses():
+    """閾値以上のレスポンスだけが、クライアントが受け入れ可能な形式で圧縮されることのテスト"""
+    client = create_client()
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"message": "ok"}
+
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert int(large.headers["content-length"]) < len(LARGE_BODY)
+    assert large.text == LARGE_BODY
+
+    raw = client.get("/large", headers={"Accept-Encoding": "br"})
+    assert raw.headers["content-encoding"] == "br"
+    assert raw.text == LARGE_BODY
+
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+
+def test_compresses_streaming_responses():
+    """ストリーミングのレスポンスが、チャンクごとに圧縮されても元の内容に復元できることのテスト"""
+    client = create_client()
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == LARGE_BODY + "\n" + LARGE_BODY
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "br"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert brotli.decompress(raw).decode() == LARGE_BODY + "\n" + LARGE_BODY
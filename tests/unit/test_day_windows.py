@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal.availability import compute_common_times
+from app.schemas import ScheduleRequest, User
+from app.utils.day_windows import parse_selected_weekdays, plan_day_windows
+
+
+def schedule_request(start_time, end_time, selected_days, required_participants=2, end_date="2025-01-08"):
+    """テスト用のスケジュールリクエスト（2025-01-06 は月曜日）"""
+    return ScheduleRequest(
+        start_date="2025-01-06",
+        end_date=end_date,
+        start_time=start_time,
+        end_time=end_time,
+        selected_days=selected_days,
+        duration_minutes=60,
+        users=[User(email="a@example.com"), User(email="b@example.com")],
+        required_participants=required_participants,
+        time_zone="Tokyo Standard Time"
+    )
+
+
+def test_parse_selected_weekdays():
+    """日本語・英語の曜日名の解釈と、指定が無い場合にすべての曜日になることのテスト"""
+    assert parse_selected_weekdays(["月", "水曜日", "Friday", "sun"]) == {0, 2, 4, 6}
+    assert parse_selected_weekdays(["unknown"]) == set(range(7))
+    assert parse_selected_weekdays([]) == set(range(7))
+
+
+def test_plan_day_windows():
+    """選択された曜日の時間帯の枠だけが、起点日からの経過分に対応付けられることのテスト"""
+    plan = plan_day_windows(schedule_request("09:15", "11:00", ["月", "水"]))
+
+    assert plan.days == ["2025-01-06", "2025-01-08"]
+    assert plan.fetch_days == ["2025-01-06", "2025-01-08"]
+    # 開始時刻は切り上げ（9:30）、終了時刻は切り捨て（11:00）
+    assert plan.slot_offsets.tolist() == [570, 600, 630, 2 * 1440 + 570, 2 * 1440 + 600, 2 * 1440 + 630]
+    assert plan.run_start_mask(2).tolist() == [True, True, False, True, True, False]
+
+
+def test_plan_day_windows_overnight():
+    """終了時刻が開始時刻以前の場合に、翌日までを1つの時間帯とすることのテスト"""
+    plan = plan_day_windows(schedule_request("23:00", "01:00", ["月"]))
+
+    assert plan.window_slots == 4
+    assert plan.fetch_days == ["2025-01-06", "2025-01-07"]
+    assert plan.window_view(["0" * 46 + "12", "34" + "2" * 46]) == "1234"
+
+
+def test_compute_common_times_stays_within_windows():
+    """空き時間候補が夜間や選択されていない曜日をまたがないことのテスト"""
+    # 月曜・水曜の 17:00〜18:00（2枠）が連結された、全員空きの availabilityView
+    schedule_info = {"value": [{"availabilityView": "0000"}, {"availabilityView": "0000"}]}
+
+    for required_participants in (2, 1):
+        assert compute_common_times(schedule_request("17:00", "18:00", ["月", "水"], required_participants), schedule_info) == [
+            ["2025-01-06T17:00:00", "2025-01-06T18:00:00"],
+            ["2025-01-08T17:00:00", "2025-01-08T18:00:00"],
+        ]
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal import cosmos
+from app.internal import form_cache as cache_module
+from app.internal.form_cache import FormCache, form_cache
+
+# container フィクスチャ（インメモリの Cosmos DB コンテナ）は tests/mocks.py で定義する
+pytest_plugins = ["tests.mocks"]
+
+SLOT_A = ["2025-01-10T10:00:00", "2025-01-10T11:00:00"]
+
+
+def form(token, etag="1", ts=1000.0):
+    return {"id": token, "partitionKey": token, "_etag": etag, "_ts": ts}
+
+
+def test_entries_are_bounded_and_expire_with_document_ttl():
+    """エントリ数の上限を超えると最も長く使われていないものが破棄され、ドキュメントの有効期限後は破棄されることのテスト"""
+    cache = FormCache(max_entries=2, revalidate_after=60, default_ttl=100)
+    with patch.object(cache_module.time, "time", return_value=1050.0):
+        for token in ("a", "b"):
+            cache.put(token, form(token), cache.version())
+        cache.get("a")
+        cache.put("c", form("c"), cache.version())
+        assert cache.get("b") == (None, True)
+        assert cache.get("a")[0]["id"] == "a"
+    with patch.object(cache_module.time, "time", return_value=1100.0):
+        assert cache.get("a") == (None, True)
+
+    stats = cache.stats()
+    assert (stats["evictions"], stats["entries"]) == (1, 1)
+
+
+def test_read_during_invalidation_is_not_cached():
+    """読み込み中にエントリが破棄された場合、読み込み結果が保存されないことのテスト"""
+    cache = FormCache(max_entries=10, revalidate_after=60, default_ttl=0)
+    version = cache.version()
+    cache.invalidate("a")
+    cache.put("a", form("a"), version)
+
+    assert cache.get("a") == (None, True)
+
+
+def test_get_form_data_revalidates_with_etag_and_invalidates_on_write(container):
+    """キャッシュ済みのフォームは条件付きの読み込みで再検証され、更新後は読み込み直されることのテスト"""
+    token = cosmos.create_form_data({"candidates": [SLOT_A], "isConfirmed": False})
+    container.calls.clear()
+
+    cosmos.get_form_data(token)
+    cosmos.get_form_data(token)
+    assert container.count("read_item") == 1
+
+    assert cosmos.get_form_data(token, revalidate=True)["isConfirmed"] is False
+    assert container.count("read_item") == 2
+    assert form_cache.stats()["revalidations"] == 1
+
+    cosmos.confirm_form(token)
+    assert cosmos.get_form_data(token)["isConfirmed"] is True
+    assert container.count("read_item") == 3
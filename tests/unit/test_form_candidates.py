@@ -0,0 +1,85 @@
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal import cosmos, form_candidates
+
+# container フィクスチャ（インメモリの Cosmos DB コンテナ）は tests/mocks.py で定義する
+pytest_plugins = ["tests.mocks"]
+
+SLOT_A = ["2025-01-10T10:00:00", "2025-01-10T11:00:00"]
+SLOT_B = ["2025-01-10T13:00:00", "2025-01-10T14:00:00"]
+FORM = {
+    "start_date": "2025-01-10", "end_date": "2025-01-10", "start_time": "09:00", "end_time": "18:00",
+    "selected_days": ["金"], "duration_minutes": 60, "users": [{"email": "interviewer@example.com"}],
+    "isConfirmed": False, "candidates": [SLOT_A]
+}
+
+
+@pytest.fixture
+def cosmos_patches():
+    """空き時間候補の計算結果は [SLOT_A, SLOT_B] とする"""
+    return [
+        (form_candidates, "get_schedules", MagicMock(return_value={"value": []})),
+        (form_candidates, "compute_common_times", MagicMock(return_value=[SLOT_A, SLOT_B])),
+    ]
+
+
+def test_refresh_saves_candidates_with_computed_at_and_indexes_new_slots(container):
+    """計算した空き時間候補が計算時刻とともに保存され、新しい候補日だけがインデックスに登録されることのテスト"""
+    token = cosmos.create_form_data(dict(FORM))
+    form = cosmos.get_form_data(token)
+    assert not form_candidates.candidates_fresh(form)
+
+    with patch.object(form_candidates.time, "time", return_value=1000.0):
+        assert form_candidates.refresh_form_candidates(form) == [SLOT_A, SLOT_B]
+
+    stored = container.get(token)
+    assert (stored["candidates"], stored["candidatesComputedAt"]) == ([SLOT_A, SLOT_B], 1000.0)
+    assert container.get(cosmos.slot_key(SLOT_A))["tokens"] == [token]
+    assert container.get(cosmos.slot_key(SLOT_B))["tokens"] == [token]
+    with patch.object(form_candidates.time, "time", return_value=1000.0 + form_candidates.FORM_CANDIDATES_MAX_AGE - 1):
+        assert form_candidates.candidates_fresh(cosmos.get_form_data(token))
+    with patch.object(form_candidates.time, "time", return_value=1000.0 + form_candidates.FORM_CANDIDATES_MAX_AGE):
+        assert not form_candidates.candidates_fresh(cosmos.get_form_data(token))
+
+
+def test_refresh_does_not_overwrite_form_updated_during_computation(container):
+    """計算中に他のフォームの予約で候補日が削除された場合、計算結果で上書きしないことのテスト"""
+    token = cosmos.create_form_data(dict(FORM))
+    form = cosmos.get_form_data(token)
+    cosmos.remove_candidate_from_form(token, SLOT_A)
+
+    assert form_candidates.refresh_form_candidates(form) == [SLOT_A, SLOT_B]
+
+    stored = container.get(token)
+    assert stored["candidates"] == []
+    assert "candidatesComputedAt" not in stored
+
+
+def test_concurrent_refreshes_of_same_form_share_one_computation(container):
+    """同じフォームの再計算を実行中に再計算を要求した場合、実行中の再計算の結果を共有することのテスト"""
+    token = cosmos.create_form_data(dict(FORM))
+    release = threading.Event()
+
+    def slow_get_schedules(schedule_request):
+        release.wait(5)
+        return {"value": []}
+
+    with patch.object(form_candidates, "get_schedules", side_effect=slow_get_schedules) as get_schedules:
+        first = form_candidates.refresh_in_background(token)
+        second = form_candidates.refresh_in_background(token, cosmos.get_form_data(token))
+        release.set()
+        assert first is second
+        assert first.result(5) == [SLOT_A, SLOT_B]
+        assert get_schedules.call_count == 1
+
+        form_candidates.refresh_in_background(token).result(5)
+        assert get_schedules.call_count == 2
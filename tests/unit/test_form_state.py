@@ -0,0 +1,225 @@
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal import cosmos, cosmos_async, graph_api, graph_api_async
+from app.routers import schedule, schedule_async
+
+# container・async_container フィクスチャ（インメモリの Cosmos DB コンテナ）は tests/mocks.py で定義する
+pytest_plugins = ["tests.mocks"]
+
+SLOT_A = ["2025-01-10T10:00:00", "2025-01-10T11:00:00"]
+SLOT_B = ["2025-01-10T13:00:00", "2025-01-10T14:00:00"]
+
+
+def store(candidates):
+    """候補日を含むフォームを保存する"""
+    return cosmos.create_form_data({"candidates": candidates, "isConfirmed": False})
+
+
+def test_finalize_form_confirms_in_one_patch(container):
+    """予約時に、対象フォームの確定とイベントIDの保存が1回のパッチで行われることのテスト"""
+    token = store([SLOT_A, SLOT_B])
+    other = store([SLOT_A])
+    container.calls.clear()
+
+    cosmos.finalize_form(token, SLOT_A, {"a@example.com": "event-1"})
+
+    form = container.get(token)
+    assert form["isConfirmed"] is True
+    assert form["event_ids"] == {"a@example.com": "event-1"}
+    assert [call for call in container.calls if call[1] == token] == [("patch_item", token)]
+    assert container.get(other)["candidates"] == []
+
+
+def test_finalize_form_rejects_concurrent_booking(container):
+    """確定済みのフォームを予約すると、イベントIDや他のフォームを変更せずに競合となることのテスト"""
+    token = store([SLOT_A, SLOT_B])
+    other = store([SLOT_B])
+    cosmos.finalize_form(token, SLOT_A, {"a@example.com": "event-1"})
+
+    with pytest.raises(cosmos.FormConflictError):
+        cosmos.finalize_form(token, SLOT_B, {"a@example.com": "event-2"})
+
+    assert container.get(token)["event_ids"] == {"a@example.com": "event-1"}
+    assert container.get(other)["candidates"] == [SLOT_B]
+
+
+def test_reset_form_requires_unchanged_etag(container):
+    """読み込み後に更新されたフォームは、リスケジュール時に上書きされないことのテスト"""
+    token = store([SLOT_A])
+    cosmos.finalize_form(token, SLOT_A, {"a@example.com": "event-1", "b@example.com": "event-2"})
+    form = cosmos.get_form_data(token)
+    stale = dict(form)
+
+    cosmos.reset_form(form, {"b@example.com": "event-2"})
+    assert container.get(token)["event_ids"] == {"b@example.com": "event-2"}
+    assert container.get(token)["isConfirmed"] is True
+
+    with pytest.raises(cosmos.FormConflictError):
+        cosmos.reset_form(stale)
+
+    cosmos.reset_form(cosmos.get_form_data(token))
+    assert container.get(token)["isConfirmed"] is False
+    assert "event_ids" not in container.get(token)
+
+
+def test_async_finalize_and_reset_form(async_container):
+    """非同期版でも、予約が1回のパッチで確定・他フォームの候補日の削除を行い、競合と古い ETag を拒否することのテスト"""
+    async def scenario():
+        token = await cosmos_async.create_form_data({"candidates": [SLOT_A, SLOT_B], "isConfirmed": False})
+        other = await cosmos_async.create_form_data({"candidates": [SLOT_A], "isConfirmed": False})
+        async_container.calls.clear()
+
+        await cosmos_async.finalize_form(token, SLOT_A, {"a@example.com": "event-1"})
+        assert [call for call in async_container.calls if call[1] == token] == [("patch_item", token)]
+        assert async_container.get(other)["candidates"] == []
+        with pytest.raises(cosmos.FormConflictError):
+            await cosmos_async.finalize_form(token, SLOT_B, {"a@example.com": "event-2"})
+
+        form = await cosmos_async.get_form_data(token)
+        stale = dict(form)
+        await cosmos_async.reset_form(form)
+        with pytest.raises(cosmos.FormConflictError):
+            await cosmos_async.reset_form(stale)
+        return token
+
+    token = asyncio.run(scenario())
+    assert async_container.get(token)["isConfirmed"] is False
+    assert "event_ids" not in async_container.get(token)
+
+
+@pytest.mark.parametrize("router, token_function, mock", [
+    (schedule, "get_access_token", MagicMock),
+    (schedule_async, "get_access_token_async", AsyncMock),
+])
+def test_appointment_conflict_deletes_registered_events(router, token_function, mock):
+    """同じフォームが同時に予約された場合、登録した予定を取り消して 409 を返すことのテスト（同期版・非同期版）"""
+    deleted = {user_email: {"deleted": True, "status": 204, "error": None} for user_email in ("a@example.com", "b@example.com")}
+    response, delete_events = book_conflicting_form(router, token_function, mock, mock(return_value=deleted))
+
+    assert response.status_code == 409
+    delete_events.assert_called_once()
+    assert delete_events.call_args.args[0] == {"a@example.com": "event-a", "b@example.com": "event-b"}
+
+
+@pytest.mark.parametrize("router, token_function, mock", [
+    (schedule, "get_access_token", MagicMock),
+    (schedule_async, "get_access_token_async", AsyncMock),
+])
+def test_appointment_conflict_returns_409_when_compensation_fails(router, token_function, mock, caplog):
+    """登録した予定の取り消しに失敗しても 500 にならず 409 を返し、残った予定をログに記録することのテスト（同期版・非同期版）"""
+    response, delete_events = book_conflicting_form(
+        router, token_function, mock, mock(side_effect=RuntimeError("graph unavailable"))
+    )
+
+    assert response.status_code == 409
+    delete_events.assert_called_once()
+    assert "event-a" in caplog.text and "event-b" in caplog.text
+
+
+def book_conflicting_form(router, token_function, mock, delete_events):
+    """フォームの確定が競合する予約をエンドポイントに送信し、(レスポンス, delete_events_batch のモック) を返す"""
+    app = FastAPI()
+    app.include_router(router.router)
+    body = {
+        "candidate": ",".join(SLOT_A),
+        "users": ["a@example.com", "b@example.com"],
+        "lastname": "山田",
+        "firstname": "太郎",
+        "company": "株式会社サンプル",
+        "email": "taro@example.com",
+        "token": "token-1",
+    }
+    registered = {"a@example.com": {"id": "event-a"}, "b@example.com": {"id": "event-b"}}
+
+    with patch.object(router, token_function, mock(return_value="token")), \
+         patch.object(router, "register_events_batch", mock(return_value=registered)), \
+         patch.object(router, "finalize_form", mock(side_effect=cosmos.FormConflictError("confirmed"))), \
+         patch.object(graph_api_async if router is schedule_async else graph_api, "delete_events_batch", delete_events):
+        return TestClient(app).post("/appointment", json=body), delete_events
+
+
+def throttled(status_code=429, retry_after_ms="50"):
+    """スロットリングなどの一時的なエラー（x-ms-retry-after-ms 付き）"""
+    from azure.cosmos import exceptions
+    error = exceptions.CosmosHttpResponseError(status_code=status_code, message="throttled")
+    error.headers = {"x-ms-retry-after-ms": retry_after_ms}
+    return error
+
+
+def fail_first(fake, name, errors):
+    """fake の操作が、最初の呼び出しで errors を順に送出してから成功するようにする"""
+    operation = getattr(fake, name)
+    pending = list(errors)
+
+    def call(*args, **kwargs):
+        if pending:
+            raise pending.pop(0)
+        return operation(*args, **kwargs)
+
+    return patch.object(fake, name, side_effect=call)
+
+
+def test_patch_and_read_retry_throttling_but_not_conflicts(container):
+    """パッチ・読み込みは 429/449 を x-ms-retry-after-ms だけ待って再試行し、前提条件の不一致は再試行しないことのテスト"""
+    token = store([SLOT_A])
+
+    with fail_first(container, "patch_item", [throttled(), throttled(449)]) as patch_item, \
+         patch.object(cosmos.time, "sleep") as sleep:
+        cosmos.finalize_form(token, SLOT_A, {"a@example.com": "event-1"})
+    assert [c.args for c in sleep.call_args_list] == [(0.05,), (0.05,)]
+    assert patch_item.call_count == 3
+    assert container.get(token)["isConfirmed"] is True
+
+    with fail_first(container, "read_item", [throttled()]), patch.object(cosmos.time, "sleep") as sleep:
+        assert cosmos.read_document(token)["id"] == token
+    sleep.assert_called_once_with(0.05)
+
+    with patch.object(container, "patch_item", wraps=container.patch_item) as patch_item, \
+         patch.object(cosmos.time, "sleep") as sleep, pytest.raises(cosmos.FormConflictError):
+        cosmos.finalize_form(token, SLOT_A, {"a@example.com": "event-2"})
+    assert patch_item.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_index_and_removal_calls_retry_throttling(container):
+    """フォーム・インデックスの作成、予約時のインデックスの読み込み・削除も 429 を再試行することのテスト"""
+    with fail_first(container, "create_item", [throttled(), throttled()]) as create_item, \
+         patch.object(cosmos.time, "sleep") as sleep:
+        selected = store([SLOT_A])
+    assert create_item.call_count == 4
+    assert sleep.call_count == 2
+    other = store([SLOT_A])
+
+    with fail_first(container, "read_item", [throttled()]), fail_first(container, "delete_item", [throttled()]), \
+         patch.object(cosmos.time, "sleep") as sleep:
+        cosmos.remove_candidate_from_other_forms(selected, SLOT_A)
+    assert sleep.call_count == 2
+    assert container.get(other)["candidates"] == []
+    assert container.get(cosmos.slot_key(SLOT_A)) is None
+
+
+def test_async_patch_retries_throttling(async_container):
+    """非同期版のパッチ・作成・インデックスの削除も 429 を再試行することのテスト"""
+    async def scenario():
+        with fail_first(async_container.sync, "create_item", [throttled(retry_after_ms="1")]) as create_item:
+            token = await cosmos_async.create_form_data({"candidates": [SLOT_A], "isConfirmed": False})
+        with fail_first(async_container.sync, "patch_item", [throttled(retry_after_ms="1")]) as patch_item, \
+             fail_first(async_container.sync, "delete_item", [throttled(retry_after_ms="1")]) as delete_item:
+            await cosmos_async.finalize_form(token, SLOT_A, {"a@example.com": "event-1"})
+        return token, create_item.call_count, patch_item.call_count, delete_item.call_count
+
+    token, creates, patches, deletes = asyncio.run(scenario())
+    assert (creates, patches, deletes) == (3, 2, 2)
+    assert async_container.get(token)["isConfirmed"] is True
+    assert async_container.get(cosmos.slot_key(SLOT_A)) is None
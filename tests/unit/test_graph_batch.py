@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from fastapi import HTTPException
+from app.internal import graph_api, graph_api_async
+
+
+def batch_response(responses):
+    """$batch のレスポンスのモック"""
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"responses": responses}
+    return response
+
+
+def test_register_events_batch_retries_only_failed():
+    """失敗したサブリクエストのみが再送されることのテスト"""
+    users = ["a@example.com", "b@example.com", "c@example.com"]
+    first = batch_response([
+        {"id": "0", "status": 201, "body": {"id": "event-a"}},
+        {"id": "1", "status": 503, "body": {"error": "busy"}},
+        {"id": "2", "status": 201, "body": {"id": "event-c"}},
+    ])
+    second = batch_response([
+        {"id": "1", "status": 201, "body": {"id": "event-b"}},
+    ])
+
+    with patch.object(graph_api, "graph_post", side_effect=[first, second]) as mock_post, \
+         patch.object(graph_api.time, "sleep"):
+        events = graph_api.register_events_batch(users, {"subject": "面接"}, {})
+
+    assert events == {
+        "a@example.com": {"id": "event-a"},
+        "b@example.com": {"id": "event-b"},
+        "c@example.com": {"id": "event-c"},
+    }
+    retried = mock_post.call_args_list[1].kwargs["json"]["requests"]
+    assert [sub_request["id"] for sub_request in retried] == ["1"]
+    assert mock_post.call_args_list[0].args[0].endswith("/beta/$batch")
+    # 再送しても同じ transactionId で送信し、Graph API 側で重複して作成されないようにする
+    first_requests = mock_post.call_args_list[0].kwargs["json"]["requests"]
+    assert retried[0]["body"]["transactionId"] == first_requests[1]["body"]["transactionId"]
+    assert len({sub_request["body"]["transactionId"] for sub_request in first_requests}) == 3
+
+
+def test_register_events_batch_splits_into_chunks():
+    """20件を超える場合に複数の $batch に分割されることのテスト"""
+    users = [f"user{i}@example.com" for i in range(25)]
+
+    def respond(url, headers, json):
+        return batch_response([
+            {"id": sub_request["id"], "status": 201, "body": {"id": f"event-{sub_request['id']}"}}
+            for sub_request in json["requests"]
+        ])
+
+    with patch.object(graph_api, "graph_post", side_effect=respond) as mock_post:
+        events = graph_api.register_events_batch(users, {"subject": "面接"}, {})
+
+    assert len(events) == 25
+    assert [len(c.kwargs["json"]["requests"]) for c in mock_post.call_args_list] == [20, 5]
+
+
+def test_register_events_batch_raises_after_max_retries():
+    """リトライ上限に達した場合に HTTPException が発生することのテスト"""
+    failure = batch_response([{"id": "0", "status": 500, "body": {"error": "error"}}])
+
+    with patch.object(graph_api, "graph_post", return_value=failure), \
+         patch.object(graph_api.time, "sleep"):
+        with pytest.raises(HTTPException):
+            graph_api.register_events_batch(["a@example.com"], {"subject": "面接"}, {})
+
+
+def test_delete_events_batch_reports_per_user_outcomes():
+    """削除済み（404）は成功扱いとし、失敗したユーザーのみ未削除として返すことのテスト"""
+    event_ids = {"a@example.com": "event-a", "b@example.com": "event-b", "c@example.com": "event-c"}
+    response = batch_response([
+        {"id": "0", "status": 204},
+        {"id": "1", "status": 404, "body": {"error": "not found"}},
+        {"id": "2", "status": 403, "body": {"error": "forbidden"}},
+    ])
+
+    with patch.object(graph_api, "graph_post", return_value=response) as mock_post, \
+         patch.object(graph_api.time, "sleep"):
+        outcomes = graph_api.delete_events_batch(event_ids, {}, max_retries=1)
+
+    assert outcomes["a@example.com"]["deleted"] is True
+    assert outcomes["b@example.com"]["deleted"] is True
+    assert outcomes["c@example.com"]["deleted"] is False
+    assert outcomes["c@example.com"]["status"] == 403
+    sub_requests = mock_post.call_args.kwargs["json"]["requests"]
+    assert sub_requests[0] == {"id": "0", "method": "DELETE", "url": "/users/a%40example.com/calendar/events/event-a"}
+
+
+def test_async_batches_retry_only_failed_and_report_deletions():
+    """非同期版でも、失敗したサブリクエストのみを再送し、削除済み（404）を成功として扱うことのテスト"""
+    first = batch_response([
+        {"id": "0", "status": 201, "body": {"id": "event-a"}},
+        {"id": "1", "status": 429, "body": {"error": "throttled"}, "headers": {"Retry-After": "1"}},
+    ])
+    second = batch_response([{"id": "1", "status": 201, "body": {"id": "event-b"}}])
+    deletion = batch_response([{"id": "0", "status": 204}, {"id": "1", "status": 404}])
+
+    async def scenario():
+        events = await graph_api_async.register_events_batch(["a@example.com", "b@example.com"], {"subject": "面接"}, {})
+        outcomes = await graph_api_async.delete_events_batch(
+            {user_email: event["id"] for user_email, event in events.items()}, {}
+        )
+        return events, outcomes
+
+    with patch.object(graph_api_async, "async_graph_request", AsyncMock(side_effect=[first, second, deletion])) as mock_request, \
+         patch.object(graph_api_async.graph_retry_policy, "backoff", return_value=0) as backoff:
+        events, outcomes = asyncio.run(scenario())
+
+    assert events == {"a@example.com": {"id": "event-a"}, "b@example.com": {"id": "event-b"}}
+    assert [sub_request["id"] for sub_request in mock_request.call_args_list[1].kwargs["json"]["requests"]] == ["1"]
+    assert backoff.call_args.args[2] == 1.0
+    assert all(outcome["deleted"] for outcome in outcomes.values())
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_register_events_batch_rolls_back_on_partial_failure(asynchronous):
+    """一部のユーザーへの登録に失敗した場合、登録できたユーザーの予定を取り消してからエラーとすることのテスト（同期版・非同期版）"""
+    users = ["a@example.com", "b@example.com"]
+    registration = batch_response([
+        {"id": "0", "status": 201, "body": {"id": "event-a"}},
+        {"id": "1", "status": 403, "body": {"error": "forbidden"}},
+    ])
+    deletion = batch_response([{"id": "0", "status": 204}])
+
+    if asynchronous:
+        with patch.object(graph_api_async, "async_graph_request", AsyncMock(side_effect=[registration, deletion])) as send, \
+             pytest.raises(HTTPException):
+            asyncio.run(graph_api_async.register_events_batch(users, {"subject": "面接"}, {}))
+    else:
+        with patch.object(graph_api, "graph_post", side_effect=[registration, deletion]) as send, \
+             pytest.raises(HTTPException):
+            graph_api.register_events_batch(users, {"subject": "面接"}, {})
+
+    assert send.call_count == 2
+    assert send.call_args.kwargs["json"]["requests"] == [
+        {"id": "0", "method": "DELETE", "url": "/users/a%40example.com/calendar/events/event-a"}
+    ]
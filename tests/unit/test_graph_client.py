@@ -0,0 +1,41 @@
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.config import GRAPH_POOL_MAXSIZE, GRAPH_CONNECT_TIMEOUT, GRAPH_READ_TIMEOUT
+from app.internal import graph_client
+
+
+@pytest.fixture(autouse=True)
+def reset_session():
+    """テストごとに共有セッションを作り直す"""
+    graph_client.close_graph_session()
+    yield
+    graph_client.close_graph_session()
+
+
+def test_session_is_shared():
+    """共有セッションが再利用されることのテスト"""
+    session = graph_client.get_graph_session()
+    assert graph_client.get_graph_session() is session
+    adapter = session.get_adapter("https://graph.microsoft.com")
+    assert adapter._pool_maxsize == GRAPH_POOL_MAXSIZE
+    assert session.headers["Content-Type"] == "application/json"
+
+
+def test_graph_request_headers_and_timeout():
+    """Authorization ヘッダーと既定タイムアウトが付与されることのテスト"""
+    session = graph_client.get_graph_session()
+    with patch.object(session, "request") as mock_request:
+        graph_client.graph_post("https://example.com", access_token="token", json={"a": 1})
+
+    args, kwargs = mock_request.call_args
+    assert args == ("POST", "https://example.com")
+    assert kwargs["headers"]["Authorization"] == "Bearer token"
+    assert kwargs["timeout"] == (GRAPH_CONNECT_TIMEOUT, GRAPH_READ_TIMEOUT)
+    assert kwargs["json"] == {"a": 1}
@@ -0,0 +1,328 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal import graph_api, graph_api_async
+from app.internal.availability_cache import availability_cache
+from app.internal.schedule_batcher import AsyncScheduleBatcher, ScheduleBatcher
+from app.schemas import ScheduleRequest, User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """テストごとに空き時間キャッシュを空にする"""
+    availability_cache.clear()
+    yield
+    availability_cache.clear()
+
+
+def graph_response(json, marker="0"):
+    """getSchedule のレスポンスのモック（指定期間をすべて marker で埋める）"""
+    start = datetime.fromisoformat(json["startTime"]["dateTime"])
+    end = datetime.fromisoformat(json["endTime"]["dateTime"])
+    slots = int((end - start).total_seconds() // 1800)
+    response = MagicMock()
+    response.json.return_value = {"value": [
+        {"scheduleId": email, "availabilityView": marker * slots} for email in json["schedules"]
+    ]}
+    return response
+
+
+def schedule_request(user_count, start_date, end_date, selected_days=None):
+    """テスト用のスケジュールリクエスト（曜日の指定が無い場合はすべての曜日）"""
+    return ScheduleRequest(
+        start_date=start_date,
+        end_date=end_date,
+        start_time="09:00",
+        end_time="18:00",
+        selected_days=selected_days or ["月", "火", "水", "木", "金", "土", "日"],
+        duration_minutes=60,
+        users=[User(email=f"user{i}@example.com") for i in range(user_count)],
+        required_participants=user_count,
+        time_zone="Tokyo Standard Time"
+    )
+
+
+def test_split_schedule_windows_within_limit():
+    """62日を超える期間が62日以内の連続した期間に分割されることのテスト"""
+    windows = graph_api.split_schedule_windows(datetime(2025, 1, 1, 9), datetime(2025, 4, 15, 18))
+
+    assert windows[0][0] == datetime(2025, 1, 1, 9, 0)
+    assert windows[-1][1] == datetime(2025, 4, 15, 18, 0)
+    for (start, end), (next_start, _) in zip(windows, windows[1:]):
+        assert end == next_start
+    assert all((end - start).days <= graph_api.GET_SCHEDULE_MAX_DAYS for start, end in windows)
+
+
+def test_get_schedules_shards_and_stitches():
+    """ユーザー数・期間で分割して取得し、ユーザーごとに期間順で連結されることのテスト"""
+    schedule_req = schedule_request(25, "2025-01-01", "2025-03-10")
+
+    def respond(url, access_token, json):
+        return graph_response(json, "0" if json["startTime"]["dateTime"].startswith("2025-01-01") else "2")
+
+    with patch.object(graph_api, "get_access_token", return_value="token"), \
+         patch.object(graph_api, "graph_post", side_effect=respond) as mock_post:
+        result = graph_api.get_schedules(schedule_req)
+
+    bodies = [c.kwargs["json"] for c in mock_post.call_args_list]
+    assert len(bodies) == 4
+    assert all(len(body["schedules"]) <= graph_api.GET_SCHEDULE_MAX_USERS for body in bodies)
+
+    # 取得は 0:00 始まりの日単位で行い、毎日の 9:00〜18:00 の枠（18枠）だけを連結する
+    first_window_slots = 62 * 18
+    total_slots = 69 * 18
+    assert [schedule["scheduleId"] for schedule in result["value"]] == [user.email for user in schedule_req.users]
+    for schedule in result["value"]:
+        view = schedule["availabilityView"]
+        assert len(view) == total_slots
+        assert view[:first_window_slots] == "0" * first_window_slots
+        assert set(view[first_window_slots:]) == {"2"}
+
+
+def test_split_day_views_skips_views_misaligned_with_days():
+    """枠数が期間の日数と一致しない（夏時間の切り替え日を含む）availabilityView は日ごとに分割しないことのテスト"""
+    shards = graph_api.build_schedule_shards(
+        ["a@example.com", "b@example.com"], datetime(2025, 3, 8), datetime(2025, 3, 11), "Tokyo Standard Time"
+    )
+    day_slots = graph_api.SLOTS_PER_DAY
+    responses = [{"value": [
+        {"scheduleId": "a@example.com", "availabilityView": "0" * day_slots + "2" * day_slots + "0" * day_slots},
+        {"scheduleId": "b@example.com", "availabilityView": "0" * (3 * day_slots - 2)},
+    ]}]
+
+    day_views = graph_api.split_day_views(shards, responses)
+
+    assert day_views == {
+        ("a@example.com", "2025-03-08"): "0" * day_slots,
+        ("a@example.com", "2025-03-09"): "2" * day_slots,
+        ("a@example.com", "2025-03-10"): "0" * day_slots,
+    }
+
+
+def test_get_schedules_fetches_only_missing_days():
+    """キャッシュ済みのユーザー・日は再取得せず、不足している日だけを取得することのテスト"""
+    with patch.object(graph_api, "get_access_token", return_value="token"), \
+         patch.object(graph_api, "graph_post", side_effect=lambda url, access_token, json: graph_response(json)) as mock_post:
+        first = graph_api.get_schedules(schedule_request(2, "2025-01-06", "2025-01-07"))
+        second = graph_api.get_schedules(schedule_request(2, "2025-01-06", "2025-01-07"))
+        graph_api.get_schedules(schedule_request(2, "2025-01-06", "2025-01-09"))
+
+    assert first == second
+    assert mock_post.call_count == 2
+    body = mock_post.call_args.kwargs["json"]
+    assert body["startTime"]["dateTime"] == "2025-01-08T00:00:00"
+    assert body["endTime"]["dateTime"] == "2025-01-10T00:00:00"
+    stats = availability_cache.stats()
+    assert stats["hits"] == 8
+    assert stats["misses"] == 8
+
+
+def test_get_schedules_skips_unselected_days():
+    """選択されていない曜日は取得せず、選択された曜日の時間帯の枠だけを連結することのテスト"""
+    def respond(url, access_token, json):
+        return graph_response(json, "0" if json["startTime"]["dateTime"].startswith("2025-01-06") else "2")
+
+    with patch.object(graph_api, "get_access_token", return_value="token"), \
+         patch.object(graph_api, "graph_post", side_effect=respond) as mock_post:
+        result = graph_api.get_schedules(schedule_request(2, "2025-01-06", "2025-01-12", ["月", "Wednesday"]))
+
+    requested = sorted(
+        (c.kwargs["json"]["startTime"]["dateTime"], c.kwargs["json"]["endTime"]["dateTime"])
+        for c in mock_post.call_args_list
+    )
+    assert requested == [
+        ("2025-01-06T00:00:00", "2025-01-07T00:00:00"),
+        ("2025-01-08T00:00:00", "2025-01-09T00:00:00"),
+    ]
+    for schedule in result["value"]:
+        assert schedule["availabilityView"] == "0" * 18 + "2" * 18
+
+
+def test_concurrent_identical_requests_share_one_get_schedule():
+    """同じ面接担当者・期間の取得が同時に行われた場合、getSchedule を1回だけ送信して結果を共有することのテスト"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def respond(url, access_token, json):
+        started.set()
+        release.wait(5)
+        return graph_response(json)
+
+    before = graph_api.schedule_flight.stats()
+    with patch.object(graph_api, "get_access_token", return_value="token"), \
+         patch.object(graph_api, "graph_post", side_effect=respond) as mock_post, \
+         ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(graph_api.get_schedules, schedule_request(2, "2025-01-06", "2025-01-07"))
+        started.wait(5)
+        followers = [
+            executor.submit(graph_api.get_schedules, schedule_request(2, "2025-01-06", "2025-01-07"))
+            for _ in range(3)
+        ]
+        # 後続の取得がすべて送信中の取得を待ち始めてから、送信を完了させる
+        for _ in range(500):
+            if graph_api.schedule_flight.stats()["coalesced"] - before["coalesced"] == 3:
+                break
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(5) for future in [leader, *followers]]
+
+    assert mock_post.call_count == 1
+    assert all(result == results[0] for result in results)
+    stats = graph_api.schedule_flight.stats()
+    assert stats["executed"] - before["executed"] == 1
+    assert stats["coalesced"] - before["coalesced"] == 3
+    assert stats["in_flight"] == 0
+
+
+def test_plan_schedule_fetches_merges_users_over_union_of_days():
+    """異なるリクエストのユーザー・日の和集合を、連続した62日以内の期間ごとにまとめて取得する計画になることのテスト"""
+    requested = [
+        ("a@example.com", "2025-01-06"), ("a@example.com", "2025-01-07"),
+        ("b@example.com", "2025-01-07"), ("b@example.com", "2025-01-08"),
+        ("c@example.com", "2025-01-10"),
+    ]
+    assert graph_api.plan_schedule_fetches(requested) == [
+        (["a@example.com", "b@example.com"], "2025-01-06", "2025-01-08"),
+        (["c@example.com"], "2025-01-10", "2025-01-10"),
+    ]
+
+    # 連続した期間は62日以内に分割する
+    days = [(date(2025, 1, 1) + timedelta(days=i)).isoformat() for i in range(70)]
+    fetches = graph_api.plan_schedule_fetches([("a@example.com", day) for day in days])
+    assert [(first, last) for _, first, last in fetches] == [("2025-01-01", "2025-03-03"), ("2025-03-04", "2025-03-11")]
+
+
+def test_overlapping_requests_within_window_are_sent_together():
+    """他の取得が実行中の間に要求された、面接担当者・期間が重なる異なるリクエストが、1回の getSchedule にまとめられ、
+    それぞれ要求した分を受け取ることのテスト"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def respond(url, access_token, json):
+        if json["schedules"] == ["busy@example.com"]:
+            started.set()
+            release.wait(5)
+        return graph_response(json, "2")
+
+    batcher = ScheduleBatcher(5, graph_api.fetch_requested_day_views)
+    busy = schedule_request(1, "2025-02-03", "2025-02-03").model_copy(update={"users": [User(email="busy@example.com")]})
+    first = schedule_request(2, "2025-01-06", "2025-01-07")
+    second = schedule_request(3, "2025-01-07", "2025-01-08")
+    with patch.object(graph_api, "get_access_token", return_value="token"), \
+         patch.object(graph_api, "graph_post", side_effect=respond) as mock_post, \
+         patch.object(graph_api, "schedule_batcher", batcher), \
+         ThreadPoolExecutor(max_workers=3) as executor:
+        # 他に実行中の取得が無いため、最初の取得はすぐに送信される
+        in_flight = executor.submit(graph_api.get_schedules, busy)
+        started.wait(5)
+        futures = [executor.submit(graph_api.get_schedules, req) for req in (first, second)]
+        # 2件がまとめに加わってから実行中の取得を完了させると、待たずに（ウィンドウの終了前に）まとめて送信する
+        for _ in range(500):
+            if batcher.stats()["lookups"] == 3:
+                break
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(2) for future in futures]
+        in_flight.result(2)
+
+    assert mock_post.call_count == 2
+    body = mock_post.call_args.kwargs["json"]
+    assert body["schedules"] == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert (body["startTime"]["dateTime"], body["endTime"]["dateTime"]) == ("2025-01-06T00:00:00", "2025-01-09T00:00:00")
+    assert [len(schedule["availabilityView"]) for schedule in results[0]["value"]] == [36, 36]
+    assert [len(schedule["availabilityView"]) for schedule in results[1]["value"]] == [36, 36, 36]
+    assert batcher.stats() == {"lookups": 3, "batches": 2, "pending": 0}
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_batcher_sends_at_once_when_no_other_caller_is_in_flight(asynchronous):
+    """他に実行中の呼び出し元が無い場合は、ウィンドウの終了を待たずにすぐ送信することのテスト（同期版・非同期版）"""
+    requested = [("a@example.com", "2025-01-06")]
+    started = time.monotonic()
+    if asynchronous:
+        async def fetch(pairs, time_zone):
+            return {pair: "0" * 48 for pair in pairs}
+
+        batcher = AsyncScheduleBatcher(5, fetch)
+        result = asyncio.run(batcher.fetch(requested, "Tokyo Standard Time"))
+    else:
+        batcher = ScheduleBatcher(5, lambda pairs, time_zone: {pair: "0" * 48 for pair in pairs})
+        result = batcher.fetch(requested, "Tokyo Standard Time")
+
+    assert time.monotonic() - started < 1
+    assert result == {("a@example.com", "2025-01-06"): "0" * 48}
+    assert batcher.stats() == {"lookups": 1, "batches": 1, "pending": 0}
+
+
+def test_async_get_schedules_coalesces_identical_and_batches_overlapping_requests():
+    """非同期版で、同じ取得は送信中の取得の結果を共有し、異なる取得は1回の getSchedule にまとめ、取得済みの日は再取得しないことのテスト"""
+    async def respond(method, url, access_token=None, json=None):
+        return graph_response(json)
+
+    first = schedule_request(2, "2025-01-06", "2025-01-07")
+    second = schedule_request(3, "2025-01-07", "2025-01-08")
+    batcher = AsyncScheduleBatcher(0.05, graph_api_async.fetch_requested_day_views)
+    before = graph_api_async.schedule_flight.stats()
+
+    async def scenario():
+        results = await asyncio.gather(*[graph_api_async.get_schedules(first) for _ in range(3)],
+                                       graph_api_async.get_schedules(second))
+        again = await graph_api_async.get_schedules(first)
+        return results, again
+
+    with patch.object(graph_api_async, "get_access_token_async", AsyncMock(return_value="token")), \
+         patch.object(graph_api_async, "async_graph_request", AsyncMock(side_effect=respond)) as mock_request, \
+         patch.object(graph_api_async, "schedule_batcher", batcher):
+        results, again = asyncio.run(scenario())
+
+    assert mock_request.call_count == 1
+    body = mock_request.call_args.kwargs["json"]
+    assert body["schedules"] == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert (body["startTime"]["dateTime"], body["endTime"]["dateTime"]) == ("2025-01-06T00:00:00", "2025-01-09T00:00:00")
+    assert results[0] == results[1] == results[2] == again
+    assert [len(schedule["availabilityView"]) for schedule in results[3]["value"]] == [36, 36, 36]
+    stats = graph_api_async.schedule_flight.stats()
+    assert stats["executed"] - before["executed"] == 2
+    assert stats["coalesced"] - before["coalesced"] == 2
+    assert stats["in_flight"] == 0
+    assert batcher.stats() == {"lookups": 2, "batches": 1, "pending": 0}
+
+
+def test_async_batcher_shares_failure_and_survives_cancelled_caller():
+    """非同期版のまとめた取得が、取り消された呼び出し元があっても他の呼び出し元に結果・例外を返すことのテスト"""
+    async def fetch(requested, time_zone):
+        await asyncio.sleep(0.01)
+        if ("error@example.com", "2025-01-06") in requested:
+            raise RuntimeError("graph error")
+        return {pair: "0" * 18 for pair in requested}
+
+    async def scenario():
+        batcher = AsyncScheduleBatcher(0.01, fetch)
+        cancelled = asyncio.create_task(batcher.fetch([("a@example.com", "2025-01-06")], "Tokyo Standard Time"))
+        kept = asyncio.create_task(batcher.fetch([("b@example.com", "2025-01-06")], "Tokyo Standard Time"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        result = await kept
+
+        failing = [batcher.fetch([(email, "2025-01-06")], "Tokyo Standard Time")
+                   for email in ("error@example.com", "c@example.com")]
+        errors = await asyncio.gather(*failing, return_exceptions=True)
+        return result, errors, batcher.stats()
+
+    result, errors, stats = asyncio.run(scenario())
+
+    assert result == {("b@example.com", "2025-01-06"): "0" * 18}
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert stats == {"lookups": 4, "batches": 2, "pending": 0}
@@ -0,0 +1,123 @@
+import json
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal.availability import split_schedule_request
+from app.internal.resilience import CircuitOpenError
+from app.routers import schedule, schedule_async
+from app.schemas import ScheduleRequest, User
+from app.utils.ndjson import wants_ndjson
+from app.utils.slots import SlotRuns
+
+
+def test_wants_ndjson():
+    """クエリパラメータ・Accept ヘッダーによるストリーミングの指定のテスト"""
+    assert wants_ndjson(None, True)
+    assert wants_ndjson("application/json, application/x-ndjson;q=0.9", False)
+    assert not wants_ndjson("application/json", False)
+    assert not wants_ndjson(None, False)
+
+
+def test_slot_runs_to_ndjson():
+    """1行に1件の [開始日時, 終了日時] が出力されることのテスト"""
+    lines = SlotRuns.from_slot_offsets("2025-01-06", np.array([540, 570, 600, 630]), [0, 2], 2).to_ndjson().splitlines()
+
+    assert [json.loads(line) for line in lines] == [
+        ["2025-01-06T09:00:00", "2025-01-06T10:00:00"],
+        ["2025-01-06T10:00:00", "2025-01-06T11:00:00"],
+    ]
+
+
+def test_split_schedule_request():
+    """取得期間が指定した日数ごとに、期間以外の条件を保ったまま分割されることのテスト"""
+    schedule_req = ScheduleRequest(
+        start_date="2025-01-06",
+        end_date="2025-01-20",
+        start_time="09:00",
+        end_time="18:00",
+        selected_days=["月"],
+        duration_minutes=60,
+        users=[User(email="a@example.com")],
+        required_participants=1,
+        time_zone="Tokyo Standard Time"
+    )
+
+    blocks = split_schedule_request(schedule_req, 7)
+
+    assert [(block.start_date, block.end_date) for block in blocks] == [
+        ("2025-01-06", "2025-01-12"),
+        ("2025-01-13", "2025-01-19"),
+        ("2025-01-20", "2025-01-20"),
+    ]
+    assert all(block.selected_days == ["月"] and block.start_time == "09:00" for block in blocks)
+
+
+@pytest.mark.parametrize("router, mock", [(schedule, MagicMock), (schedule_async, AsyncMock)])
+def test_get_availability_streams_days_up_to_limit(router, mock):
+    """NDJSON の指定時に、候補が日付順に1行ずつ返り、limit 件で打ち切られることのテスト（同期版・非同期版）"""
+    app = FastAPI()
+    app.include_router(router.router)
+    body = {
+        "start_date": "2025-01-06",
+        "end_date": "2025-01-07",
+        "start_time": "09:00",
+        "end_time": "11:00",
+        "selected_days": ["月", "火"],
+        "duration_minutes": 60,
+        "users": [{"email": "a@example.com"}],
+        "required_participants": 1,
+        "time_zone": "Tokyo Standard Time"
+    }
+    schedule_info = {"value": [{"availabilityView": "0020" + "0000"}]}
+
+    with patch.object(router, "get_schedules", mock(return_value=schedule_info)):
+        response = TestClient(app).post(
+            "/get_availability", params={"limit": 3}, json=body, headers={"Accept": "application/x-ndjson"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        ["2025-01-06T09:00:00", "2025-01-06T10:00:00"],
+        ["2025-01-07T09:00:00", "2025-01-07T10:00:00"],
+        ["2025-01-07T09:30:00", "2025-01-07T10:30:00"],
+    ]
+
+
+@pytest.mark.parametrize("router, mock", [(schedule, MagicMock), (schedule_async, AsyncMock)])
+def test_get_availability_stream_maps_errors_before_streaming(router, mock):
+    """ストリーミングでも、不正な取得期間は 400、サーキットブレーカーが開いている場合は 503 を返すことのテスト（同期版・非同期版）"""
+    app = FastAPI()
+    app.include_router(router.router)
+    body = {
+        "start_date": "2025-01-07",
+        "end_date": "2025-01-06",
+        "start_time": "09:00",
+        "end_time": "11:00",
+        "selected_days": ["月", "火"],
+        "duration_minutes": 60,
+        "users": [{"email": "a@example.com"}],
+        "required_participants": 1,
+        "time_zone": "Tokyo Standard Time"
+    }
+    headers = {"Accept": "application/x-ndjson"}
+
+    with patch.object(router, "get_schedules", mock(side_effect=CircuitOpenError("graph", 12.5))):
+        reversed_range = TestClient(app).post("/get_availability", json=body, headers=headers)
+        malformed = TestClient(app).post("/get_availability", json={**body, "start_date": "2025-13-01"}, headers=headers)
+        unavailable = TestClient(app).post("/get_availability", json={**body, "start_date": "2025-01-06"}, headers=headers)
+
+    assert reversed_range.status_code == 400
+    assert malformed.status_code == 400
+    assert unavailable.status_code == 503
+    assert unavailable.headers["Retry-After"] == "12"
@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal.availability import compute_common_times, find_candidate_page, iter_common_slots
+from app.routers import schedule, schedule_async
+from app.schemas import ScheduleRequest, User
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def schedule_request(required_participants=2, duration_minutes=60):
+    """テスト用のスケジュールリクエスト（2025-01-06〜2025-01-19 の平日 9:00〜12:00）"""
+    return ScheduleRequest(
+        start_date="2025-01-06",
+        end_date="2025-01-19",
+        start_time="09:00",
+        end_time="12:00",
+        selected_days=["月", "火", "水", "木", "金"],
+        duration_minutes=duration_minutes,
+        users=[User(email="a@example.com"), User(email="b@example.com")],
+        required_participants=required_participants,
+        time_zone="Tokyo Standard Time"
+    )
+
+
+# 10日分 × 6枠（9:00〜12:00）の availabilityView
+SCHEDULE_INFO = {"value": [
+    {"availabilityView": "000000" * 10},
+    {"availabilityView": "002200" * 10},
+]}
+
+
+def test_cursor_round_trip():
+    """カーソルの復元と、別の条件のリクエストで発行されたカーソルの拒否のテスト"""
+    cursor = encode_cursor(schedule_request(), 1290)
+
+    assert decode_cursor(schedule_request(), cursor) == 1290
+    with pytest.raises(ValueError):
+        decode_cursor(schedule_request(duration_minutes=90), cursor)
+    with pytest.raises(ValueError):
+        decode_cursor(schedule_request(), "not-a-cursor")
+
+
+@pytest.mark.parametrize("required_participants", [2, 1])
+def test_pages_cover_all_candidates(required_participants):
+    """カーソルで順にページを取得すると、すべての候補を重複なく取得できることのテスト"""
+    schedule_req = schedule_request(required_participants)
+    expected = compute_common_times(schedule_req, SCHEDULE_INFO)
+
+    pages = []
+    after_minute = None
+    while True:
+        page, has_more = find_candidate_page(schedule_req, SCHEDULE_INFO, 3, after_minute)
+        pages.extend(page.to_iso_pairs())
+        if not has_more:
+            break
+        after_minute = int(page.starts[-1])
+
+    assert pages == expected
+    assert compute_common_times(schedule_req, SCHEDULE_INFO, limit=3) == expected[:3]
+
+
+def test_iter_common_slots_is_lazy():
+    """必要な件数がそろった時点で、以降の日が評価されないことのテスト"""
+    slots = iter_common_slots(schedule_request(), SCHEDULE_INFO, chunk_days=1)
+
+    first = next(slots)
+    assert first.to_iso_pairs() == [
+        ["2025-01-06T09:00:00", "2025-01-06T10:00:00"],
+        ["2025-01-06T11:00:00", "2025-01-06T12:00:00"],
+    ]
+    # 2件目は翌営業日（週末をまたいだ後も日付順に続く）
+    assert next(slots).to_iso_pairs()[0] == ["2025-01-07T09:00:00", "2025-01-07T10:00:00"]
+    assert len(list(slots)) == 8
+
+
+@pytest.mark.parametrize("router, mock", [(schedule, MagicMock), (schedule_async, AsyncMock)])
+def test_get_availability_pages_with_cursor(router, mock):
+    """エンドポイントで limit・カーソルを指定して順にページを取得すると、すべての候補を取得できることのテスト（同期版・非同期版）"""
+    app = FastAPI()
+    app.include_router(router.router)
+    client = TestClient(app)
+    schedule_req = schedule_request()
+    body = schedule_req.model_dump()
+    expected = compute_common_times(schedule_req, SCHEDULE_INFO)
+
+    pages = []
+    params = {"limit": 3}
+    with patch.object(router, "get_schedules", mock(return_value=SCHEDULE_INFO)) as get_schedules:
+        while True:
+            response = client.post("/get_availability", params=params, json=body)
+            assert response.status_code == 200
+            pages.extend(response.json()["common_availability"])
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+            params = {"limit": 3, "cursor": cursor}
+        invalid = client.post("/get_availability", params={"cursor": "not-a-cursor"}, json=body)
+
+    assert pages == expected
+    assert get_schedules.call_count == -(-len(expected) // 3)
+    assert invalid.status_code == 400
+
+
+@pytest.mark.parametrize("router, mock", [(schedule, MagicMock), (schedule_async, AsyncMock)])
+def test_get_availability_rejects_time_zone_with_daylight_saving(router, mock):
+    """夏時間のあるタイムゾーンは日ごとの枠に分割できないため、取得せずに 400 を返すことのテスト（同期版・非同期版）"""
+    app = FastAPI()
+    app.include_router(router.router)
+    body = schedule_request().model_dump()
+    body["time_zone"] = "Pacific Standard Time"
+
+    with patch.object(router, "get_schedules", mock(return_value=SCHEDULE_INFO)) as get_schedules:
+        response = TestClient(app).post("/get_availability", json=body)
+        streamed = TestClient(app).post("/get_availability", params={"stream": True}, json=body)
+
+    assert response.status_code == 400
+    assert streamed.status_code == 400
+    get_schedules.assert_not_called()
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.config import PARTITION_KEY, DOCUMENT_TTL
+from app.internal import cosmos
+from tools import migrate_partitions
+
+# container フィクスチャ（インメモリの Cosmos DB コンテナ）は tests/mocks.py で定義する
+pytest_plugins = ["tests.mocks"]
+
+SLOT_A = ["2025-01-10T10:00:00", "2025-01-10T11:00:00"]
+SLOT_B = ["2025-01-10T13:00:00", "2025-01-10T14:00:00"]
+
+
+@pytest.fixture
+def cosmos_patches():
+    """トークンごとのパーティションとし、移行前のパーティションも読み込む"""
+    return [
+        (cosmos, "PARTITION_STRATEGY", "token"),
+        (cosmos, "LEGACY_PARTITION_FALLBACK", True),
+    ]
+
+
+def store_legacy(container, doc_id, **fields):
+    """移行前の単一のパーティションにドキュメントを保存する"""
+    container.create_item(body={"id": doc_id, "partitionKey": PARTITION_KEY, **fields})
+
+
+def test_new_forms_are_partitioned_by_token(container):
+    """新しいフォームとインデックスが、それぞれのIDをパーティションキーとして保存されることのテスト"""
+    token = cosmos.create_form_data({"candidates": [SLOT_A], "isConfirmed": False})
+    key = cosmos.slot_key(SLOT_A)
+
+    assert container.get(token)["partitionKey"] == token
+    assert container.get(key)["partitionKey"] == key
+    assert cosmos.get_form_data(token)["id"] == token
+
+
+def test_legacy_documents_are_read_and_updated_through_fallback(container):
+    """移行前のフォームとインデックスが、読み込み・予約時の削除の対象になることのテスト"""
+    store_legacy(container, "legacy", candidates=[SLOT_A, SLOT_B], isConfirmed=False)
+    store_legacy(container, cosmos.slot_key(SLOT_A), type=cosmos.SLOT_INDEX_TYPE, tokens=["legacy"])
+    selected = cosmos.create_form_data({"candidates": [SLOT_A], "isConfirmed": False})
+
+    assert cosmos.get_form_data("legacy")["candidates"] == [SLOT_A, SLOT_B]
+
+    cosmos.finalize_form(selected, SLOT_A)
+
+    assert container.items[("legacy", PARTITION_KEY)]["candidates"] == [SLOT_B]
+    assert container.get(selected)["isConfirmed"] is True
+    assert container.get(cosmos.slot_key(SLOT_A)) is None
+
+    with patch.object(cosmos, "LEGACY_PARTITION_FALLBACK", False):
+        with pytest.raises(Exception):
+            cosmos.get_form_data("legacy")
+
+
+def test_migrate_documents_moves_forms_and_merges_index(container):
+    """移行ツールが、残りの有効期限を引き継いでフォームを移し、インデックスのトークンを統合することのテスト"""
+    now = 1_000_000
+    store_legacy(container, "old", candidates=[SLOT_A], _ts=now - 600, _etag="1", _rid="x")
+    store_legacy(container, "expired", candidates=[SLOT_A], _ts=now - DOCUMENT_TTL - 1, _etag="2")
+    store_legacy(container, cosmos.slot_key(SLOT_A), type=cosmos.SLOT_INDEX_TYPE, tokens=["old", "new"], _etag="3")
+    new = cosmos.create_form_data({"candidates": [SLOT_A], "isConfirmed": False})
+    container.items[(cosmos.slot_key(SLOT_A), cosmos.slot_key(SLOT_A))]["tokens"] = ["new", new]
+
+    docs = [doc for (_, partition_key), doc in list(container.items.items()) if partition_key == PARTITION_KEY]
+    counts = migrate_partitions.migrate_documents(container, docs, now=now)
+
+    assert counts == {"forms": 1, "slots": 1, "expired": 1, "remaining": 0}
+    assert all(partition_key != PARTITION_KEY for _, partition_key in container.items)
+    migrated = container.items[("old", "old")]
+    assert migrated["ttl"] == DOCUMENT_TTL - 600
+    assert "_rid" not in migrated
+    assert container.get("expired") is None
+    assert container.get(cosmos.slot_key(SLOT_A))["tokens"] == ["new", new, "old"]
+    assert container.get(cosmos.slot_key(SLOT_A))["ttl"] == cosmos.SLOT_INDEX_TTL_MARGIN
+
+
+    # アプリケーションが次に更新した時点で、有効期限は既定（DOCUMENT_TTL）に戻る
+    cosmos.confirm_form("old")
+    assert container.get("old")["ttl"] == DOCUMENT_TTL
@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+import requests
+import sys
+from email.utils import formatdate
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app import dependencies
+from app.internal import graph_api, graph_client, resilience
+from app.internal.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, retry_after_seconds
+
+
+def response(status_code, headers=None):
+    """Graph API のレスポンスのモック"""
+    mock = MagicMock()
+    mock.status_code = status_code
+    mock.headers = headers or {}
+    return mock
+
+
+def test_retry_after_seconds_parses_seconds_dates_and_cosmos_header():
+    """Retry-After（秒数・HTTP 日付）と x-ms-retry-after-ms を秒数として取得できることのテスト"""
+    assert retry_after_seconds({"Retry-After": "7"}) == 7.0
+    assert retry_after_seconds({"x-ms-retry-after-ms": "250"}) == 0.25
+    assert 8 <= retry_after_seconds({"Retry-After": formatdate(resilience.time.time() + 10, usegmt=True)}) <= 10
+    assert retry_after_seconds({"Retry-After": "soon"}) is None
+    assert retry_after_seconds({}) is None
+
+
+def test_backoff_uses_full_jitter_and_stops_at_attempts_or_deadline():
+    """待ち時間は 0〜上限のランダムな時間で、試行回数の上限や期限を過ぎる場合は再試行しないことのテスト"""
+    policy = RetryPolicy(max_attempts=3, base_delay=1, max_delay=3, deadline=10)
+    deadline = policy.start()
+    with patch.object(resilience.random, "uniform", side_effect=lambda low, high: high) as uniform:
+        assert policy.backoff(1, deadline) == 2
+        assert policy.backoff(2, deadline) == 3
+    assert [c.args for c in uniform.call_args_list] == [(0, 2), (0, 3)]
+    assert policy.backoff(3, deadline) is None
+    assert policy.backoff(1, deadline, retry_after=4) == 4
+    assert policy.backoff(1, deadline, retry_after=60) is None
+
+
+def test_circuit_breaker_opens_and_recovers_after_probe():
+    """一時的なエラーが続くと開き、一定時間後の試しの送信が成功すると閉じることのテスト"""
+    breaker = CircuitBreaker("Graph API", failure_threshold=2, reset_timeout=30)
+    now = [1000.0]
+    with patch.object(resilience.time, "monotonic", side_effect=lambda: now[0]):
+        for _ in range(2):
+            breaker.before_request()
+            breaker.record(False)
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.before_request()
+        assert error.value.retry_after == 30
+
+        now[0] += 30
+        breaker.before_request()
+        # 試しの送信の完了前は、他のリクエストを送信しない
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+        breaker.record(True)
+        breaker.before_request()
+
+    assert breaker.stats() == {"state": "closed", "consecutive_failures": 0, "opened": 1, "rejected": 2}
+
+
+def test_send_with_retry_honors_retry_after_and_skips_non_retryable():
+    """429 は Retry-After だけ待って再試行し、400 は再試行しないことのテスト"""
+    send = MagicMock(side_effect=[response(429, {"Retry-After": "2"}), response(200)])
+    with patch.object(graph_client.time, "sleep") as sleep:
+        assert graph_client.send_with_retry(send).status_code == 200
+    sleep.assert_called_once_with(2.0)
+
+    send = MagicMock(return_value=response(400))
+    with patch.object(graph_client.time, "sleep") as sleep:
+        assert graph_client.send_with_retry(send).status_code == 400
+    assert send.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_send_with_retry_retries_connection_errors_within_attempts():
+    """接続エラーは試行回数の上限まで再試行し、最後のエラーを送出することのテスト"""
+    policy = RetryPolicy(max_attempts=2, base_delay=0.1, max_delay=1, deadline=10)
+    send = MagicMock(side_effect=requests.ConnectionError("reset"))
+    with patch.object(graph_client.time, "sleep"), pytest.raises(requests.ConnectionError):
+        graph_client.send_with_retry(send, policy)
+    assert send.call_count == 2
+
+
+def test_send_with_retry_async_waits_without_blocking():
+    """非同期版は 503 を Retry-After だけ asyncio.sleep で待って再試行することのテスト"""
+    send = AsyncMock(side_effect=[response(503, {"Retry-After": "3"}), response(200)])
+    with patch.object(graph_client.asyncio, "sleep", AsyncMock()) as sleep:
+        assert asyncio.run(graph_client.send_with_retry_async(send)).status_code == 200
+    sleep.assert_awaited_once_with(3.0)
+    assert send.await_count == 2
+
+
+def test_cancelled_probe_releases_half_open_breaker():
+    """試しの送信が取り消し・中断で終わった場合も、失敗として数えずに次のリクエストが試しの送信を行えることのテスト"""
+    breaker = CircuitBreaker("Graph API", failure_threshold=1, reset_timeout=0)
+    breaker.record(False)
+
+    async def hang(*args, **kwargs):
+        await asyncio.Event().wait()
+
+    async def cancel_probe():
+        client = MagicMock()
+        client.request = AsyncMock(side_effect=hang)
+        with patch.object(graph_client, "get_async_graph_client", return_value=client):
+            task = asyncio.create_task(graph_client.async_graph_request("GET", "https://graph.example/me"))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    with patch.object(graph_client, "graph_breaker", breaker):
+        asyncio.run(cancel_probe())
+        assert breaker.before_request() is True
+
+        session = MagicMock()
+        session.request.side_effect = KeyboardInterrupt
+        breaker.release_probe()
+        with patch.object(graph_client, "get_graph_session", return_value=session), pytest.raises(KeyboardInterrupt):
+            graph_client.graph_request("GET", "https://graph.example/me")
+        assert breaker.before_request() is True
+
+    assert breaker.stats()["opened"] == 1
+
+
+def test_send_email_graph_retries_throttling():
+    """メールの送信も 429 を Retry-After だけ待って再試行することのテスト"""
+    with patch.object(graph_api, "graph_post", side_effect=[response(429, {"Retry-After": "1"}), response(202)]) as post, \
+         patch.object(graph_client.time, "sleep") as sleep:
+        graph_api.send_email_graph("token", "sender@example.com", "to@example.com", "件名", "本文")
+    assert post.call_count == 2
+    sleep.assert_called_once_with(1.0)
+
+
+def test_cosmos_client_leaves_throttling_retries_to_call_with_retry():
+    """Cosmos DB の SDK はスロットリングを再試行せず、COSMOS_REQUEST_DEADLINE の期限は call_with_retry だけで管理することのテスト"""
+    assert dependencies.cosmos_connection_policy().RetryOptions.MaxRetryAttemptCount == 0
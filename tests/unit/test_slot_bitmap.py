@@ -0,0 +1,44 @@
+import random
+import sys
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.utils.slot_bitmap import view_to_bitmask, run_start_bitmask, bitmask_positions, find_common_run_starts
+
+
+def brute_force_run_starts(availability_views, required_slots):
+    """全員が連続して空いている区間の開始枠を1枠ずつ確認して求める（比較用）"""
+    length = min(len(view) for view in availability_views)
+    return [
+        i for i in range(length - required_slots + 1)
+        if all(view[i + k] == "0" for view in availability_views for k in range(required_slots))
+    ]
+
+
+def test_view_to_bitmask():
+    """空き枠 ('0') のビットのみが立つことのテスト"""
+    assert view_to_bitmask("0220") == 0b1001
+    assert view_to_bitmask("") == 0
+    assert bitmask_positions(0b1001).tolist() == [0, 3]
+
+
+def test_run_start_bitmask():
+    """連続して空いている区間の開始位置のみが残ることのテスト"""
+    # 0〜2 番目と 5〜9 番目が空き
+    mask = 0b1111100111
+    assert run_start_bitmask(mask, 3) == 0b0011100001
+    assert run_start_bitmask(mask, 5) == 0b0000100000
+    assert run_start_bitmask(mask, 6) == 0
+
+
+def test_common_availability_matches_brute_force():
+    """ビットマスク実装の結果が、1枠ずつ確認した結果と一致することのテスト"""
+    rng = random.Random(0)
+    for required_slots in (1, 2, 3, 5):
+        views = ["".join(rng.choice("0002") for _ in range(96)) for _ in range(4)]
+        expected = brute_force_run_starts(views, required_slots)
+
+        assert find_common_run_starts(views, required_slots).tolist() == expected
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.utils.slot_matrix import views_to_matrix, sliding_all, find_k_of_n_windows
+
+
+def test_sliding_all():
+    """区間全体が True の位置のみが True になることのテスト"""
+    free = np.array([[True, True, False, True, True, True]])
+    assert sliding_all(free, 2).tolist() == [[True, False, False, True, True]]
+    assert sliding_all(free, 7).shape == (1, 0)
+
+
+def test_find_k_of_n_windows():
+    """必要人数以上が区間全体で空いている区間のテスト"""
+    views = ["0000", "0220", "0020"]
+    starts = find_k_of_n_windows(views_to_matrix(views), 2, 2)
+
+    assert starts.tolist() == [0]
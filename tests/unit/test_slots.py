@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal.availability import compute_common_times
+from app.schemas import ScheduleRequest, User
+from app.utils.slots import SlotRuns
+
+
+def test_slot_runs_to_iso_pairs():
+    """起点日からの経過分が、日をまたいで日時文字列に変換されることのテスト"""
+    slots = SlotRuns.from_slot_offsets("2025-01-06", np.arange(21 * 60 + 30, 25 * 60, 30), [0, 5], 2)
+
+    assert slots.starts.tolist() == [1290, 1440]
+    assert slots.to_iso_pairs() == [
+        ["2025-01-06T21:30:00", "2025-01-06T22:30:00"],
+        ["2025-01-07T00:00:00", "2025-01-07T01:00:00"],
+    ]
+    assert slots[1:].to_iso_pairs() == [["2025-01-07T00:00:00", "2025-01-07T01:00:00"]]
+
+
+def test_compute_common_times():
+    """全員参加・required_participants 人以上の空き時間候補のテスト"""
+    schedule_info = {"value": [
+        {"availabilityView": "000000"},
+        {"availabilityView": "002200"},
+    ]}
+
+    def schedule_request(required_participants):
+        return ScheduleRequest(
+            start_date="2025-01-06",
+            end_date="2025-01-06",
+            start_time="09:00",
+            end_time="12:00",
+            selected_days=["月"],
+            duration_minutes=60,
+            users=[User(email="a@example.com"), User(email="b@example.com")],
+            required_participants=required_participants,
+            time_zone="Tokyo Standard Time"
+        )
+
+    assert compute_common_times(schedule_request(2), schedule_info) == [
+        ["2025-01-06T09:00:00", "2025-01-06T10:00:00"],
+        ["2025-01-06T11:00:00", "2025-01-06T12:00:00"],
+    ]
+    assert len(compute_common_times(schedule_request(1), schedule_info)) == 5
@@ -0,0 +1,64 @@
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+root_dir = Path(__file__).parent.parent.parent
+sys.path.append(str(root_dir))
+
+from app.internal.token_provider import GraphTokenProvider
+
+
+def create_provider():
+    return GraphTokenProvider(
+        client_id="client-id",
+        client_secret="secret",
+        authority="https://login.microsoftonline.com/tenant",
+        scopes=["https://graph.microsoft.com/.default"],
+        refresh_margin=240
+    )
+
+
+def test_token_is_cached():
+    """2回目以降はキャッシュ済みトークンを返すことのテスト"""
+    provider = create_provider()
+    with patch.object(provider, "_acquire", return_value=("token-1", 3600)) as mock_acquire:
+        assert provider.get_token() == "token-1"
+        assert provider.get_token() == "token-1"
+    assert mock_acquire.call_count == 1
+    provider.stop()
+
+
+def test_concurrent_requests_share_one_acquisition():
+    """同時リクエストが1回の取得処理を待ち合わせることのテスト"""
+    provider = create_provider()
+    calls = []
+
+    def slow_acquire():
+        calls.append(1)
+        time.sleep(0.2)
+        return "token-1", 3600
+
+    results = []
+    with patch.object(provider, "_acquire", side_effect=slow_acquire):
+        threads = [threading.Thread(target=lambda: results.append(provider.get_token())) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(calls) == 1
+    assert results == ["token-1"] * 10
+    provider.stop()
+
+
+def test_expired_token_is_reacquired():
+    """有効期限が近いトークンは再取得されることのテスト"""
+    provider = create_provider()
+    with patch.object(provider, "_acquire", side_effect=[("token-1", 30), ("token-2", 3600)]):
+        assert provider.get_token() == "token-1"
+        # 有効期限の余裕（60秒）を切っているため再取得される
+        assert provider.get_token() == "token-2"
+    provider.stop()
@@ -0,0 +1,49 @@
+"""
+Cosmos DB のデータベースとコンテナを作成するツール（既に存在する場合は何もしない）。
+アプリケーションは起動時にデータベース・コンテナを作成しないため、初回のデプロイ時（または設定の変更時）に一度だけ実行する。
+
+実行方法:
+    python -m tools.bootstrap_cosmos
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from azure.cosmos import CosmosClient, PartitionKey
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import (
+    COSMOS_DB_ENDPOINT, COSMOS_DB_KEY,
+    COSMOS_DATABASE_NAME, COSMOS_CONTAINER_NAME,
+    DOCUMENT_TTL
+)
+
+
+def provision(client):
+    """
+    データベースとコンテナを作成し、コンテナクライアントを返す
+
+    Parameters:
+        client: Cosmos DB クライアント
+    """
+    database = client.create_database_if_not_exists(id=COSMOS_DATABASE_NAME)
+    return database.create_container_if_not_exists(
+        id=COSMOS_CONTAINER_NAME,
+        partition_key=PartitionKey(path="/partitionKey"),
+        offer_throughput=400,
+        default_ttl=DOCUMENT_TTL
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    provision(CosmosClient(COSMOS_DB_ENDPOINT, COSMOS_DB_KEY))
+    print(f"database: {COSMOS_DATABASE_NAME}, container: {COSMOS_CONTAINER_NAME} (partition key: /partitionKey)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+移行前の単一の論理パーティション（PARTITION_KEY）に保存されたドキュメントを、
+ドキュメントIDごとのパーティション（PARTITION_STRATEGY="token"）に移行するツール。
+- フォーム: 残りの有効期限（TTL）を引き継いだコピーを新しいパーティションに保存し、移行前のドキュメントを削除する
+  （引き継いだ有効期限はコピーだけのもので、アプリケーションが次に更新した時点で既定の DOCUMENT_TTL に戻る）
+- 候補日の逆引きインデックス: 新しいパーティションのインデックスにトークンを統合し、移行前のドキュメントを削除する
+
+移行中も LEGACY_PARTITION_FALLBACK が有効な間は、移行前のドキュメントを読み込めるため、アプリケーションを停止する必要はない。
+移行前のドキュメントは読み込み時の ETag が一致する場合のみ削除するため、移行中に更新されたドキュメントは次回の実行で移行し直す。
+すべてのドキュメントを移行した後（"remaining: 0"）に LEGACY_PARTITION_FALLBACK を false にする。
+
+実行方法:
+    python -m tools.migrate_partitions
+    python -m tools.migrate_partitions --dry-run
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from azure.core import MatchConditions
+from azure.cosmos import exceptions
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import PARTITION_KEY, DOCUMENT_TTL
+from app.dependencies import get_container
+from app.internal.cosmos import SLOT_INDEX_TYPE, SYSTEM_PROPERTIES, slot_index_ttl
+
+
+def remaining_ttl(doc: dict, now: float) -> int:
+    """
+    移行前のドキュメントの残りの有効期限（秒）を返す（_ts は最終更新時刻の UNIX 時間）
+    """
+    ttl = doc.get("ttl", DOCUMENT_TTL)
+    return int(ttl - (now - doc.get("_ts", now)))
+
+
+def migrate_form(container, doc: dict, now: float) -> bool:
+    """
+    フォームを新しいパーティションにコピーする
+
+    Returns:
+        bool: コピーした場合は True（有効期限が切れている場合は False）
+    """
+    ttl = remaining_ttl(doc, now)
+    if ttl <= 0:
+        return False
+    body = {key: value for key, value in doc.items() if key not in SYSTEM_PROPERTIES and key != "_etag"}
+    body["partitionKey"] = doc["id"]
+    # コンテナの既定の有効期限ではなく、移行前の残りの有効期限で期限切れにする
+    # （次にアプリケーションが更新した時点で、cosmos.form_patch_operations により既定の有効期限に戻る）
+    body["ttl"] = ttl
+    container.upsert_item(body=body)
+    return True
+
+
+def migrate_slot_index(container, doc: dict) -> None:
+    """
+    候補日の逆引きインデックスのトークンを、新しいパーティションのインデックスに統合する
+    （有効期限はアプリケーションと同じく、候補日の終了日時から設定する）
+    """
+    key = doc["id"]
+    try:
+        registered = container.read_item(item=key, partition_key=key).get("tokens", [])
+    except exceptions.CosmosResourceNotFoundError:
+        container.create_item(body={
+            "id": key,
+            "partitionKey": key,
+            "type": SLOT_INDEX_TYPE,
+            "tokens": list(dict.fromkeys(doc.get("tokens", []))),
+            "ttl": slot_index_ttl(key)
+        })
+        return
+    missing = [token for token in dict.fromkeys(doc.get("tokens", [])) if token not in registered]
+    container.patch_item(
+        item=key,
+        partition_key=key,
+        patch_operations=[{"op": "add", "path": "/tokens/-", "value": token} for token in missing]
+        + [{"op": "set", "path": "/ttl", "value": slot_index_ttl(key)}]
+    )
+
+
+def migrate_documents(container, docs, dry_run: bool = False, now: float = None) -> dict:
+    """
+    移行前のパーティションのドキュメントを移行し、件数を返す
+
+    Parameters:
+        container: Cosmos DB のコンテナクライアント
+        docs: 移行前のパーティションのドキュメント
+        dry_run: True の場合は移行せずに件数だけを数える
+        now: 現在時刻の UNIX 時間（省略時は time.time()）
+
+    Returns:
+        dict: forms（移行したフォーム）、slots（移行したインデックス）、expired（期限切れで削除したフォーム）、
+              remaining（移行中に更新されたため削除できなかったドキュメント）の件数
+    """
+    now = time.time() if now is None else now
+    counts = {"forms": 0, "slots": 0, "expired": 0, "remaining": 0}
+    for doc in docs:
+        if doc.get("type") == SLOT_INDEX_TYPE:
+            kind = "slots"
+            if not dry_run:
+                migrate_slot_index(container, doc)
+        elif remaining_ttl(doc, now) > 0:
+            kind = "forms"
+            if not dry_run:
+                migrate_form(container, doc, now)
+        else:
+            kind = "expired"
+        if dry_run:
+            counts[kind] += 1
+            continue
+        try:
+            container.delete_item(
+                item=doc["id"],
+                partition_key=PARTITION_KEY,
+                etag=doc.get("_etag"),
+                match_condition=MatchConditions.IfNotModified
+            )
+            counts[kind] += 1
+        except exceptions.CosmosResourceNotFoundError:
+            # 移行中にアプリケーションまたは TTL によって削除された
+            counts[kind] += 1
+        except exceptions.CosmosAccessConditionFailedError:
+            counts["remaining"] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="移行せずに件数だけを表示する")
+    args = parser.parse_args()
+
+    container = get_container()
+    docs = list(container.query_items(query="SELECT * FROM c", partition_key=PARTITION_KEY))
+    counts = migrate_documents(container, docs, dry_run=args.dry_run)
+    print(", ".join(f"{kind}: {count}" for kind, count in counts.items()) + (" (dry run)" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
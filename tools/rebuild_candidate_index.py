@@ -0,0 +1,70 @@
+"""
+既存のフォームの候補日から、候補日の逆引きインデックスを作成するツール。
+逆引きインデックスの導入前に保存されたフォームは、インデックスに登録されていないため、
+導入時に一度だけ実行する（登録済みのトークンは重複して登録されない）。
+
+実行方法:
+    python -m tools.rebuild_candidate_index
+    python -m tools.rebuild_candidate_index --dry-run
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from azure.cosmos import exceptions
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.dependencies import get_container
+from app.internal.cosmos import SLOT_INDEX_TYPE, read_partition_keys, slot_key, add_token_to_slot
+
+
+def collect_index(forms) -> dict:
+    """
+    フォームの一覧から、候補日のインデックスのキー → トークンのリストを作成する
+    """
+    index = {}
+    for form in forms:
+        for candidate in form.get("candidates") or []:
+            tokens = index.setdefault(slot_key(candidate), [])
+            if form["id"] not in tokens:
+                tokens.append(form["id"])
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="登録せずに件数だけを表示する")
+    args = parser.parse_args()
+
+    container = get_container()
+    # フォームはトークンごとのパーティションに分かれているため、パーティションをまたいで検索する
+    query = """
+    SELECT c.id, c.candidates FROM c
+    WHERE NOT IS_DEFINED(c.type) OR c.type != @slotIndexType
+    """
+    parameters = [{"name": "@slotIndexType", "value": SLOT_INDEX_TYPE}]
+    forms = container.query_items(query=query, parameters=parameters, enable_cross_partition_query=True)
+    index = collect_index(forms)
+
+    added = 0
+    for key, tokens in index.items():
+        registered = set()
+        for partition_key in read_partition_keys(key):
+            try:
+                registered.update(container.read_item(item=key, partition_key=partition_key).get("tokens", []))
+            except exceptions.CosmosResourceNotFoundError:
+                continue
+        for token in tokens:
+            if token in registered:
+                continue
+            added += 1
+            if not args.dry_run:
+                add_token_to_slot(key, token)
+
+    print(f"slots: {len(index)}, tokens added: {added}{' (dry run)' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()